@@ -26,12 +26,20 @@ import sys
 import sqlite3
 import argparse
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Iterable, Iterator
 import json
 import time
+import hashlib
 import re
 import logging
 import glob
+import threading
+import itertools
+import queue
+import weakref
+import multiprocessing
+import shutil
+from contextlib import contextmanager
 
 # Google Sheets Integration
 try:
@@ -82,6 +90,22 @@ except ImportError:
     print("WARNUNG: Pillow nicht verfügbar. Screenshot-Markierungen deaktiviert.")
     print("Installiere mit: pip install Pillow")
 
+# Parquet-Export für Auswertungen
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# Prozessweiter Google-Sheets-Client (eine Autorisierung pro Lauf)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+try:
+    import sheets_client
+except ImportError:
+    sheets_client = None
+
 # ========================= KONFIGURATION =========================
 # Aus segelliste_upload.py übernommene Konfiguration
 SERVICE_ACCOUNT_FILE = "/root/Skrip/segelliste-83c2a17a5e89.json"
@@ -93,11 +117,41 @@ if os.name == 'nt':  # Windows
     DB_PATH = os.path.join(os.path.expanduser("~"), "Documents", "Scripts", "schiffe.db")
     LOG_DIR = os.path.join(os.path.expanduser("~"), "Documents", "Scripts", "logs")
     SCREENSHOT_DIR = os.path.join(os.path.expanduser("~"), "Documents", "Scripts", "screenshots")
+    PARQUET_DIR = os.path.join(os.path.expanduser("~"), "Documents", "Scripts", "parquet")
 else:  # Linux
     SERVICE_ACCOUNT_FILE = "/root/Skrip/segelliste-83c2a17a5e89.json"
     DB_PATH = "/root/Skrip/Datenbank/schiffe.db"
     LOG_DIR = "/root/Skrip/Datenbank/Log"
     SCREENSHOT_DIR = "/root/Skrip/Datenbank/Fotos"
+    PARQUET_DIR = "/root/Skrip/Datenbank/Parquet"
+
+# SQLite-Verbindungseinstellungen (eine Verbindung pro Thread, WAL-Journal)
+DB_BUSY_TIMEOUT_MS = 5000
+DB_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",    # In WAL sicher, spart fsync pro Commit
+    "cache_size": -20000,       # ~20 MB Page-Cache
+    "mmap_size": 268435456,     # 256 MB Memory-Mapped I/O
+    "temp_store": "MEMORY",
+}
+
+# Schema-Migrationen (PRAGMA user_version): (Version, Beschreibung, Methode).
+# Neue Schritte nur hinten anhängen, bestehende nie nachträglich ändern.
+SCHEMA_MIGRATIONS = [
+    (1, "Basisschema (schiffe, positionen, import_historie)", "_migrate_basisschema"),
+    (2, "Index positionen(schiff_id, id)", "_migrate_positionen_index"),
+    (3, "Materialisierte aktuelle Position je Schiff", "_migrate_aktuelle_position"),
+    (4, "FTS5-Trigramm-Index über Schiffsnamen", "_migrate_name_index"),
+    (5, "Indizes für MMSI/IMO und Namenshistorie", "_migrate_identity_indexes"),
+    (6, "Positions-Historie als Intervalle mit Archiv", "_migrate_position_intervals"),
+    (7, "Änderungsprotokoll (CDC) für schiffe und positionen", "_migrate_change_log"),
+    (8, "Trigger-gepflegte Statistik-Tabellen", "_migrate_statistics"),
+    (9, "Zeilen-Fingerprints für den Sheet-Abgleich", "_migrate_sheet_abgleich"),
+    (10, "Namensindex mit normalize_ship_name() als SQL-Funktion", "_migrate_name_normalisierung"),
+    (11, "Index auf normalisierten Namen (exakte/Präfix-Suche)", "_migrate_name_norm_index"),
+]
+# Ab dieser Tabellengröße wird die Dauer eines Index-Aufbaus protokolliert
+ONLINE_INDEX_LOG_ROWS = 100000
 
 LOG_PREFIX = "schiffs_datenbank_"
 LOG_RETENTION_DAYS = 30
@@ -124,8 +178,11 @@ if not SCHIFFS_DATENBANK_API_KEY:
 
 # ========================= LOGGING =========================
 def setup_logging():
-    """Richtet das Logging-System ein"""
-    os.makedirs(LOG_DIR, exist_ok=True)
+    """Richtet das Logging-System ein (ohne beschreibbares LOG_DIR nur Konsole)"""
+    try:
+        os.makedirs(LOG_DIR, exist_ok=True)
+    except OSError:
+        pass
     today = datetime.now().strftime("%Y-%m-%d")
     logfile = os.path.join(LOG_DIR, f"{LOG_PREFIX}{today}.log")
     
@@ -160,8 +217,11 @@ def setup_logging():
     logger.handlers.clear()
     
     # File Handler
-    fh = logging.FileHandler(logfile, encoding="utf-8")
-    fh.setLevel(logging.INFO)
+    try:
+        fh = logging.FileHandler(logfile, encoding="utf-8")
+        fh.setLevel(logging.INFO)
+    except OSError:
+        fh = None
     
     # Console Handler
     ch = logging.StreamHandler(sys.stdout)
@@ -170,10 +230,11 @@ def setup_logging():
     # Format
     formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s", 
                                  datefmt="%Y-%m-%d %H:%M:%S")
-    fh.setFormatter(formatter)
     ch.setFormatter(formatter)
     
-    logger.addHandler(fh)
+    if fh is not None:
+        fh.setFormatter(formatter)
+        logger.addHandler(fh)
     logger.addHandler(ch)
     
     return logger
@@ -206,6 +267,266 @@ def log_section(title):
     logger.info(f"--- {title} ---")
 
 # ========================= DATENBANK KLASSE =========================
+# Optionale Spalten der Tabelle 'schiffe' (ohne name)
+SHIP_FIELDS = ['laenge', 'breite', 'tiefgang', 'imo_nummer', 'mmsi_nummer',
+               'typ', 'flagge', 'baujahr', 'vesselfinder_link']
+# Zahlenfelder davon (Eingaben wie '199,9' aus Sheets/Scraper werden umgewandelt)
+SHIP_NUMBER_FIELDS = {'laenge': float, 'breite': float, 'tiefgang': float, 'baujahr': int}
+
+def _ship_number(value, typ):
+    """Zahl für ein Zahlenfeld (auch deutsches Format), None wenn nicht umwandelbar"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if typ is int and not float(value).is_integer():
+            return None
+        return typ(value)
+    return sheets_client.convert_cell(value, typ)
+
+# Zeilen pro API-Aufruf beim Streaming-Export nach Google Sheets
+SHEETS_EXPORT_CHUNK_ROWS = 5000
+
+# Anzahl Zeilen pro executemany-Chunk in upsert_ships()
+UPSERT_CHUNK_SIZE = 500
+
+# Gefundene VesselFinder-Schiffe werden gesammelt und alle N Treffer geschrieben
+VESSELFINDER_DB_BATCH = 10
+
+# Browser-Worker-Pool (--workers N): globale Grenzen für shipfinder.com über alle Prozesse
+SCRAPER_DOMAIN = "shipfinder.com"
+SCRAPER_MAX_CONCURRENT = 6          # Gleichzeitige Suchen
+SCRAPER_RATE_PER_MINUTE = 20        # Suchstarts pro Minute (Mindestabstand 60/N s)
+SCRAPER_POLL_SECONDS = 5            # Prüfintervall auf abgestürzte Worker
+SCRAPER_STOP_TIMEOUT = 30           # Wartezeit auf Worker beim Beenden
+# Höchstwartezeit je Schritt in search_vessel (Sekunden); gewartet wird nur,
+# bis die jeweilige Bedingung erfüllt ist
+SCRAPER_STEP_TIMEOUTS = {
+    'seite': 15,        # Suchfeld im DOM
+    'netz': 3,          # Netzwerk ruhig (Consent-/Overlay-Skripte geladen)
+    'popup': 3,         # Popup nach Klick verschwunden
+    'suchfeld': 10,     # Suchfeld klickbar
+    'eingabe': 3,       # Fokus gesetzt / Text im Feld
+    'ergebnisse': 10,   # Trefferliste oder "nicht gefunden"
+    'detail': 10,       # #si_mmsi auf der Detailseite befüllt
+}
+SCRAPER_WAIT_POLL = 0.1             # Prüfintervall der Wartebedingungen
+SCRAPER_NETWORK_IDLE = 0.5          # So lange ohne neue Requests = Netzwerk ruhig
+SCRAPER_NETWORK_MAX_INFLIGHT = 2    # Offene Requests, die noch als ruhig gelten (Karten-Polling)
+
+# Protokollierte Spalten im Änderungsprotokoll 'aenderungen' (Trigger-gepflegt)
+CHANGE_LOG_COLUMNS = {
+    'schiffe': ['name'] + SHIP_FIELDS,
+    'positionen': ['liegeort', 'ankunft', 'abfahrt', 'status', 'zuletzt_gesehen', 'beobachtungen'],
+}
+# Einträge im Änderungsprotokoll werden nach N Tagen gelöscht
+CHANGE_LOG_RETENTION_DAYS = 30
+
+# Zeilen pro Abfrage in iter_ships() (Keyset-Paginierung über den Namen)
+ITER_BATCH_SIZE = 1000
+
+# Spalten einer ShipRow (schiffe + aktuelle Position)
+SHIP_ROW_COLUMNS = ['id', 'name'] + SHIP_FIELDS + ['erstellt_am', 'aktualisiert_am', 'liegeort', 'status']
+
+class ShipRow:
+    """
+    Schlanke Zeile aus iter_ships() (__slots__ statt Dictionary).
+    
+    Unterstützt ship.name, ship['name'] und ship.get('name') – damit
+    funktioniert bestehender Code, der mit Dictionaries arbeitet, unverändert.
+    """
+    __slots__ = SHIP_ROW_COLUMNS
+    
+    def __init__(self, values):
+        for column, value in zip(SHIP_ROW_COLUMNS, values):
+            setattr(self, column, value)
+    
+    def __getitem__(self, key):
+        return getattr(self, key)
+    
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+    
+    def as_dict(self) -> Dict:
+        return {column: getattr(self, column) for column in SHIP_ROW_COLUMNS}
+    
+    def __repr__(self):
+        return f"ShipRow(id={self.id!r}, name={self.name!r})"
+
+# Abgeschlossene Aufenthalte älter als N Tage werden monatsweise in
+# 'positionen_archiv' verdichtet und aus 'positionen' entfernt
+POSITION_RETENTION_DAYS = 180
+# Wird ein Schiff länger als N Stunden nicht gesehen, beginnt eine erneute
+# Beobachtung am selben Liegeort einen neuen Aufenthalt
+POSITION_GAP_HOURS = 48
+
+# Segelliste-Spalten für Ankunft/Abfahrt (Spaltenanfang, Ist-Zeiten vor Plan-Zeiten)
+SEGELLISTE_ZEIT_SPALTEN = {
+    'ankunft': ['ATA', 'Ankunft Ist', 'Ist-Ankunft', 'ETA', 'Ankunft', 'Arrival'],
+    'abfahrt': ['ATD', 'Abfahrt Ist', 'Ist-Abfahrt', 'ETD', 'Abfahrt', 'Departure'],
+}
+ZEIT_FORMATE = ['%d.%m.%Y %H:%M', '%d.%m.%Y %H:%M:%S', '%d.%m.%y %H:%M', '%d.%m.%Y',
+                '%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d']
+
+def parse_zeitpunkt(value) -> Optional[str]:
+    """Wandelt eine Zeitangabe der Segelliste in 'YYYY-MM-DD HH:MM:SS' (wie CURRENT_TIMESTAMP) um"""
+    text = str(value or '').strip()
+    if not text:
+        return None
+    for fmt in ZEIT_FORMATE:
+        try:
+            return datetime.strptime(text, fmt).strftime('%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            continue
+    return None
+
+def segelliste_zeit_spalten(columns: List[str]) -> Dict[str, List[int]]:
+    """Ermittelt die Spaltenindizes für Ankunft/Abfahrt in Prioritätsreihenfolge"""
+    result = {}
+    for key, candidates in SEGELLISTE_ZEIT_SPALTEN.items():
+        indices = []
+        for candidate in candidates:
+            for i, col in enumerate(columns):
+                if str(col).strip().upper().startswith(candidate.upper()) and i not in indices:
+                    indices.append(i)
+        result[key] = indices
+    return result
+
+# Spaltenpositionen der Segelliste (wie in segelliste_upload.py): C = Liegeort, D = Länge, E = Name
+SEGELLISTE_SPALTE_LIEGEORT = 2
+SEGELLISTE_SPALTE_LAENGE = 3
+SEGELLISTE_SPALTE_NAME = 4
+
+def parse_zeitpunkt_series(values: "pd.Series") -> "pd.Series":
+    """Spaltenweise Variante von parse_zeitpunkt() (erstes passendes Format gewinnt)"""
+    text = values.astype("string").str.strip().fillna('')
+    parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    pending = text[text != ''].astype(object)
+    for fmt in ZEIT_FORMATE:
+        if pending.empty:
+            break
+        found = pd.to_datetime(pending, format=fmt, errors="coerce")
+        hit = found.notna()
+        parsed[found.index[hit]] = found[hit]
+        pending = pending[~hit]
+    return parsed.dt.strftime('%Y-%m-%d %H:%M:%S').astype(object).where(parsed.notna(), None)
+
+def parse_zahl_series(values: "pd.Series") -> "pd.Series":
+    """Spaltenweise Zahlumwandlung ('199,9' / '1.234,5' / '200') → float, sonst NaN"""
+    text = values.astype("string").str.replace('\u00a0', '', regex=False).str.replace(' ', '', regex=False)
+    german = text.str.contains(',', regex=False, na=False)
+    text = text.where(~german, text.str.replace('.', '', regex=False).str.replace(',', '.', regex=False))
+    return pd.to_numeric(text, errors="coerce")
+
+def transform_segelliste(df: "pd.DataFrame", liegeorte: Optional[Iterable[str]] = None) -> "pd.DataFrame":
+    """
+    Wandelt die Segelliste spaltenweise in Schiffsbeobachtungen um.
+    
+    Namen werden normalisiert (Leerraum zusammengefasst), die Länge in Zahlen
+    umgewandelt, Ankunft/Abfahrt aus den Zeitspalten übernommen (erste
+    befüllte Spalte in Prioritätsreihenfolge), Zeilen ohne Namen verworfen
+    und identische Beobachtungen zusammengefasst.
+    
+    Args:
+        df: Segelliste wie von get_segelliste_data() (Header-Zeile als Spalten)
+        liegeorte: Nur diese Liegeorte übernehmen (Groß-/Kleinschreibung egal)
+        
+    Returns:
+        DataFrame mit den Spalten name, laenge, liegeort, ankunft, abfahrt
+        (fehlende Werte als None), Reihenfolge wie in der Segelliste
+    """
+    columns = ['name', 'laenge', 'liegeort', 'ankunft', 'abfahrt']
+    if df.shape[1] <= SEGELLISTE_SPALTE_NAME:
+        return pd.DataFrame(columns=columns)
+    
+    def text(position: int) -> "pd.Series":
+        return (df.iloc[:, position].astype("string").fillna('')
+                .str.replace(r'\s+', ' ', regex=True).str.strip())
+    
+    result = pd.DataFrame({
+        'name': text(SEGELLISTE_SPALTE_NAME),
+        'laenge': parse_zahl_series(df.iloc[:, SEGELLISTE_SPALTE_LAENGE]),
+        'liegeort': text(SEGELLISTE_SPALTE_LIEGEORT),
+    })
+    for key, indices in segelliste_zeit_spalten(df.columns.tolist()).items():
+        zeit = pd.Series(None, index=df.index, dtype=object)
+        for i in indices:
+            zeit = zeit.where(zeit.notna(), parse_zeitpunkt_series(df.iloc[:, i]))
+        result[key] = zeit
+    
+    keep = result['name'] != ''
+    if liegeorte is not None:
+        keep &= result['liegeort'].str.upper().isin({str(l).strip().upper() for l in liegeorte})
+    result = result[keep].drop_duplicates(subset=['name', 'liegeort', 'ankunft', 'abfahrt'])
+    return result.astype(object).where(result.notna(), None).reset_index(drop=True)
+
+def _same_value(a, b) -> bool:
+    """Vergleicht DB- und Eingabewert tolerant (z.B. '9597484' == 9597484, 200 == 200.0)"""
+    if a == b:
+        return True
+    if a is None or b is None:
+        return False
+    try:
+        return float(a) == float(b)
+    except (TypeError, ValueError):
+        return str(a).strip() == str(b).strip()
+
+# Zeichen, die bei der Namenssuche wie Leerzeichen behandelt werden
+NAME_SEPARATORS = "-./_,'"
+
+# Mindest-Ähnlichkeit (Trigramm-Jaccard) für fehlertolerante Treffer
+FUZZY_MIN_SIMILARITY = 0.3
+
+def normalize_ship_name(name: str) -> str:
+    """
+    Normalisiert einen Schiffsnamen für die Suche
+    (Großbuchstaben, Trennzeichen → Leerzeichen, Mehrfach-Leerzeichen entfernt)
+    """
+    text = str(name or '').upper()
+    for char in NAME_SEPARATORS:
+        text = text.replace(char, ' ')
+    return ' '.join(text.split())
+
+def _sql_normalize_name(expr: str) -> str:
+    """
+    normalize_ship_name() als SQL-Ausdruck für Trigger und Abfragen; die
+    Funktion wird auf jeder Verbindung registriert (_open_connection), damit
+    Trigger und Python-Suche exakt gleich normalisieren (Unicode, Leerraum).
+    """
+    return f"normalize_ship_name({expr})"
+
+def vessel_key(ship: Dict) -> Optional[str]:
+    """
+    Kanonischer Schiffsschlüssel, der Umbenennungen übersteht:
+    "IMO:<imo>" wenn bekannt, sonst "ID:<schiffe.id>" (die id bleibt bei
+    Umbenennungen erhalten, siehe upsert_ships()).
+    """
+    imo = str(ship.get('imo_nummer') or '').strip()
+    if imo:
+        return f"IMO:{imo}"
+    if ship.get('id') is not None:
+        return f"ID:{ship['id']}"
+    return None
+
+def _trigrams(text: str) -> set:
+    """Trigramm-Menge eines normalisierten Namens"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def _fts_phrase(text: str) -> str:
+    """Quotet einen Text als FTS5-Phrase"""
+    return '"' + text.replace('"', '""') + '"'
+
+class _ConnectionOwner:
+    """Lebt im Thread-Local; endet der Thread, wird seine Verbindung geschlossen"""
+
+def _release_connection(connections: Dict, lock: threading.Lock, key: int, conn: sqlite3.Connection):
+    """Schließt die Verbindung eines beendeten Threads (weakref.finalize)"""
+    with lock:
+        if connections.pop(key, None) is None:
+            return  # schon von close() geschlossen
+    try:
+        conn.commit()
+        conn.close()
+    except sqlite3.Error:
+        pass
+
 class SchiffsDatenbank:
     """Hauptklasse für die Verwaltung der Schiffsdatenbank"""
     
@@ -217,8 +538,12 @@ class SchiffsDatenbank:
             db_path: Pfad zur SQLite-Datenbankdatei
         """
         self.db_path = db_path
-        self.conn = None
-        self.cursor = None
+        # Eine Verbindung pro Thread, wird beim ersten connect() geöffnet und
+        # geschlossen, sobald der Thread endet (z.B. Request-Threads des Servers)
+        self._local = threading.local()
+        self._connections = {}
+        self._connections_lock = threading.Lock()
+        self._connected_once = False
         
         # Erstelle Verzeichnis für Datenbank, falls es nicht existiert
         db_dir = os.path.dirname(os.path.abspath(db_path))
@@ -228,29 +553,257 @@ class SchiffsDatenbank:
                 log_info(f"✓ Datenbankverzeichnis erstellt: {db_dir}")
             except Exception as e:
                 log_warning(f"⚠️  Konnte Datenbankverzeichnis nicht erstellen: {e}")
+    
+    @property
+    def conn(self) -> Optional[sqlite3.Connection]:
+        """Verbindung des aktuellen Threads (None, falls noch nicht verbunden)"""
+        return getattr(self._local, "conn", None)
+    
+    @property
+    def cursor(self) -> Optional[sqlite3.Cursor]:
+        """Cursor des aktuellen Threads (None, falls noch nicht verbunden)"""
+        return getattr(self._local, "cursor", None)
+    
+    def _open_connection(self) -> sqlite3.Connection:
+        """Öffnet eine neue Verbindung und setzt die Performance-PRAGMAs"""
+        # check_same_thread=False: benutzt wird sie nur vom eigenen Thread,
+        # geschlossen aber ggf. von close() oder dem Finalizer eines anderen
+        conn = sqlite3.connect(self.db_path, timeout=DB_BUSY_TIMEOUT_MS / 1000,
+                               check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout = {int(DB_BUSY_TIMEOUT_MS)}")
+        # Von den Namensindex-Triggern verwendet (siehe _sql_normalize_name)
+        conn.create_function("normalize_ship_name", 1, normalize_ship_name, deterministic=True)
+        for pragma, value in DB_PRAGMAS.items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
+        return conn
         
     def connect(self):
-        """Stellt die Verbindung zur Datenbank her"""
+        """
+        Stellt die Verbindung zur Datenbank her.
+        
+        Die Verbindung wird pro Thread einmal geöffnet und danach
+        wiederverwendet, weitere Aufrufe sind praktisch kostenlos.
+        Endet der Thread, wird seine Verbindung automatisch geschlossen.
+        """
+        if self.conn is not None:
+            return
         try:
-            self.conn = sqlite3.connect(self.db_path)
-            self.cursor = self.conn.cursor()
-            log_info(f"✓ Verbindung zur Datenbank hergestellt: {self.db_path}")
+            conn = self._open_connection()
+            owner = _ConnectionOwner()
+            self._local.owner = owner
+            self._local.conn = conn
+            self._local.cursor = conn.cursor()
+            self._local.tx_depth = 0
+            with self._connections_lock:
+                self._connections[id(owner)] = conn
+                first = not self._connected_once
+                self._connected_once = True
+            weakref.finalize(owner, _release_connection, self._connections,
+                             self._connections_lock, id(owner), conn)
+            if first:
+                log_info(f"✓ Verbindung zur Datenbank hergestellt: {self.db_path}")
+            else:
+                logger.debug(f"Verbindung für Thread {threading.current_thread().name} geöffnet")
         except sqlite3.Error as e:
             log_error(f"✗ Fehler beim Verbinden mit der Datenbank: {e}")
             sys.exit(1)
     
     def disconnect(self):
-        """Schließt die Datenbankverbindung"""
-        if self.conn:
-            self.conn.close()
+        """
+        Gibt die Datenbankverbindung frei.
+        
+        Die Verbindung des Threads bleibt für weitere Aufrufe offen,
+        offene Änderungen außerhalb eines transaction()-Blocks werden
+        committet. Zum endgültigen Schließen close() verwenden.
+        """
+        if self.conn is not None and not self.in_transaction():
+            self.conn.commit()
+    
+    def close(self):
+        """Schließt alle Verbindungen dieser Datenbank-Instanz (alle Threads)"""
+        with self._connections_lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+            self._connected_once = False
+        for conn in connections:
+            try:
+                conn.commit()
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+        if connections:
             log_info("✓ Datenbankverbindung geschlossen")
     
+    def in_transaction(self) -> bool:
+        """Gibt True zurück, wenn der aktuelle Thread in einem transaction()-Block ist"""
+        return getattr(self._local, "tx_depth", 0) > 0
+    
+    def commit(self):
+        """Committet offene Änderungen, außer innerhalb eines transaction()-Blocks"""
+        if self.conn is not None and not self.in_transaction():
+            self.conn.commit()
+    
+    @contextmanager
+    def read_snapshot(self):
+        """
+        Context Manager für einen konsistenten Lese-Schnappschuss (WAL).
+        
+        Alle Abfragen im Block sehen denselben Datenbankstand, ohne Schreiber
+        anderer Prozesse zu blockieren (z.B. Änderungsnummer + Daten beim Export).
+        """
+        self.connect()
+        conn = self.conn
+        if self._local.tx_depth > 0 or conn.in_transaction:
+            yield self
+            return
+        conn.execute("BEGIN")
+        self._local.tx_depth += 1
+        try:
+            yield self
+        finally:
+            self._local.tx_depth -= 1
+            conn.commit()
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Context Manager für eine Transaktion über viele Operationen.
+        
+        Alle add_ship()/commit()-Aufrufe innerhalb des Blocks laufen über
+        dieselbe Verbindung und werden am Ende mit einem einzigen Commit
+        geschrieben (Rollback bei Exception). Verschachtelte Blöcke
+        werden in den äußeren Block eingegliedert.
+        
+        Beispiel:
+            with db.transaction():
+                for row in rows:
+                    db.add_ship(...)
+        """
+        self.connect()
+        conn = self.conn
+        if self._local.tx_depth == 0 and not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+        self._local.tx_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._local.tx_depth -= 1
+            if self._local.tx_depth == 0:
+                conn.rollback()
+            raise
+        else:
+            self._local.tx_depth -= 1
+            if self._local.tx_depth == 0:
+                conn.commit()
+    
     def init_database(self):
-        """Erstellt die Datenbanktabellen, falls sie noch nicht existieren"""
+        """Erstellt die Datenbanktabellen bzw. bringt das Schema auf den neuesten Stand"""
         log_section("Datenbank Initialisierung")
         self.connect()
+        self.migrate()
         
-        log_info("Erstelle Tabelle 'schiffe'...")
+        log_info("✓ Datenbank erfolgreich initialisiert")
+        log_info(f"  Datenbankpfad: {self.db_path}")
+        log_info(f"  Schema-Version: {self.schema_version()}")
+        log_info(f"  - Tabelle 'schiffe' erstellt/überprüft")
+        log_info(f"  - Tabelle 'positionen' erstellt/überprüft")
+        log_info(f"  - Tabelle 'import_historie' erstellt/überprüft")
+        log_info(f"  - Tabelle 'aktuelle_position' erstellt/überprüft")
+    
+    # ----------------------- Schema-Migrationen -----------------------
+    
+    def schema_version(self) -> int:
+        """Aktuelle Schema-Version (PRAGMA user_version)"""
+        self.connect()
+        return self.conn.execute("PRAGMA user_version").fetchone()[0]
+    
+    def pending_migrations(self) -> List[Tuple[int, str, str]]:
+        """Liste der noch nicht angewendeten Migrationen (Version, Beschreibung, Methode)"""
+        current = self.schema_version()
+        return [step for step in SCHEMA_MIGRATIONS if step[0] > current]
+    
+    def migrate(self, dry_run: bool = False) -> List[Tuple[int, str, str]]:
+        """
+        Wendet alle ausstehenden Schema-Migrationen der Reihe nach an.
+        
+        Jeder Schritt läuft in einer eigenen Transaktion zusammen mit dem
+        Hochsetzen von PRAGMA user_version – schlägt ein Schritt fehl, bleibt
+        die Datenbank auf dem letzten vollständigen Stand. Alle Schritte sind
+        idempotent (IF NOT EXISTS), eine bereits manuell angelegte Datenbank
+        mit user_version 0 wird daher gefahrlos nachgezogen.
+        
+        Args:
+            dry_run: Nur anzeigen, welche Schritte ausstehen
+        
+        Returns:
+            Liste der (ausstehenden bzw. angewendeten) Migrationen
+        """
+        pending = self.pending_migrations()
+        current = self.schema_version()
+        latest = SCHEMA_MIGRATIONS[-1][0]
+        
+        if not pending:
+            log_info(f"✓ Schema aktuell (Version {current})")
+            return []
+        
+        log_info(f"Schema-Version {current} → {latest}: {len(pending)} Migration(en) ausstehend")
+        for version, beschreibung, _ in pending:
+            log_info(f"  • {version:03d}: {beschreibung}")
+        if dry_run:
+            log_info("  (Testlauf – keine Änderungen vorgenommen)")
+            return pending
+        
+        for version, beschreibung, method in pending:
+            start = time.time()
+            log_info(f"Migration {version:03d}: {beschreibung}...")
+            try:
+                with self.transaction():
+                    getattr(self, method)()
+                    # PRAGMA user_version ist Teil der Transaktion (Datenbank-Header)
+                    self.cursor.execute(f"PRAGMA user_version = {int(version)}")
+            except sqlite3.Error as e:
+                log_error(f"✗ Migration {version:03d} fehlgeschlagen: {e}")
+                raise
+            log_info(f"✓ Migration {version:03d} angewendet ({time.time() - start:.2f}s)")
+        
+        # Statistiken für den Query-Planer nach neuen Indizes aktualisieren
+        self.conn.execute("PRAGMA optimize")
+        return pending
+    
+    def _create_index(self, name: str, table: str, columns: str,
+                      unique: bool = False, where: Optional[str] = None):
+        """
+        Legt einen Index an, falls er fehlt, und protokolliert die Dauer bei großen Tabellen.
+        
+        SQLite baut Indizes blockierend; im WAL-Modus lesen andere Prozesse
+        währenddessen weiter, nur Schreiber warten (busy_timeout). Indizes auf
+        großen Tabellen bekommen deshalb eigene Migrationsschritte, damit die
+        Schreibsperre jeweils nur für einen Index gehalten wird.
+        """
+        self.cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)
+        )
+        if self.cursor.fetchone():
+            return
+        self.cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        rows = self.cursor.fetchone()[0]
+        start = time.time()
+        self.cursor.execute(
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON {table}({columns})"
+            + (f" WHERE {where}" if where else "")
+        )
+        if rows >= ONLINE_INDEX_LOG_ROWS:
+            log_info(f"  Index {name} über {rows} Zeilen erstellt ({time.time() - start:.2f}s)")
+    
+    def _add_column(self, table: str, column: str, definition: str):
+        """Fügt eine Spalte hinzu, falls sie noch nicht existiert"""
+        self.cursor.execute(f"PRAGMA table_info({table})")
+        if column not in [row[1] for row in self.cursor.fetchall()]:
+            self.cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    
+    def _migrate_basisschema(self):
+        """Migration 001: Tabellen schiffe, positionen, import_historie"""
         # Haupttabelle für Schiffe
         self.cursor.execute("""
             CREATE TABLE IF NOT EXISTS schiffe (
@@ -270,7 +823,6 @@ class SchiffsDatenbank:
             )
         """)
         
-        log_info("Erstelle Tabelle 'positionen'...")
         # Tabelle für Liegeorte/Positionen
         self.cursor.execute("""
             CREATE TABLE IF NOT EXISTS positionen (
@@ -286,7 +838,6 @@ class SchiffsDatenbank:
             )
         """)
         
-        log_info("Erstelle Tabelle 'import_historie'...")
         # Tabelle für Import-Historie
         self.cursor.execute("""
             CREATE TABLE IF NOT EXISTS import_historie (
@@ -299,18 +850,442 @@ class SchiffsDatenbank:
             )
         """)
         
-        log_info("Erstelle Indizes...")
         # Index für schnellere Suche
+        self._create_index("idx_schiffe_name", "schiffe", "name")
+    
+    def _migrate_positionen_index(self):
+        """Migration 002: Zusammengesetzter Index für "neueste Position je Schiff" """
+        self._create_index("idx_positionen_schiff_id", "positionen", "schiff_id, id")
+    
+    def _migrate_aktuelle_position(self):
+        """Migration 003: Materialisierte aktuelle Position je Schiff (per Trigger gepflegt)"""
         self.cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_schiffe_name ON schiffe(name)
+            CREATE TABLE IF NOT EXISTS aktuelle_position (
+                schiff_id INTEGER PRIMARY KEY,
+                position_id INTEGER NOT NULL,
+                liegeort TEXT,
+                status TEXT,
+                FOREIGN KEY (schiff_id) REFERENCES schiffe(id) ON DELETE CASCADE
+            )
         """)
+        self._create_index("idx_aktuelle_position_liegeort", "aktuelle_position", "liegeort")
+        self._create_position_triggers()
         
-        self.conn.commit()
-        log_info("✓ Datenbank erfolgreich initialisiert")
-        log_info(f"  Datenbankpfad: {self.db_path}")
-        log_info(f"  - Tabelle 'schiffe' erstellt/überprüft")
-        log_info(f"  - Tabelle 'positionen' erstellt/überprüft")
-        log_info(f"  - Tabelle 'import_historie' erstellt/überprüft")
+        # Einmalig aus bestehender Historie befüllen (z.B. bei vorhandener Datenbank)
+        self.cursor.execute("SELECT COUNT(*) FROM aktuelle_position")
+        if self.cursor.fetchone()[0] == 0:
+            self.refresh_current_positions()
+    
+    def _migrate_name_index(self):
+        """Migration 004: FTS5-Trigramm-Index über die Schiffsnamen"""
+        self._create_name_index()
+        self._name_index_available = None
+    
+    def _migrate_identity_indexes(self):
+        """Migration 005: Indizes für MMSI/IMO und Namenshistorie"""
+        self._create_identity_indexes()
+    
+    def _migrate_change_log(self):
+        """
+        Migration 007: Trigger-gepflegtes Änderungsprotokoll (Change Data Capture).
+        
+        Jede Änderung an schiffe/positionen erzeugt eine Zeile mit fortlaufender
+        Nummer (seq), Zeilen-id, Aktion (I/U/D) und geänderten Spalten. Verbraucher
+        (Sheet-Abgleich, Parquet-Export, Caches) merken sich ihre letzte seq in
+        'cdc_checkpoints' und verarbeiten nur noch das Delta.
+        """
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS aenderungen (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                tabelle TEXT NOT NULL,
+                zeilen_id INTEGER NOT NULL,
+                aktion TEXT NOT NULL,
+                spalten TEXT,
+                zeitpunkt TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS cdc_checkpoints (
+                verbraucher TEXT PRIMARY KEY,
+                seq INTEGER NOT NULL,
+                aktualisiert_am TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        for table, columns in CHANGE_LOG_COLUMNS.items():
+            self._create_change_triggers(table, columns)
+    
+    def _migrate_statistics(self):
+        """
+        Migration 008: Zähler für get_statistics(), per Trigger aktuell gehalten.
+        
+        'statistik' enthält Anzahl/Summe je Kennzahl ('schiffe', 'laenge'),
+        'statistik_liegeort' die Anzahl Schiffe je aktuellem Liegeort.
+        """
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS statistik (
+                schluessel TEXT PRIMARY KEY,
+                anzahl INTEGER NOT NULL DEFAULT 0,
+                summe REAL NOT NULL DEFAULT 0
+            )
+        """)
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS statistik_liegeort (
+                liegeort TEXT PRIMARY KEY,
+                anzahl INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        # Letzter Import per Index statt Sortierung der ganzen Historie
+        self._create_index("idx_import_historie_zeitpunkt", "import_historie", "zeitpunkt")
+        
+        self.cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_statistik_schiffe_insert
+            AFTER INSERT ON schiffe
+            BEGIN
+                UPDATE statistik SET anzahl = anzahl + 1 WHERE schluessel = 'schiffe';
+                UPDATE statistik SET anzahl = anzahl + 1, summe = summe + NEW.laenge
+                WHERE schluessel = 'laenge' AND NEW.laenge IS NOT NULL;
+            END
+        """)
+        self.cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_statistik_schiffe_delete
+            AFTER DELETE ON schiffe
+            BEGIN
+                UPDATE statistik SET anzahl = anzahl - 1 WHERE schluessel = 'schiffe';
+                UPDATE statistik SET anzahl = anzahl - 1, summe = summe - OLD.laenge
+                WHERE schluessel = 'laenge' AND OLD.laenge IS NOT NULL;
+            END
+        """)
+        self.cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_statistik_schiffe_laenge
+            AFTER UPDATE OF laenge ON schiffe
+            WHEN OLD.laenge IS NOT NEW.laenge
+            BEGIN
+                UPDATE statistik
+                SET anzahl = anzahl - (OLD.laenge IS NOT NULL) + (NEW.laenge IS NOT NULL),
+                    summe = summe - COALESCE(OLD.laenge, 0) + COALESCE(NEW.laenge, 0)
+                WHERE schluessel = 'laenge';
+            END
+        """)
+        
+        # Liegeort-Zähler folgen 'aktuelle_position' (selbst per Trigger gepflegt)
+        increment = """
+                INSERT INTO statistik_liegeort (liegeort, anzahl) VALUES (NEW.liegeort, 1)
+                ON CONFLICT(liegeort) DO UPDATE SET anzahl = anzahl + 1;"""
+        decrement = """
+                UPDATE statistik_liegeort SET anzahl = anzahl - 1 WHERE liegeort = OLD.liegeort;
+                DELETE FROM statistik_liegeort WHERE liegeort = OLD.liegeort AND anzahl <= 0;"""
+        self.cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_statistik_position_insert
+            AFTER INSERT ON aktuelle_position
+            WHEN NEW.liegeort IS NOT NULL
+            BEGIN{increment}
+            END
+        """)
+        self.cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_statistik_position_delete
+            AFTER DELETE ON aktuelle_position
+            WHEN OLD.liegeort IS NOT NULL
+            BEGIN{decrement}
+            END
+        """)
+        self.cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_statistik_position_update_alt
+            AFTER UPDATE OF liegeort ON aktuelle_position
+            WHEN OLD.liegeort IS NOT NEW.liegeort AND OLD.liegeort IS NOT NULL
+            BEGIN{decrement}
+            END
+        """)
+        self.cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_statistik_position_update_neu
+            AFTER UPDATE OF liegeort ON aktuelle_position
+            WHEN OLD.liegeort IS NOT NEW.liegeort AND NEW.liegeort IS NOT NULL
+            BEGIN{increment}
+            END
+        """)
+        
+        self.refresh_statistics(full=True)
+    
+    def _migrate_sheet_abgleich(self):
+        """
+        Migration 009: Zeilen-Fingerprints für den bidirektionalen Sheet-Abgleich.
+        
+        Je Blatt und Schiffsname der Hash der Sheet-Werte und der Datenbank-Werte
+        nach dem letzten Abgleich sowie die abgeglichenen Feldwerte ('basis', JSON)
+        als gemeinsamer Ausgangsstand für die Konflikterkennung (siehe sync_hhla_sheet).
+        """
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sheet_abgleich (
+                blatt TEXT NOT NULL,
+                name TEXT NOT NULL,
+                sheet_hash TEXT NOT NULL,
+                db_hash TEXT NOT NULL,
+                basis TEXT NOT NULL,
+                abgeglichen_am TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (blatt, name)
+            )
+        """)
+    
+    def _migrate_name_normalisierung(self):
+        """
+        Migration 010: Namensindex-Trigger auf die SQL-Funktion normalize_ship_name()
+        umstellen und den Index neu aufbauen (die alte reine SQL-Variante
+        normalisierte Umlaute und Leerraum anders als die Python-Suche).
+        """
+        if not self._has_name_index():
+            return
+        self.cursor.execute("DROP TRIGGER IF EXISTS trg_schiffe_fts_insert")
+        self.cursor.execute("DROP TRIGGER IF EXISTS trg_schiffe_fts_update")
+        self.cursor.execute("DELETE FROM schiffe_fts")
+        self._create_name_index()
+    
+    def _migrate_name_norm_index(self):
+        """Migration 011: Ausdrucksindex für exakte und Präfix-Treffer in search_ships_ranked()"""
+        self._create_index("idx_schiffe_name_norm", "schiffe", _sql_normalize_name('name'))
+    
+    def _create_change_triggers(self, table: str, columns: List[str]):
+        """Legt die CDC-Trigger (Insert/Update/Delete) für eine Tabelle an"""
+        changed = " || ".join(
+            f"CASE WHEN OLD.{c} IS NOT NEW.{c} THEN '{c},' ELSE '' END" for c in columns
+        )
+        any_changed = " OR ".join(f"OLD.{c} IS NOT NEW.{c}" for c in columns)
+        self.cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_cdc_insert
+            AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO aenderungen (tabelle, zeilen_id, aktion) VALUES ('{table}', NEW.id, 'I');
+            END
+        """)
+        self.cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_cdc_update
+            AFTER UPDATE ON {table}
+            WHEN {any_changed}
+            BEGIN
+                INSERT INTO aenderungen (tabelle, zeilen_id, aktion, spalten)
+                VALUES ('{table}', NEW.id, 'U', rtrim({changed}, ','));
+            END
+        """)
+        self.cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_cdc_delete
+            AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO aenderungen (tabelle, zeilen_id, aktion) VALUES ('{table}', OLD.id, 'D');
+            END
+        """)
+    
+    def _migrate_position_intervals(self):
+        """
+        Migration 006: Eine Zeile in 'positionen' = ein Aufenthalt
+        (ankunft bis abfahrt bzw. zuletzt_gesehen) statt einer Zeile pro Import
+        """
+        self._add_column("positionen", "zuletzt_gesehen", "TIMESTAMP")
+        self._add_column("positionen", "beobachtungen", "INTEGER NOT NULL DEFAULT 1")
+        self.cursor.execute("""
+            UPDATE positionen
+            SET zuletzt_gesehen = COALESCE(zuletzt_gesehen, erstellt_am),
+                ankunft = COALESCE(ankunft, erstellt_am)
+            WHERE zuletzt_gesehen IS NULL OR ankunft IS NULL
+        """)
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS positionen_archiv (
+                schiff_id INTEGER NOT NULL,
+                liegeort TEXT NOT NULL,
+                monat TEXT NOT NULL,
+                aufenthalte INTEGER NOT NULL,
+                erste_ankunft TIMESTAMP,
+                letzte_abfahrt TIMESTAMP,
+                PRIMARY KEY (schiff_id, liegeort, monat),
+                FOREIGN KEY (schiff_id) REFERENCES schiffe(id) ON DELETE CASCADE
+            )
+        """)
+        # Bisherige Import-Duplikate zu Intervallen zusammenfassen
+        self.coalesce_position_history()
+        self._create_index("idx_positionen_liegeort_ankunft", "positionen", "liegeort, ankunft")
+    
+    def _create_position_triggers(self):
+        """Legt die Trigger an, die 'aktuelle_position' mit 'positionen' synchron halten"""
+        # Neue Position wird zur aktuellen Position (höchste id gewinnt)
+        self.cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_positionen_insert
+            AFTER INSERT ON positionen
+            BEGIN
+                INSERT INTO aktuelle_position (schiff_id, position_id, liegeort, status)
+                VALUES (NEW.schiff_id, NEW.id, NEW.liegeort, NEW.status)
+                ON CONFLICT(schiff_id) DO UPDATE SET
+                    position_id = excluded.position_id,
+                    liegeort = excluded.liegeort,
+                    status = excluded.status
+                WHERE excluded.position_id >= aktuelle_position.position_id;
+            END
+        """)
+        # Änderung an der aktuellen Position übernehmen
+        self.cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_positionen_update
+            AFTER UPDATE OF liegeort, status ON positionen
+            BEGIN
+                UPDATE aktuelle_position
+                SET liegeort = NEW.liegeort, status = NEW.status
+                WHERE schiff_id = NEW.schiff_id AND position_id = NEW.id;
+            END
+        """)
+        # Gelöschte aktuelle Position: auf die vorherige zurückfallen (nutzt idx_positionen_schiff_id)
+        self.cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_positionen_delete
+            AFTER DELETE ON positionen
+            WHEN OLD.id = (SELECT position_id FROM aktuelle_position WHERE schiff_id = OLD.schiff_id)
+            BEGIN
+                DELETE FROM aktuelle_position WHERE schiff_id = OLD.schiff_id;
+                INSERT INTO aktuelle_position (schiff_id, position_id, liegeort, status)
+                SELECT schiff_id, id, liegeort, status
+                FROM positionen
+                WHERE schiff_id = OLD.schiff_id
+                ORDER BY id DESC
+                LIMIT 1;
+            END
+        """)
+        # Schiff gelöscht: aktuelle Position entfernen (auch ohne PRAGMA foreign_keys)
+        self.cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_schiffe_delete_position
+            AFTER DELETE ON schiffe
+            BEGIN
+                DELETE FROM aktuelle_position WHERE schiff_id = OLD.id;
+            END
+        """)
+    
+    def _create_name_index(self):
+        """
+        Legt den FTS5-Trigramm-Index über die normalisierten Schiffsnamen an
+        (rowid = schiffe.id) und hält ihn per Trigger synchron.
+        """
+        try:
+            self.cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS schiffe_fts
+                USING fts5(name, tokenize = 'trigram')
+            """)
+        except sqlite3.OperationalError as e:
+            log_warning(f"⚠️  FTS5/Trigramm nicht verfügbar, Suche nutzt LIKE: {e}")
+            return
+        
+        self.cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_schiffe_fts_insert
+            AFTER INSERT ON schiffe
+            BEGIN
+                INSERT INTO schiffe_fts (rowid, name) VALUES (NEW.id, {_sql_normalize_name('NEW.name')});
+            END
+        """)
+        self.cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_schiffe_fts_update
+            AFTER UPDATE OF name ON schiffe
+            BEGIN
+                DELETE FROM schiffe_fts WHERE rowid = OLD.id;
+                INSERT INTO schiffe_fts (rowid, name) VALUES (NEW.id, {_sql_normalize_name('NEW.name')});
+            END
+        """)
+        self.cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_schiffe_fts_delete
+            AFTER DELETE ON schiffe
+            BEGIN
+                DELETE FROM schiffe_fts WHERE rowid = OLD.id;
+            END
+        """)
+        
+        # Einmalig befüllen, falls der Index neu ist
+        self.cursor.execute("SELECT COUNT(*) FROM schiffe_fts")
+        if self.cursor.fetchone()[0] == 0:
+            self.cursor.execute(f"""
+                INSERT INTO schiffe_fts (rowid, name)
+                SELECT id, {_sql_normalize_name('name')} FROM schiffe
+            """)
+    
+    def _create_identity_indexes(self):
+        """
+        Legt Indizes für MMSI/IMO (IMO eindeutig) und die Namenshistorie an.
+        
+        'schiffs_namen' ordnet jeden jemals verwendeten Namen der stabilen
+        schiffe.id zu, sodass Umbenennungen den Schiffsschlüssel nicht ändern.
+        """
+        self._create_index("idx_schiffe_mmsi", "schiffe", "mmsi_nummer")
+        
+        # IMO-Eindeutigkeit nur erzwingen, wenn der Bestand keine Duplikate enthält
+        self.cursor.execute("""
+            SELECT imo_nummer, COUNT(*) FROM schiffe
+            WHERE imo_nummer IS NOT NULL AND imo_nummer <> ''
+            GROUP BY imo_nummer HAVING COUNT(*) > 1
+        """)
+        duplicates = self.cursor.fetchall()
+        if duplicates:
+            log_warning(f"⚠️  {len(duplicates)} doppelte IMO-Nummern gefunden, IMO-Index nicht eindeutig:")
+            for imo, count in duplicates[:20]:
+                log_warning(f"     • IMO {imo}: {count} Schiffe")
+            self._create_index("idx_schiffe_imo_nonunique", "schiffe", "imo_nummer")
+        else:
+            self.cursor.execute("DROP INDEX IF EXISTS idx_schiffe_imo_nonunique")
+            self._create_index("idx_schiffe_imo", "schiffe", "imo_nummer", unique=True,
+                               where="imo_nummer IS NOT NULL AND imo_nummer <> ''")
+        
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schiffs_namen (
+                name TEXT PRIMARY KEY,
+                schiff_id INTEGER NOT NULL,
+                seit TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (schiff_id) REFERENCES schiffe(id) ON DELETE CASCADE
+            )
+        """)
+        self._create_index("idx_schiffs_namen_schiff_id", "schiffs_namen", "schiff_id")
+        self.cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_schiffe_namen_insert
+            AFTER INSERT ON schiffe
+            BEGIN
+                INSERT OR REPLACE INTO schiffs_namen (name, schiff_id) VALUES (NEW.name, NEW.id);
+            END
+        """)
+        self.cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_schiffe_namen_update
+            AFTER UPDATE OF name ON schiffe
+            BEGIN
+                INSERT OR REPLACE INTO schiffs_namen (name, schiff_id) VALUES (NEW.name, NEW.id);
+            END
+        """)
+        self.cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_schiffe_namen_delete
+            AFTER DELETE ON schiffe
+            BEGIN
+                DELETE FROM schiffs_namen WHERE schiff_id = OLD.id;
+            END
+        """)
+        self.cursor.execute("""
+            INSERT OR IGNORE INTO schiffs_namen (name, schiff_id)
+            SELECT name, id FROM schiffe
+        """)
+    
+    def _has_name_index(self) -> bool:
+        """Prüft (einmal pro Instanz), ob der FTS5-Namensindex existiert"""
+        if getattr(self, "_name_index_available", None) is None:
+            self.connect()
+            self.cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schiffe_fts'"
+            )
+            self._name_index_available = self.cursor.fetchone() is not None
+        return self._name_index_available
+    
+    def refresh_current_positions(self):
+        """
+        Baut 'aktuelle_position' komplett aus 'positionen' neu auf.
+        
+        Wird nur zur Reparatur bzw. beim ersten Anlegen der Tabelle benötigt,
+        im Normalbetrieb halten die Trigger die Tabelle aktuell.
+        """
+        self.connect()
+        self.cursor.execute("DELETE FROM aktuelle_position")
+        self.cursor.execute("""
+            INSERT INTO aktuelle_position (schiff_id, position_id, liegeort, status)
+            SELECT p.schiff_id, p.id, p.liegeort, p.status
+            FROM positionen p
+            JOIN (
+                SELECT schiff_id, MAX(id) AS max_id FROM positionen GROUP BY schiff_id
+            ) m ON p.id = m.max_id
+        """)
+        self.commit()
+        log_info(f"✓ Aktuelle Positionen neu aufgebaut ({self.cursor.rowcount} Schiffe)")
         
     def add_ship(self, name: str, laenge: Optional[float] = None, 
                  liegeort: Optional[str] = None, **kwargs) -> int:
@@ -343,8 +1318,7 @@ class SchiffsDatenbank:
                 values.append(laenge)
             
             for key, value in kwargs.items():
-                if value is not None and key in ['breite', 'tiefgang', 'imo_nummer', 'mmsi_nummer', 
-                                                   'typ', 'flagge', 'baujahr', 'vesselfinder_link']:
+                if value is not None and key in SHIP_FIELDS:
                     update_fields.append(f"{key} = ?")
                     values.append(value)
             
@@ -366,8 +1340,7 @@ class SchiffsDatenbank:
                 placeholders.append('?')
             
             for key, value in kwargs.items():
-                if value is not None and key in ['breite', 'tiefgang', 'imo_nummer', 'mmsi_nummer', 
-                                                   'typ', 'flagge', 'baujahr', 'vesselfinder_link']:
+                if value is not None and key in SHIP_FIELDS:
                     fields.append(key)
                     values.append(value)
                     placeholders.append('?')
@@ -377,45 +1350,721 @@ class SchiffsDatenbank:
             ship_id = self.cursor.lastrowid
             log_info(f"✓ Neues Schiff hinzugefügt: {name} (ID: {ship_id})")
         
-        # Füge Position hinzu, falls Liegeort angegeben
+        # Position eintragen bzw. offenes Intervall verlängern, falls Liegeort angegeben
         if liegeort:
-            self.cursor.execute("""
-                INSERT INTO positionen (schiff_id, liegeort, status)
-                VALUES (?, ?, 'aktiv')
-            """, (ship_id, liegeort))
+            self.record_positions([(name, liegeort, parse_zeitpunkt(kwargs.get('ankunft')),
+                                    parse_zeitpunkt(kwargs.get('abfahrt')))])
         
-        self.conn.commit()
+        self.commit()
         self.disconnect()
         return ship_id
     
+    def upsert_ships(self, ships: Iterable[Dict], chunk_size: int = UPSERT_CHUNK_SIZE,
+                     complete_positions: bool = False) -> Dict[str, int]:
+        """
+        Schreibt viele Schiffe auf einmal (Bulk-Upsert).
+        
+        Nutzt INSERT ... ON CONFLICT(name) DO UPDATE mit COALESCE-Semantik:
+        Felder mit None (oder leerem String) überschreiben keine vorhandenen
+        Werte. Alles läuft in einer Transaktion, geschrieben wird in Chunks
+        per executemany. Doppelte Namen in der Eingabe werden zusammengeführt
+        (spätere Werte gewinnen). Zahlenfelder (SHIP_NUMBER_FIELDS) werden wie
+        beim Sheet-Import umgewandelt ('199,9' → 199.9), nicht lesbare Werte
+        werden mit Warnung ignoriert. Ein optionaler 'liegeort' (mit 'ankunft'/
+        'abfahrt') wird wie bei add_ship() über record_positions() eingetragen.
+        
+        Taucht eine bekannte IMO unter einem neuen, noch unbekannten Namen auf,
+        wird das bestehende Schiff umbenannt (IMO ist eindeutig, der alte Name
+        bleibt über get_by_name() auflösbar).
+        
+        Args:
+            ships: Iterable von Dictionaries mit 'name' und Feldern aus SHIP_FIELDS
+            chunk_size: Anzahl Zeilen pro executemany-Aufruf
+            complete_positions: Eingabe ist die vollständige Liegeliste (voller
+                                Import); Schiffe ohne Liegeort darin gelten als
+                                abgefahren (siehe record_positions)
+            
+        Returns:
+            Dictionary mit Zählern 'inserted', 'updated', 'unchanged'
+        """
+        # Eingabe normalisieren und doppelte Namen zusammenführen
+        merged: Dict[str, Dict] = {}
+        positions: List[Tuple[str, str, Optional[str], Optional[str]]] = []
+        for ship in ships:
+            name = str(ship.get('name') or '').strip()
+            if not name:
+                continue
+            record = merged.setdefault(name, {field: None for field in SHIP_FIELDS})
+            for field in SHIP_FIELDS:
+                value = ship.get(field)
+                if isinstance(value, str):
+                    value = value.strip() or None
+                if value is not None and field in SHIP_NUMBER_FIELDS:
+                    number = _ship_number(value, SHIP_NUMBER_FIELDS[field])
+                    if number is None:
+                        log_warning(f"  ⚠️  {name}: {field} '{value}' ist keine Zahl, nicht übernommen")
+                    value = number
+                if value is not None:
+                    record[field] = value
+            liegeort = ship.get('liegeort')
+            if liegeort and str(liegeort).strip():
+                positions.append((name, str(liegeort).strip(),
+                                  parse_zeitpunkt(ship.get('ankunft')),
+                                  parse_zeitpunkt(ship.get('abfahrt'))))
+        
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        if not merged:
+            return counts
+        
+        columns = ['name'] + SHIP_FIELDS
+        changed_check = " OR ".join(
+            f"(excluded.{f} IS NOT NULL AND schiffe.{f} IS NOT excluded.{f})" for f in SHIP_FIELDS
+        )
+        upsert_sql = f"""
+            INSERT INTO schiffe ({', '.join(columns)})
+            VALUES ({', '.join('?' for _ in columns)})
+            ON CONFLICT(name) DO UPDATE SET
+                {', '.join(f"{f} = COALESCE(excluded.{f}, schiffe.{f})" for f in SHIP_FIELDS)},
+                aktualisiert_am = CURRENT_TIMESTAMP
+            WHERE {changed_check}
+        """
+        
+        names = list(merged)
+        imo_owner: Dict[str, Tuple[Optional[int], str]] = {}
+        with self.transaction():
+            for start in range(0, len(names), chunk_size):
+                chunk = names[start:start + chunk_size]
+                
+                # Bestehende Zeilen des Chunks mit einer Abfrage laden
+                self.cursor.execute(
+                    f"SELECT {', '.join(columns)} FROM schiffe WHERE name IN ({', '.join('?' for _ in chunk)})",
+                    chunk
+                )
+                existing = {row[0]: row[1:] for row in self.cursor.fetchall()}
+                
+                # IMO-Besitzer laden: gleiche IMO unter neuem Namen = Umbenennung
+                chunk_imos = {str(merged[n]['imo_nummer']) for n in chunk
+                              if merged[n]['imo_nummer'] is not None} - set(imo_owner)
+                if chunk_imos:
+                    self.cursor.execute(
+                        f"SELECT imo_nummer, id, name FROM schiffe WHERE imo_nummer IN ({', '.join('?' for _ in chunk_imos)})",
+                        list(chunk_imos)
+                    )
+                    for imo, ship_id, owner_name in self.cursor.fetchall():
+                        imo_owner[str(imo)] = (ship_id, owner_name)
+                
+                renamed = set()
+                for name in chunk:
+                    record = merged[name]
+                    if record['imo_nummer'] is None:
+                        continue
+                    imo = str(record['imo_nummer'])
+                    owner = imo_owner.get(imo)
+                    if owner is None or owner[1] == name:
+                        imo_owner[imo] = (owner[0] if owner else None, name)
+                    elif name not in existing and owner[0] is not None:
+                        # Schiff wurde umbenannt: bestehende Zeile übernimmt den neuen Namen,
+                        # der alte Name bleibt über 'schiffs_namen' auflösbar
+                        self.cursor.execute(
+                            "UPDATE schiffe SET name = ?, aktualisiert_am = CURRENT_TIMESTAMP WHERE id = ?",
+                            (name, owner[0])
+                        )
+                        self.cursor.execute(f"SELECT {', '.join(SHIP_FIELDS)} FROM schiffe WHERE id = ?", (owner[0],))
+                        existing[name] = self.cursor.fetchone()
+                        imo_owner[imo] = (owner[0], name)
+                        renamed.add(name)
+                        log_info(f"✓ Schiff umbenannt: {owner[1]} → {name} (IMO {imo})")
+                    else:
+                        log_warning(f"⚠️  IMO {imo} gehört bereits zu '{owner[1]}', wird für '{name}' ignoriert")
+                        record['imo_nummer'] = None
+                
+                rows = []
+                for name in chunk:
+                    record = merged[name]
+                    values = [record[f] for f in SHIP_FIELDS]
+                    if name not in existing:
+                        counts['inserted'] += 1
+                    elif name in renamed:
+                        counts['updated'] += 1
+                    elif any(v is not None and not _same_value(old, v)
+                             for old, v in zip(existing[name], values)):
+                        counts['updated'] += 1
+                    else:
+                        counts['unchanged'] += 1
+                        continue
+                    rows.append([name] + values)
+                
+                if rows:
+                    self.cursor.executemany(upsert_sql, rows)
+            
+            if positions:
+                self.record_positions(positions, complete=complete_positions)
+        
+        log_info(f"✓ Bulk-Upsert: {counts['inserted']} neu, {counts['updated']} aktualisiert, "
+                 f"{counts['unchanged']} unverändert")
+        return counts
+    
+    def record_positions(self, observations: Iterable[Tuple], complete: bool = False,
+                         gap_hours: Optional[float] = None) -> Dict[str, int]:
+        """
+        Trägt Positionsbeobachtungen als Aufenthalts-Intervalle ein.
+        
+        Liegt das Schiff bereits am selben Liegeort (offenes Intervall), wird
+        das Intervall nur verlängert (zuletzt_gesehen, beobachtungen, ggf.
+        genauere Ankunft/Abfahrt). Bei neuem Liegeort, einer Ankunft nach der
+        bisherigen Abfahrt oder einer Lücke von mehr als gap_hours seit der
+        letzten Sichtung wird das offene Intervall geschlossen und ein neues
+        begonnen.
+        
+        Args:
+            observations: Tupel (name, liegeort, ankunft, abfahrt); Zeiten als
+                          'YYYY-MM-DD HH:MM:SS' oder None
+            complete: Die Beobachtungen sind die vollständige Liegeliste; offene
+                      Intervalle nicht beobachteter Schiffe werden geschlossen
+                      (abfahrt = zuletzt gesehen)
+            gap_hours: Lücke für einen neuen Aufenthalt (Standard: POSITION_GAP_HOURS)
+            
+        Returns:
+            Dictionary mit Zählern 'extended', 'opened', 'closed'
+        """
+        latest: Dict[str, Tuple] = {}
+        for name, liegeort, ankunft, abfahrt in observations:
+            liegeort = str(liegeort or '').strip()
+            if name and liegeort:
+                latest[name] = (liegeort, ankunft, abfahrt)
+        
+        counts = {'extended': 0, 'opened': 0, 'closed': 0}
+        if not latest:
+            return counts
+        
+        gap = f"-{float(POSITION_GAP_HOURS if gap_hours is None else gap_hours)} hours"
+        names = list(latest)
+        with self.transaction():
+            for start in range(0, len(names), UPSERT_CHUNK_SIZE):
+                chunk = names[start:start + UPSERT_CHUNK_SIZE]
+                self.cursor.execute(f"""
+                    SELECT s.name, s.id, p.id, p.liegeort, p.status, p.abfahrt,
+                           p.zuletzt_gesehen < datetime('now', ?)
+                    FROM schiffe s
+                    LEFT JOIN aktuelle_position a ON s.id = a.schiff_id
+                    LEFT JOIN positionen p ON p.id = a.position_id
+                    WHERE s.name IN ({', '.join('?' for _ in chunk)})
+                """, [gap] + chunk)
+                
+                extend, close, opened = [], [], []
+                for name, ship_id, position_id, current, status, current_abfahrt, stale in self.cursor.fetchall():
+                    liegeort, ankunft, abfahrt = latest[name]
+                    is_open = position_id is not None and status == 'aktiv'
+                    new_visit = bool(stale) or bool(ankunft and current_abfahrt and ankunft > current_abfahrt)
+                    if is_open and current == liegeort and not new_visit:
+                        extend.append((ankunft, abfahrt, position_id))
+                    else:
+                        if is_open:
+                            close.append((position_id,))
+                        opened.append((ship_id, liegeort, ankunft, abfahrt))
+                
+                self.cursor.executemany("""
+                    UPDATE positionen
+                    SET zuletzt_gesehen = CURRENT_TIMESTAMP,
+                        beobachtungen = beobachtungen + 1,
+                        ankunft = COALESCE(?, ankunft),
+                        abfahrt = COALESCE(?, abfahrt)
+                    WHERE id = ?
+                """, extend)
+                self.cursor.executemany("""
+                    UPDATE positionen
+                    SET status = 'beendet', abfahrt = COALESCE(abfahrt, zuletzt_gesehen)
+                    WHERE id = ?
+                """, close)
+                self.cursor.executemany("""
+                    INSERT INTO positionen (schiff_id, liegeort, ankunft, abfahrt, status, zuletzt_gesehen)
+                    VALUES (?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?, 'aktiv', CURRENT_TIMESTAMP)
+                """, opened)
+                counts['extended'] += len(extend)
+                counts['opened'] += len(opened)
+            
+            if complete:
+                # Nicht mehr in der Liegeliste: Aufenthalt endet mit der letzten Sichtung
+                self.cursor.execute("CREATE TEMP TABLE IF NOT EXISTS beobachtete_schiffe (name TEXT PRIMARY KEY)")
+                self.cursor.execute("DELETE FROM temp.beobachtete_schiffe")
+                self.cursor.executemany("INSERT INTO temp.beobachtete_schiffe (name) VALUES (?)",
+                                        [(name,) for name in names])
+                self.cursor.execute("""
+                    UPDATE positionen
+                    SET status = 'beendet', abfahrt = COALESCE(abfahrt, zuletzt_gesehen)
+                    WHERE status = 'aktiv'
+                      AND schiff_id NOT IN (SELECT s.id FROM schiffe s
+                                            JOIN temp.beobachtete_schiffe b ON b.name = s.name)
+                """)
+                counts['closed'] = self.cursor.rowcount
+                self.cursor.execute("DELETE FROM temp.beobachtete_schiffe")
+        if counts['closed']:
+            log_info(f"✓ {counts['closed']} Aufenthalte beendet (Schiffe nicht mehr in der Liegeliste)")
+        return counts
+    
+    def coalesce_position_history(self, gap_hours: Optional[float] = None) -> int:
+        """
+        Fasst aufeinanderfolgende Einträge eines Schiffs am selben Liegeort
+        zu einem Intervall zusammen (behält jeweils die neueste Zeile, damit
+        'aktuelle_position' unverändert bleibt) und schließt alle Intervalle
+        außer dem letzten je Schiff.
+        
+        Wie in record_positions() beginnt ein neuer Aufenthalt, wenn ein Eintrag
+        mehr als gap_hours nach dem zuletzt gesehenen Zeitpunkt der Gruppe liegt
+        oder nach deren Abfahrt ankommt – zwei Besuche am selben Liegeort werden
+        so nicht zu einem Aufenthalt über die Zeit dazwischen verschmolzen.
+        
+        Args:
+            gap_hours: Lücke für einen neuen Aufenthalt (Standard: POSITION_GAP_HOURS)
+        
+        Returns:
+            Anzahl entfernter Zeilen
+        """
+        self.connect()
+        updates, deletes = [], []
+        gap = timedelta(hours=float(POSITION_GAP_HOURS if gap_hours is None else gap_hours))
+        
+        def as_datetime(value) -> Optional[datetime]:
+            try:
+                return datetime.fromisoformat(str(value)) if value else None
+            except ValueError:
+                return None
+        
+        def new_visit(row, group) -> bool:
+            abfahrten = [r[4] for r in group if r[4]]
+            if row[3] and abfahrten and row[3] > max(abfahrten):
+                return True
+            seen = as_datetime(row[3] or row[5])
+            last_seen = as_datetime(max((r[5] or r[3] or '') for r in group))
+            return bool(seen and last_seen and seen - last_seen > gap)
+        
+        def flush_group(group, is_last):
+            keep = group[-1]
+            status = keep[7] if is_last else 'beendet'
+            if len(group) == 1 and status == keep[7]:
+                return
+            ankuenfte = [r[3] for r in group if r[3]]
+            abfahrten = [r[4] for r in group if r[4]]
+            gesehen = [r[5] for r in group if r[5]]
+            zuletzt = max(gesehen) if gesehen else None
+            abfahrt = max(abfahrten) if abfahrten else (None if is_last else zuletzt)
+            updates.append((min(ankuenfte) if ankuenfte else None, abfahrt, zuletzt,
+                            sum(r[6] or 1 for r in group), status, keep[0]))
+            deletes.extend((r[0],) for r in group[:-1])
+        
+        rows = self.conn.execute("""
+            SELECT id, schiff_id, liegeort, ankunft, abfahrt, zuletzt_gesehen, beobachtungen, status
+            FROM positionen
+            ORDER BY schiff_id, id
+        """)
+        group = []
+        for row in rows:
+            if group and (row[1] != group[-1][1] or row[2] != group[-1][2] or new_visit(row, group)):
+                flush_group(group, is_last=row[1] != group[-1][1])
+                group = []
+            group.append(row)
+        if group:
+            flush_group(group, is_last=True)
+        
+        with self.transaction():
+            self.cursor.executemany("""
+                UPDATE positionen
+                SET ankunft = ?, abfahrt = ?, zuletzt_gesehen = ?, beobachtungen = ?, status = ?
+                WHERE id = ?
+            """, updates)
+            self.cursor.executemany("DELETE FROM positionen WHERE id = ?", deletes)
+        if deletes:
+            log_info(f"✓ Positions-Historie verdichtet: {len(deletes)} doppelte Einträge zusammengefasst")
+        return len(deletes)
+    
+    def apply_position_retention(self, days: Optional[int] = None) -> int:
+        """
+        Verdichtet abgeschlossene Aufenthalte, die älter als die Aufbewahrungsfrist
+        sind, monatsweise je Schiff und Liegeort in 'positionen_archiv'.
+        
+        Args:
+            days: Aufbewahrungsfrist in Tagen (Standard: POSITION_RETENTION_DAYS)
+            
+        Returns:
+            Anzahl archivierter Aufenthalte
+        """
+        days = POSITION_RETENTION_DAYS if days is None else days
+        cutoff = f"-{int(days)} days"
+        old_intervals = """
+            FROM positionen
+            WHERE status <> 'aktiv'
+              AND COALESCE(abfahrt, zuletzt_gesehen, erstellt_am) < datetime('now', ?)
+        """
+        with self.transaction():
+            self.cursor.execute(f"""
+                INSERT INTO positionen_archiv
+                    (schiff_id, liegeort, monat, aufenthalte, erste_ankunft, letzte_abfahrt)
+                SELECT schiff_id, COALESCE(liegeort, ''), strftime('%Y-%m', COALESCE(ankunft, erstellt_am)),
+                       COUNT(*), MIN(ankunft), MAX(COALESCE(abfahrt, zuletzt_gesehen))
+                {old_intervals}
+                GROUP BY 1, 2, 3
+                ON CONFLICT(schiff_id, liegeort, monat) DO UPDATE SET
+                    aufenthalte = aufenthalte + excluded.aufenthalte,
+                    erste_ankunft = MIN(erste_ankunft, excluded.erste_ankunft),
+                    letzte_abfahrt = MAX(letzte_abfahrt, excluded.letzte_abfahrt)
+            """, (cutoff,))
+            self.cursor.execute(f"DELETE {old_intervals}", (cutoff,))
+            archived = self.cursor.rowcount
+        if archived:
+            log_info(f"✓ {archived} Aufenthalte älter als {days} Tage archiviert")
+        return archived
+    
+    def ships_at(self, liegeort: str, von, bis) -> List[Dict]:
+        """
+        Gibt alle Aufenthalte an einem Liegeort im Zeitraum [von, bis] zurück
+        (Bereichsabfrage über idx_positionen_liegeort_ankunft).
+        
+        Args:
+            liegeort: Liegeort oder Präfix (z.B. 'CTT')
+            von, bis: Zeitpunkte (datetime oder Text wie in der Segelliste)
+            
+        Returns:
+            Liste von Dictionaries (name, liegeort, ankunft, abfahrt, status)
+        """
+        to_text = lambda v: v.strftime('%Y-%m-%d %H:%M:%S') if isinstance(v, datetime) else parse_zeitpunkt(v)
+        von, bis = to_text(von), to_text(bis)
+        pattern = re.sub(r'([*?\[])', r'[\1]', str(liegeort).strip()) + '*'
+        self.connect()
+        self.cursor.execute("""
+            SELECT s.id, s.name, p.liegeort, p.ankunft,
+                   COALESCE(p.abfahrt, p.zuletzt_gesehen) AS abfahrt, p.status
+            FROM positionen p
+            JOIN schiffe s ON s.id = p.schiff_id
+            WHERE p.liegeort GLOB ?
+              AND p.ankunft <= ?
+              AND COALESCE(p.abfahrt, p.zuletzt_gesehen) >= ?
+            ORDER BY p.ankunft
+        """, (pattern, bis, von))
+        columns = [desc[0] for desc in self.cursor.description]
+        return [dict(zip(columns, row)) for row in self.cursor.fetchall()]
+    
+    # ----------------------- Änderungsprotokoll (CDC) -----------------------
+    
+    def current_change_seq(self) -> int:
+        """Höchste vergebene Änderungsnummer (auch nach prune_change_log() fortlaufend)"""
+        self.connect()
+        row = self.conn.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'aenderungen'"
+        ).fetchone()
+        return row[0] if row else 0
+    
+    def changes_since(self, seq: int, tabelle: Optional[str] = None,
+                      upto: Optional[int] = None) -> List[Dict]:
+        """
+        Gibt alle Änderungen mit seq > N zurück (aufsteigend).
+        
+        Args:
+            seq: Letzte bereits verarbeitete Änderungsnummer
+            tabelle: Nur Änderungen dieser Tabelle ('schiffe' / 'positionen')
+            upto: Obergrenze (inklusive), z.B. aus current_change_seq()
+            
+        Returns:
+            Liste von Dictionaries (seq, tabelle, zeilen_id, aktion, spalten, zeitpunkt),
+            'spalten' als Liste der geänderten Spalten (bei Updates)
+        """
+        self.connect()
+        conditions, params = ["seq > ?"], [seq]
+        if tabelle:
+            conditions.append("tabelle = ?")
+            params.append(tabelle)
+        if upto is not None:
+            conditions.append("seq <= ?")
+            params.append(upto)
+        rows = self.conn.execute(f"""
+            SELECT seq, tabelle, zeilen_id, aktion, spalten, zeitpunkt
+            FROM aenderungen
+            WHERE {' AND '.join(conditions)}
+            ORDER BY seq
+        """, params).fetchall()
+        return [{'seq': r[0], 'tabelle': r[1], 'zeilen_id': r[2], 'aktion': r[3],
+                 'spalten': r[4].split(',') if r[4] else [], 'zeitpunkt': r[5]} for r in rows]
+    
+    def changed_ids_since(self, seq: int, tabelle: str = 'schiffe',
+                          upto: Optional[int] = None) -> Tuple[set, set]:
+        """
+        Fasst das Änderungsprotokoll seit seq zu Zeilen-ids zusammen.
+        
+        Returns:
+            (geänderte/neue ids, gelöschte ids)
+        """
+        changed, deleted = set(), set()
+        for change in self.changes_since(seq, tabelle, upto):
+            if change['aktion'] == 'D':
+                deleted.add(change['zeilen_id'])
+                changed.discard(change['zeilen_id'])
+            else:
+                changed.add(change['zeilen_id'])
+                deleted.discard(change['zeilen_id'])
+        return changed, deleted
+    
+    def get_checkpoint(self, verbraucher: str) -> Optional[int]:
+        """Letzte verarbeitete Änderungsnummer eines Verbrauchers (None = noch nie gelaufen)"""
+        self.connect()
+        row = self.conn.execute(
+            "SELECT seq FROM cdc_checkpoints WHERE verbraucher = ?", (verbraucher,)
+        ).fetchone()
+        return row[0] if row else None
+    
+    def set_checkpoint(self, verbraucher: str, seq: int):
+        """Speichert die letzte verarbeitete Änderungsnummer eines Verbrauchers"""
+        with self.transaction():
+            self.cursor.execute("""
+                INSERT INTO cdc_checkpoints (verbraucher, seq) VALUES (?, ?)
+                ON CONFLICT(verbraucher) DO UPDATE SET
+                    seq = excluded.seq, aktualisiert_am = CURRENT_TIMESTAMP
+            """, (verbraucher, seq))
+    
+    def prune_change_log(self, days: int = CHANGE_LOG_RETENTION_DAYS) -> int:
+        """
+        Löscht Protokolleinträge, die älter als N Tage sind. Verbraucher, deren
+        Checkpoint dadurch ins Leere zeigt, machen beim nächsten Lauf einen
+        Vollabgleich (siehe sync_hhla_sheet).
+        """
+        with self.transaction():
+            self.cursor.execute(
+                "DELETE FROM aenderungen WHERE zeitpunkt < datetime('now', ?)", (f"-{int(days)} days",)
+            )
+            return self.cursor.rowcount
+    
+    def change_log_covers(self, seq: int) -> bool:
+        """Prüft, ob das Protokoll seit seq lückenlos vorliegt (nicht weggeräumt wurde)"""
+        if seq >= self.current_change_seq():
+            return True
+        oldest = self.conn.execute("SELECT MIN(seq) FROM aenderungen").fetchone()[0]
+        return oldest is not None and oldest <= seq + 1
+    
+    def load_hhla_projection(self, names: Optional[Iterable[str]] = None,
+                             ship_ids: Optional[Iterable[int]] = None) -> Dict[str, Tuple]:
+        """
+        Lädt die Spalten für 'Schiffsdaten HHLA' je Schiffsname (auch frühere Namen).
+        
+        Args:
+            names: Namen aus dem Sheet (Vollabgleich)
+            ship_ids: Nur diese Schiffe (Delta aus dem Änderungsprotokoll)
+            
+        Returns:
+            {name: (typ, mmsi, imo, baujahr, laenge, breite, vesselfinder_link)}
+        """
+        column, keys = ('n.schiff_id', list(ship_ids)) if ship_ids is not None else ('n.name', list(names or []))
+        self.connect()
+        result = {}
+        for start in range(0, len(keys), UPSERT_CHUNK_SIZE):
+            chunk = keys[start:start + UPSERT_CHUNK_SIZE]
+            rows = self.conn.execute(f"""
+                SELECT n.name, s.typ, s.mmsi_nummer, s.imo_nummer, s.baujahr, s.laenge, s.breite,
+                       s.vesselfinder_link
+                FROM schiffs_namen n
+                JOIN schiffe s ON s.id = n.schiff_id
+                WHERE {column} IN ({', '.join('?' for _ in chunk)})
+            """, chunk).fetchall()
+            result.update({row[0]: row[1:] for row in rows})
+        return result
+    
+    def current_names(self, names: Iterable[str]) -> Dict[str, str]:
+        """Aktueller Schiffsname je (auch früherem) Namen, unbekannte Namen fehlen"""
+        keys = list(names)
+        self.connect()
+        result = {}
+        for start in range(0, len(keys), UPSERT_CHUNK_SIZE):
+            chunk = keys[start:start + UPSERT_CHUNK_SIZE]
+            rows = self.conn.execute(f"""
+                SELECT n.name, s.name
+                FROM schiffs_namen n
+                JOIN schiffe s ON s.id = n.schiff_id
+                WHERE n.name IN ({', '.join('?' for _ in chunk)})
+            """, chunk).fetchall()
+            result.update(dict(rows))
+        return result
+    
+    def load_sheet_sync_state(self, blatt: str) -> Dict[str, Tuple[str, str, List[str]]]:
+        """
+        Lädt die Fingerprints des letzten Abgleichs eines Blatts.
+        
+        Returns:
+            {name: (sheet_hash, db_hash, Basiswerte)}
+        """
+        self.connect()
+        rows = self.conn.execute(
+            "SELECT name, sheet_hash, db_hash, basis FROM sheet_abgleich WHERE blatt = ?", (blatt,)
+        ).fetchall()
+        return {name: (sheet_hash, db_hash, json.loads(basis)) for name, sheet_hash, db_hash, basis in rows}
+    
+    def save_sheet_sync_state(self, blatt: str, entries: Dict[str, Tuple[str, str, List[str]]],
+                              keep: Optional[Iterable[str]] = None):
+        """
+        Speichert Fingerprints nach einem Abgleich.
+        
+        Args:
+            blatt: Blattname
+            entries: {name: (sheet_hash, db_hash, Basiswerte)}
+            keep: Alle Namen, die noch im Blatt stehen; andere Einträge werden gelöscht
+        """
+        with self.transaction():
+            self.cursor.executemany("""
+                INSERT INTO sheet_abgleich (blatt, name, sheet_hash, db_hash, basis) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(blatt, name) DO UPDATE SET
+                    sheet_hash = excluded.sheet_hash, db_hash = excluded.db_hash,
+                    basis = excluded.basis, abgeglichen_am = CURRENT_TIMESTAMP
+            """, [(blatt, name, sheet_hash, db_hash, json.dumps(basis, ensure_ascii=False))
+                  for name, (sheet_hash, db_hash, basis) in entries.items()])
+            if keep is not None:
+                keep = set(keep)
+                self.cursor.execute("SELECT name FROM sheet_abgleich WHERE blatt = ?", (blatt,))
+                stale = [name for (name,) in self.cursor.fetchall() if name not in keep]
+                self.cursor.executemany(
+                    "DELETE FROM sheet_abgleich WHERE blatt = ? AND name = ?", [(blatt, n) for n in stale]
+                )
+    
+    def iter_ships(self, batch_size: int = ITER_BATCH_SIZE, after_name: Optional[str] = None,
+                   filters: Optional[Dict] = None) -> Iterator[ShipRow]:
+        """
+        Liefert alle Schiffe sortiert nach Name als Generator.
+        
+        Keyset-Paginierung (WHERE name > letzter Name, nutzt den UNIQUE-Index
+        auf name): Pro Abfrage werden nur batch_size Zeilen geladen, der
+        Speicherbedarf bleibt unabhängig von der Anzahl Schiffe konstant.
+        
+        Args:
+            batch_size: Zeilen pro Abfrage
+            after_name: Erst nach diesem Namen beginnen (Fortsetzung)
+            filters: Gleichheitsfilter {spalte: wert} auf SHIP_ROW_COLUMNS
+                     (wert None = IS NULL), z.B. {'liegeort': 'CTT'}
+            
+        Yields:
+            ShipRow je Schiff
+        """
+        where, params = [], []
+        for column, value in (filters or {}).items():
+            if column not in SHIP_ROW_COLUMNS:
+                raise ValueError(f"Unbekannter Filter: {column}")
+            prefix = 'p' if column in ('liegeort', 'status') else 's'
+            if value is None:
+                where.append(f"{prefix}.{column} IS NULL")
+            else:
+                where.append(f"{prefix}.{column} = ?")
+                params.append(value)
+        
+        select_columns = ', '.join(
+            f"{'p' if c in ('liegeort', 'status') else 's'}.{c}" for c in SHIP_ROW_COLUMNS
+        )
+        self.connect()
+        last_name = after_name
+        while True:
+            conditions = where + (["s.name > ?"] if last_name is not None else [])
+            query_params = params + ([last_name] if last_name is not None else [])
+            # Eigener Cursor je Seite: Aufrufer darf währenddessen self.cursor benutzen
+            rows = self.conn.execute(f"""
+                SELECT {select_columns}
+                FROM schiffe s
+                LEFT JOIN aktuelle_position p ON s.id = p.schiff_id
+                {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+                ORDER BY s.name
+                LIMIT ?
+            """, query_params + [batch_size]).fetchall()
+            for row in rows:
+                yield ShipRow(row)
+            if len(rows) < batch_size:
+                return
+            last_name = rows[-1][1]
+    
+    def get_ships_page(self, limit: int = 100, after_name: Optional[str] = None,
+                       filters: Optional[Dict] = None) -> Dict:
+        """
+        Eine Seite Schiffe für HTTP-Endpunkte (Keyset-Paginierung).
+        
+        Returns:
+            {'ships': [...], 'next_after': Name für die nächste Seite oder None}
+        """
+        ships = [row.as_dict() for row in
+                 itertools.islice(self.iter_ships(limit + 1, after_name, filters), limit + 1)]
+        has_more = len(ships) > limit
+        ships = ships[:limit]
+        return {
+            'ships': ships,
+            'next_after': ships[-1]['name'] if has_more and ships else None,
+        }
+    
     def get_all_ships(self) -> List[Dict]:
         """
         Gibt alle Schiffe aus der Datenbank zurück
         
+        Für große Bestände iter_ships() verwenden (streamt statt Liste).
+        
         Returns:
             Liste von Dictionaries mit Schiffsdaten
         """
+        return [row.as_dict() for row in self.iter_ships()]
+    
+    def _get_one(self, where: str, params: tuple) -> Optional[Dict]:
+        """Holt ein einzelnes Schiff (inkl. aktueller Position und vessel_key)"""
         self.connect()
-        self.cursor.execute("""
+        self.cursor.execute(f"""
             SELECT s.*, p.liegeort, p.status
             FROM schiffe s
-            LEFT JOIN (
-                SELECT schiff_id, liegeort, status
-                FROM positionen
-                WHERE id IN (
-                    SELECT MAX(id) FROM positionen GROUP BY schiff_id
-                )
-            ) p ON s.id = p.schiff_id
-            ORDER BY s.name
-        """)
-        
+            LEFT JOIN aktuelle_position p ON s.id = p.schiff_id
+            WHERE {where}
+            ORDER BY s.aktualisiert_am DESC
+            LIMIT 1
+        """, params)
+        row = self.cursor.fetchone()
+        if not row:
+            return None
         columns = [desc[0] for desc in self.cursor.description]
-        ships = []
-        for row in self.cursor.fetchall():
-            ships.append(dict(zip(columns, row)))
+        ship = dict(zip(columns, row))
+        ship['vessel_key'] = vessel_key(ship)
+        return ship
+    
+    def get_by_mmsi(self, mmsi) -> Optional[Dict]:
+        """
+        Sucht ein Schiff über die MMSI-Nummer (Index idx_schiffe_mmsi)
         
-        self.disconnect()
-        return ships
+        Returns:
+            Dictionary mit Schiffsdaten oder None
+        """
+        mmsi = str(mmsi or '').strip()
+        if not mmsi:
+            return None
+        return self._get_one("s.mmsi_nummer = ?", (mmsi,))
+    
+    def get_by_imo(self, imo) -> Optional[Dict]:
+        """
+        Sucht ein Schiff über die IMO-Nummer (eindeutiger Index idx_schiffe_imo)
+        
+        Returns:
+            Dictionary mit Schiffsdaten oder None
+        """
+        imo = str(imo or '').strip()
+        if not imo:
+            return None
+        return self._get_one("s.imo_nummer = ?", (imo,))
+    
+    def get_by_name(self, name: str) -> Optional[Dict]:
+        """
+        Sucht ein Schiff über den exakten Namen, auch über frühere Namen
+        (Tabelle 'schiffs_namen'). Groß-/Kleinschreibung wird ignoriert,
+        sofern die Namen wie üblich in Großbuchstaben gespeichert sind.
+        
+        Returns:
+            Dictionary mit Schiffsdaten oder None
+        """
+        name = str(name or '').strip()
+        if not name:
+            return None
+        for candidate in dict.fromkeys([name, name.upper()]):
+            ship = self._get_one("s.name = ?", (candidate,))
+            if ship:
+                return ship
+            ship = self._get_one(
+                "s.id = (SELECT schiff_id FROM schiffs_namen WHERE name = ?)", (candidate,)
+            )
+            if ship:
+                return ship
+        return None
     
     def search_ship(self, search_term: str) -> List[Dict]:
         """
@@ -431,29 +2080,177 @@ class SchiffsDatenbank:
         self.cursor.execute("""
             SELECT s.*, p.liegeort, p.status
             FROM schiffe s
-            LEFT JOIN (
-                SELECT schiff_id, liegeort, status
-                FROM positionen
-                WHERE id IN (
-                    SELECT MAX(id) FROM positionen GROUP BY schiff_id
-                )
-            ) p ON s.id = p.schiff_id
+            LEFT JOIN aktuelle_position p ON s.id = p.schiff_id
             WHERE s.name LIKE ?
             ORDER BY s.name
         """, (f"%{search_term}%",))
         
-        columns = [desc[0] for desc in self.cursor.description]
-        ships = []
-        for row in self.cursor.fetchall():
-            ships.append(dict(zip(columns, row)))
+        columns = [desc[0] for desc in self.cursor.description]
+        ships = []
+        for row in self.cursor.fetchall():
+            ships.append(dict(zip(columns, row)))
+        
+        self.disconnect()
+        return ships
+    
+    def search_ships_ranked(self, search_term: str, limit: int = 10) -> List[Dict]:
+        """
+        Gerankte, fehlertolerante Namenssuche über den FTS5-Trigramm-Index.
+        
+        Reihenfolge: exakter Name, Namensanfang, Teilstring (bm25), danach
+        ähnliche Namen (Tippfehler) nach Trigramm-Ähnlichkeit. Exakte und
+        Präfix-Treffer kommen aus dem Index idx_schiffe_name_norm; reichen sie
+        für limit, entfällt die Trigramm-Suche. Ohne FTS-Index (oder bei
+        Begriffen unter 3 Zeichen) wird auf search_ship() zurückgegriffen.
+        
+        Args:
+            search_term: Suchbegriff, auch unvollständig (z.B. "BALTIC TRANSP")
+            limit: Maximale Anzahl Treffer
+            
+        Returns:
+            Liste von Dictionaries wie bei search_ship(), zusätzlich 'score' (0-1)
+        """
+        term = normalize_ship_name(search_term)
+        if len(term) < 3 or not self._has_name_index():
+            return [dict(ship, score=None) for ship in self.search_ship(search_term)[:limit]]
+        
+        self.connect()
+        
+        # 0. Exakter Name und Namensanfang: Bereichsabfrage über idx_schiffe_name_norm
+        name_norm = _sql_normalize_name('s.name')
+        self.cursor.execute(f"""
+            SELECT s.*, p.liegeort, p.status, {name_norm} AS name_norm
+            FROM schiffe s
+            LEFT JOIN aktuelle_position p ON s.id = p.schiff_id
+            WHERE {name_norm} >= ? AND {name_norm} < ?
+            LIMIT ?
+        """, (term, term + '\U0010ffff', max(limit, 50)))
+        columns = [desc[0] for desc in self.cursor.description]
+        hits = []
+        for row in self.cursor.fetchall():
+            ship = dict(zip(columns, row))
+            ship['score'] = 1.0 if ship.pop('name_norm') == term else 0.9
+            hits.append(ship)
+        # Bei gleichem Score: kürzere Namen zuerst (näher am Suchbegriff)
+        hits.sort(key=lambda ship: (-ship['score'], len(ship['name'])))
+        if len(hits) >= limit:
+            self.disconnect()
+            return hits[:limit]
+        
+        base_query = """
+            SELECT s.*, p.liegeort, p.status, f.name AS name_norm, bm25(schiffe_fts) AS rank
+            FROM schiffe_fts f
+            JOIN schiffe s ON s.id = f.rowid
+            LEFT JOIN aktuelle_position p ON s.id = p.schiff_id
+            WHERE schiffe_fts MATCH ?
+            ORDER BY rank
+            LIMIT ?
+        """
+        
+        # 1. Teilstring-Treffer (Phrase über alle Trigramme des Begriffs)
+        self.cursor.execute(base_query, (_fts_phrase(term), max(limit, 50)))
+        columns = [desc[0] for desc in self.cursor.description]
+        prefix_ids = {ship['id'] for ship in hits}
+        for row in self.cursor.fetchall():
+            ship = dict(zip(columns, row))
+            name_norm = ship.pop('name_norm')
+            ship.pop('rank')
+            if ship['id'] in prefix_ids:
+                continue
+            if name_norm == term:
+                ship['score'] = 1.0
+            elif name_norm.startswith(term):
+                ship['score'] = 0.9
+            else:
+                ship['score'] = 0.8
+            hits.append(ship)
+        hits.sort(key=lambda ship: (-ship['score'], len(ship['name'])))
+        hits = hits[:limit]
+        
+        # 2. Tippfehler: Kandidaten mit gemeinsamen Trigrammen, nach Ähnlichkeit sortiert
+        if len(hits) < limit:
+            term_trigrams = _trigrams(term)
+            found_ids = {ship['id'] for ship in hits}
+            fuzzy_query = " OR ".join(_fts_phrase(t) for t in sorted(term_trigrams))
+            self.cursor.execute(base_query, (fuzzy_query, 50))
+            columns = [desc[0] for desc in self.cursor.description]
+            candidates = []
+            for row in self.cursor.fetchall():
+                ship = dict(zip(columns, row))
+                if ship['id'] in found_ids:
+                    continue
+                name_trigrams = _trigrams(ship.pop('name_norm'))
+                ship.pop('rank')
+                similarity = len(term_trigrams & name_trigrams) / len(term_trigrams | name_trigrams)
+                if similarity >= FUZZY_MIN_SIMILARITY:
+                    ship['score'] = round(similarity * 0.8, 3)
+                    candidates.append(ship)
+            candidates.sort(key=lambda ship: -ship['score'])
+            hits.extend(candidates[:limit - len(hits)])
+        
+        self.disconnect()
+        return hits
+    
+    def find_best_match(self, search_term: str) -> Optional[Dict]:
+        """
+        Liefert das am besten passende Schiff zu einem (ggf. unvollständigen) Namen
+        
+        Args:
+            search_term: Suchbegriff, z.B. "BALTIC TRANSP"
+            
+        Returns:
+            Dictionary mit Schiffsdaten (inkl. mmsi_nummer) oder None
+        """
+        hits = self.search_ships_ranked(search_term, limit=1)
+        return hits[0] if hits else None
+    
+    def refresh_statistics(self, full: bool = True) -> bool:
+        """
+        Gleicht die Statistik-Tabellen mit den Basistabellen ab.
+        
+        Im Normalbetrieb halten Trigger die Zähler aktuell; dies ist nur zur
+        Reparatur/Kontrolle gedacht.
         
-        self.disconnect()
-        return ships
+        Args:
+            full: True = alle Zähler neu berechnen, False = nur prüfen (Anzahl
+                  Schiffe) und bei Abweichung neu berechnen
+            
+        Returns:
+            True, wenn neu berechnet wurde
+        """
+        self.connect()
+        if not full:
+            self.cursor.execute("SELECT anzahl FROM statistik WHERE schluessel = 'schiffe'")
+            row = self.cursor.fetchone()
+            self.cursor.execute("SELECT COUNT(*) FROM schiffe")
+            if row and row[0] == self.cursor.fetchone()[0]:
+                return False
+            log_warning("⚠️  Statistik weicht von den Daten ab, wird neu berechnet")
+        
+        with self.transaction():
+            self.cursor.execute("DELETE FROM statistik")
+            self.cursor.execute("""
+                INSERT INTO statistik (schluessel, anzahl, summe)
+                SELECT 'schiffe', COUNT(*), 0 FROM schiffe
+                UNION ALL
+                SELECT 'laenge', COUNT(laenge), COALESCE(SUM(laenge), 0) FROM schiffe
+            """)
+            self.cursor.execute("DELETE FROM statistik_liegeort")
+            self.cursor.execute("""
+                INSERT INTO statistik_liegeort (liegeort, anzahl)
+                SELECT liegeort, COUNT(*) FROM aktuelle_position
+                WHERE liegeort IS NOT NULL
+                GROUP BY liegeort
+            """)
+        return True
     
     def get_statistics(self) -> Dict:
         """
         Gibt Statistiken über die Datenbank zurück
         
+        Liest nur die Trigger-gepflegten Zähler (statistik, statistik_liegeort),
+        der Aufwand ist unabhängig von der Datenbankgröße.
+        
         Returns:
             Dictionary mit Statistiken
         """
@@ -461,29 +2258,25 @@ class SchiffsDatenbank:
         
         stats = {}
         
+        self.cursor.execute("SELECT schluessel, anzahl, summe FROM statistik")
+        counters = {key: (count, total) for key, count, total in self.cursor.fetchall()}
+        
         # Gesamtzahl Schiffe
-        self.cursor.execute("SELECT COUNT(*) FROM schiffe")
-        stats['total_ships'] = self.cursor.fetchone()[0]
+        stats['total_ships'] = counters.get('schiffe', (0, 0))[0]
         
         # Schiffe nach Liegeort
         self.cursor.execute("""
-            SELECT p.liegeort, COUNT(DISTINCT p.schiff_id) as anzahl
-            FROM positionen p
-            WHERE p.id IN (
-                SELECT MAX(id) FROM positionen GROUP BY schiff_id
-            )
-            AND p.liegeort IS NOT NULL
-            GROUP BY p.liegeort
+            SELECT liegeort, anzahl
+            FROM statistik_liegeort
             ORDER BY anzahl DESC
         """)
         stats['ships_by_location'] = dict(self.cursor.fetchall())
         
         # Durchschnittliche Schiffslänge
-        self.cursor.execute("SELECT AVG(laenge) FROM schiffe WHERE laenge IS NOT NULL")
-        avg_length = self.cursor.fetchone()[0]
-        stats['avg_length'] = round(avg_length, 2) if avg_length else None
+        count, total = counters.get('laenge', (0, 0))
+        stats['avg_length'] = round(total / count, 2) if count else None
         
-        # Letzter Import
+        # Letzter Import (idx_import_historie_zeitpunkt)
         self.cursor.execute("""
             SELECT zeitpunkt, quelle, anzahl_datensaetze 
             FROM import_historie 
@@ -516,7 +2309,9 @@ class GoogleSheetsConnector:
         if not SHEETS_AVAILABLE:
             raise ImportError("Google Sheets-Bibliotheken nicht verfügbar")
         
-        if not os.path.exists(service_account_file):
+        # Gegen den lokalen Ersatzserver (SHEETS_API_ENDPOINT) wird keine Datei benötigt
+        needs_file = sheets_client is None or sheets_client.credentials_required()
+        if needs_file and not os.path.exists(service_account_file):
             raise FileNotFoundError(f"Service Account Datei nicht gefunden: {service_account_file}")
         
         self.service_account_file = service_account_file
@@ -525,19 +2320,67 @@ class GoogleSheetsConnector:
         self.sh = None
         
     def connect(self):
-        """Stellt die Verbindung zu Google Sheets her"""
+        """
+        Stellt die Verbindung zu Google Sheets her.
+        
+        Client und Spreadsheet-Handle kommen aus dem prozessweiten Cache
+        (sheets_client): OAuth und open_by_url laufen nur einmal pro Prozess,
+        weitere Aufrufe – auch aus anderen Connector-Instanzen – sind kostenlos.
+        """
+        if self.sh is not None:
+            return
         try:
-            scopes = ["https://www.googleapis.com/auth/spreadsheets"]
-            credentials = Credentials.from_service_account_file(
-                self.service_account_file, scopes=scopes
-            )
-            self.gc = gspread.authorize(credentials)
-            self.sh = self.gc.open_by_url(self.spreadsheet_url)
+            if sheets_client is not None:
+                self.gc = sheets_client.get_client(self.service_account_file)
+                self.sh = sheets_client.get_spreadsheet(self.service_account_file, self.spreadsheet_url)
+            else:
+                scopes = ["https://www.googleapis.com/auth/spreadsheets"]
+                credentials = Credentials.from_service_account_file(
+                    self.service_account_file, scopes=scopes
+                )
+                self.gc = gspread.authorize(credentials)
+                self.sh = self.gc.open_by_url(self.spreadsheet_url)
             log_info(f"✓ Verbindung zu Google Sheets hergestellt")
         except Exception as e:
             log_error(f"✗ Fehler beim Verbinden mit Google Sheets: {e}")
             raise
     
+    def worksheet(self, title: str, create: bool = False, rows: int = 1000, cols: int = 20):
+        """
+        Gibt ein Worksheet-Handle zurück (gecacht, ohne erneuten Metadaten-Abruf).
+        
+        Args:
+            title: Blattname
+            create: Blatt anlegen, falls es fehlt (sonst gspread.WorksheetNotFound)
+            rows, cols: Größe eines neu angelegten Blatts
+        """
+        self.connect()
+        if sheets_client is not None:
+            return sheets_client.get_worksheet(self.service_account_file, self.spreadsheet_url,
+                                               title, create=create, rows=rows, cols=cols)
+        try:
+            return self.sh.worksheet(title)
+        except gspread.WorksheetNotFound:
+            if not create:
+                raise
+            return self.sh.add_worksheet(title=title, rows=str(rows), cols=str(cols))
+    
+    def read_columns(self, spec: List[Tuple], start_row: int = 1) -> Dict[str, Dict[str, List]]:
+        """
+        Liest nur die angegebenen Spalten mehrerer Blätter in einem API-Aufruf
+        (values.batchGet, siehe sheets_client.read_columns).
+        
+        Args:
+            spec: Liste von (Blatt, Spalten[, Startzeile]), z.B.
+                  [("Schiffsdaten HHLA", "A C K", 2), ("Segelliste", {"E": str, "N": str}, 2)]
+            start_row: Standard-Startzeile (1-basiert)
+            
+        Returns:
+            {Blatt: {Spalte: [Werte]}}
+        """
+        self.connect()
+        return sheets_client.read_columns(self.sh, spec, start_row)
+    
     def get_segelliste_data(self) -> pd.DataFrame:
         """
         Liest Daten aus dem Blatt 'Segelliste'
@@ -545,9 +2388,8 @@ class GoogleSheetsConnector:
         Returns:
             DataFrame mit den Daten
         """
-        self.connect()
         try:
-            worksheet = self.sh.worksheet("Segelliste")
+            worksheet = self.worksheet("Segelliste")
             data = worksheet.get_all_values()
             
             if len(data) < 2:
@@ -573,9 +2415,8 @@ class GoogleSheetsConnector:
         Returns:
             DataFrame mit den Daten
         """
-        self.connect()
         try:
-            worksheet = self.sh.worksheet("Schiffslänge")
+            worksheet = self.worksheet("Schiffslänge")
             data = worksheet.get_all_values()
             
             if len(data) < 2:
@@ -593,30 +2434,59 @@ class GoogleSheetsConnector:
             print("✗ Blatt 'Schiffslänge' nicht gefunden")
             return pd.DataFrame()
     
-    def export_to_sheet(self, df: pd.DataFrame, worksheet_name: str):
+    def export_rows(self, header: List[str], rows: Iterable[List], worksheet_name: str,
+                    chunk_rows: int = SHEETS_EXPORT_CHUNK_ROWS) -> int:
         """
-        Exportiert einen DataFrame zu einem Google Sheet
+        Exportiert Zeilen aus einem Iterator (z.B. iter_ships()) blockweise
+        zu einem Google Sheet, ohne alle Zeilen im Speicher zu halten.
+        
+        Der aktuelle Blattinhalt wird einmal gelesen; jeder Block wird mit dem
+        passenden Ausschnitt verglichen (sheets_client.diff_grids) und nur
+        geänderte Zellen werden geschrieben. Überzählige alte Zeilen werden
+        am Ende geleert. Spalten rechts vom Header bleiben unberührt.
         
         Args:
-            df: DataFrame mit Daten
+            header: Kopfzeile
+            rows: Iterable von Zeilen (Listen)
             worksheet_name: Name des Ziel-Worksheets
+            chunk_rows: Zeilen pro Vergleichsblock
+            
+        Returns:
+            Anzahl exportierter Zeilen (ohne Header)
         """
-        self.connect()
         try:
-            worksheet = self.sh.worksheet(worksheet_name)
+            worksheet = self.worksheet(worksheet_name)
         except gspread.WorksheetNotFound:
-            worksheet = self.sh.add_worksheet(title=worksheet_name, rows="1000", cols="20")
+            worksheet = self.worksheet(worksheet_name, create=True)
             print(f"✓ Neues Blatt '{worksheet_name}' erstellt")
         
-        # Lösche vorhandene Daten
-        worksheet.clear()
-        
-        # Schreibe Header und Daten
-        data = [df.columns.tolist()] + df.values.tolist()
-        worksheet.update(values=data, range_name="A1")
-        
-        print(f"✓ {len(df)} Zeilen nach '{worksheet_name}' exportiert")
-
+        width = len(header)
+        current = worksheet.get_all_values()
+        totals = None
+        written = 0  # Zeilen inkl. Header
+        
+        for chunk in itertools.chain([[header]], iter(lambda: list(itertools.islice(rows, chunk_rows)), [])):
+            diff = sheets_client.diff_grids(current[written:written + len(chunk)], chunk,
+                                            start_row=written + 1, width=width, sheet=worksheet.title)
+            if diff['data']:
+                sheets_client.values_batch_update(worksheet, diff['data'])
+            written += len(chunk)
+            if totals is None:
+                totals = dict(diff['stats'])
+            else:
+                for key, value in diff['stats'].items():
+                    totals[key] += value
+        
+        # Alte Zeilen unterhalb des Exports leeren
+        surplus = sheets_client.diff_grids(current[written:], [], start_row=written + 1, width=width)
+        if surplus['clear']:
+            sheets_client.batch_clear(worksheet, surplus['clear'])
+            totals['rows_cleared'] += surplus['stats']['rows_cleared']
+        
+        count = written - 1
+        print(f"✓ {count} Zeilen nach '{worksheet_name}' exportiert ({sheets_client.format_diff_stats(totals)})")
+        return count
+    
 # ========================= SHIPXPLORER SCRAPER =========================
 class VesselFinderScraper:
     """Klasse zum Abrufen von Schiffsdaten von shipfinder.com (verwendet alten Namen für Kompatibilität)"""
@@ -636,6 +2506,9 @@ class VesselFinderScraper:
         self.driver = None
         self.take_screenshots = take_screenshots
         self.screenshot_counter = 0
+        # Tatsächliche Wartezeit je Schritt: letzte Suche und Summe (Anzahl, Sekunden, Timeouts)
+        self.step_timings = {}
+        self.wait_stats = {}
         
         # Screenshot-Verzeichnis erstellen (immer, auch für Fehler-Screenshots)
         os.makedirs(SCREENSHOT_DIR, exist_ok=True)
@@ -668,6 +2541,8 @@ class VesselFinderScraper:
                 # Sprache
                 options.add_argument("--lang=de-DE")
                 options.add_argument("--accept-language=de-DE,de;q=0.9,en-US;q=0.8,en;q=0.7")
+                # Netzwerk-Ereignisse (CDP) für die Wartebedingung "Netzwerk ruhig"
+                options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
                 
                 log_info("  Starte Undetected Chrome-Browser...")
                 self.driver = uc.Chrome(options=options, version_main=None)
@@ -705,6 +2580,7 @@ class VesselFinderScraper:
             
             # Sprache
             options.add_argument("--lang=de-DE")
+            options.set_capability("ms:loggingPrefs", {"performance": "ALL"})
             
             log_info("  Installiere/aktualisiere EdgeDriver...")
             service = EdgeService(EdgeChromiumDriverManager().install())
@@ -744,6 +2620,7 @@ class VesselFinderScraper:
             options.add_experimental_option('useAutomationExtension', False)
             
             options.add_argument("--lang=de-DE")
+            options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
             
             log_info("  Installiere/aktualisiere ChromeDriver...")
             service = ChromeService(ChromeDriverManager().install())
@@ -769,6 +2646,11 @@ class VesselFinderScraper:
         if self.driver:
             self.driver.quit()
             self.driver = None
+        if self.wait_stats:
+            parts = ', '.join(f"{step} Ø {seconds / count:.1f}s" + (f" ({timeouts}× Frist)" if timeouts else "")
+                              for step, (count, seconds, timeouts) in self.wait_stats.items())
+            log_info(f"⏱  Wartezeiten je Schritt: {parts}")
+            self.wait_stats = {}
     
     def save_screenshot(self, vessel_name: str, step: str, mark_position: tuple = None):
         """
@@ -843,6 +2725,81 @@ class VesselFinderScraper:
         except Exception as e:
             log_warning(f"        Fehler beim Hinzufügen der Markierung: {e}")
     
+    def _wait_for(self, step: str, condition, timeout: float = None):
+        """
+        Wartet, bis condition(driver) etwas Wahres liefert, höchstens bis zur
+        Frist des Schritts (SCRAPER_STEP_TIMEOUTS). Die tatsächliche Wartezeit
+        wird in step_timings/wait_stats festgehalten.
+        
+        Returns:
+            Ergebnis der Bedingung oder None bei Timeout
+        """
+        if timeout is None:
+            timeout = SCRAPER_STEP_TIMEOUTS[step]
+        start = time.time()
+        result = None
+        try:
+            result = WebDriverWait(self.driver, timeout, poll_frequency=SCRAPER_WAIT_POLL).until(condition)
+        except TimeoutException:
+            log_info(f"      ⚠️  Wartefrist '{step}' ({timeout:.0f}s) abgelaufen")
+        finally:
+            elapsed = time.time() - start
+            self.step_timings[step] = self.step_timings.get(step, 0.0) + elapsed
+            count, seconds, timeouts = self.wait_stats.get(step, (0, 0.0, 0))
+            self.wait_stats[step] = (count + 1, seconds + elapsed, timeouts + (result is None))
+        return result
+    
+    def _network_idle(self, idle: float = SCRAPER_NETWORK_IDLE,
+                      max_inflight: int = SCRAPER_NETWORK_MAX_INFLIGHT):
+        """
+        Wartebedingung "Netzwerk ruhig": Dokument geladen und seit idle Sekunden
+        höchstens max_inflight offene Requests. Die Requests kommen aus dem
+        CDP-Performance-Log; ohne Log zählt die Resource-Timing-Liste der Seite.
+        """
+        state = {'inflight': set(), 'resources': -1, 'quiet_since': None, 'cdp': True}
+        try:
+            # Ereignisse der vorherigen Seite verwerfen
+            self.driver.get_log('performance')
+        except Exception:
+            state['cdp'] = False
+        
+        def condition(driver):
+            busy = False
+            if state['cdp']:
+                try:
+                    for entry in driver.get_log('performance'):
+                        message = json.loads(entry['message'])['message']
+                        method = message.get('method')
+                        request_id = message.get('params', {}).get('requestId')
+                        if method == 'Network.requestWillBeSent':
+                            state['inflight'].add(request_id)
+                            busy = True
+                        elif method in ('Network.loadingFinished', 'Network.loadingFailed'):
+                            state['inflight'].discard(request_id)
+                    busy = busy or len(state['inflight']) > max_inflight
+                except Exception:
+                    state['cdp'] = False
+            if not state['cdp']:
+                resources = driver.execute_script("return performance.getEntriesByType('resource').length")
+                busy = resources != state['resources']
+                state['resources'] = resources
+            if driver.execute_script("return document.readyState") != 'complete':
+                busy = True
+            
+            now = time.time()
+            if busy or state['quiet_since'] is None:
+                state['quiet_since'] = now
+                return False
+            return now - state['quiet_since'] >= idle
+        
+        return condition
+    
+    def _log_step_timings(self):
+        """Gibt die Wartezeiten der letzten Suche aus"""
+        if self.step_timings:
+            parts = ', '.join(f"{step} {seconds:.1f}s" for step, seconds in self.step_timings.items())
+            log_info(f"    ⏱  Wartezeiten: {parts} (gesamt {sum(self.step_timings.values()):.1f}s)")
+    
     def search_vessel(self, vessel_name: str) -> Optional[Dict]:
         """
         Sucht ein Schiff auf shipfinder.com und extrahiert die Daten
@@ -852,6 +2809,11 @@ class VesselFinderScraper:
         2. Verwende die Suchfunktion auf der Seite
         3. Extrahiere IMO, MMSI, Länge, Breite, Baujahr, Typ
         
+        Statt fester Pausen wartet jeder Schritt auf eine Bedingung (Element
+        vorhanden/klickbar, Netzwerk ruhig, #si_mmsi befüllt) mit eigener
+        Frist (SCRAPER_STEP_TIMEOUTS); die Wartezeiten stehen danach in
+        step_timings.
+        
         Args:
             vessel_name: Name des Schiffs
             
@@ -861,20 +2823,23 @@ class VesselFinderScraper:
         if not self.driver:
             self.setup_driver()
         
+        self.step_timings = {}
         try:
             # Gehe zur Hauptseite und verwende die Suchfunktion
             main_url = "https://www.shipfinder.com/"
             
             log_info(f"  Suche: {vessel_name}")
             log_info(f"    Öffne shipfinder.com Hauptseite...")
+            network_idle = self._network_idle()
             self.driver.get(main_url)
-            time.sleep(3)  # Warte auf Seitenload
+            # Warte auf Seitenload (Suchfeld im DOM)
+            self._wait_for('seite', EC.presence_of_element_located((By.CSS_SELECTOR, "#txtKey, #search")))
             
             # Schließe Cookie-Consent-Popup (wichtig: muss VOR Suchfeld-Suche passieren!)
             log_info(f"    Prüfe auf Cookie-Consent-Popup...")
             try:
-                # Warte kurz auf mögliches Popup
-                time.sleep(2)
+                # Warte, bis nachgeladene Skripte (Consent, Overlays) da sind
+                self._wait_for('netz', network_idle)
                 
                 # Versuche zuerst alle Overlays mit JavaScript zu entfernen
                 try:
@@ -895,7 +2860,6 @@ class VesselFinderScraper:
                         });
                     """)
                     log_info(f"      ✓ Overlays per JavaScript entfernt")
-                    time.sleep(1)
                 except Exception as e:
                     log_info(f"      ⚠️  JavaScript-Entfernung fehlgeschlagen: {e}")
                 
@@ -907,7 +2871,7 @@ class VesselFinderScraper:
                     
                     if consent_buttons:
                         consent_buttons[0].click()
-                        time.sleep(2)
+                        self._wait_for('popup', EC.invisibility_of_element(consent_buttons[0]))
                         log_info(f"      ✓ Cookie-Consent-Popup geschlossen (Consent-Button)")
                 except Exception as e:
                     log_info(f"      ⚠️  Kein Consent-Button gefunden: {e}")
@@ -931,7 +2895,7 @@ class VesselFinderScraper:
                                     try:
                                         if btn.is_displayed():
                                             btn.click()
-                                            time.sleep(2)
+                                            self._wait_for('popup', EC.invisibility_of_element(btn))
                                             log_info(f"      ✓ Popup geschlossen: {selector}")
                                             break
                                     except:
@@ -996,11 +2960,13 @@ class VesselFinderScraper:
                     return None
                 
                 # Warte bis das Suchfeld klickbar ist
-                try:
-                    wait = WebDriverWait(self.driver, 10)
-                    search_box = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "#search")))
+                ready = None
+                if self.driver.find_elements(By.CSS_SELECTOR, "#search"):
+                    ready = self._wait_for('suchfeld', EC.element_to_be_clickable((By.CSS_SELECTOR, "#search")))
+                if ready:
+                    search_box = ready
                     log_info(f"      ✓ Suchfeld ist bereit")
-                except:
+                else:
                     log_warning(f"      ⚠️  Timeout beim Warten auf Suchfeld")
                 
                 # Gebe den Schiffsnamen ein
@@ -1009,14 +2975,17 @@ class VesselFinderScraper:
                 # Versuche verschiedene Methoden, um Text einzugeben
                 try:
                     # Methode 1: Fokussiere mit JavaScript und gib Text ein
+                    typed_field = None
                     try:
                         # Finde das Input-Feld innerhalb des search-Divs
                         input_field = search_box.find_element(By.TAG_NAME, "input")
                         # Fokussiere mit JavaScript
                         self.driver.execute_script("arguments[0].focus();", input_field)
-                        time.sleep(0.5)
+                        self._wait_for('eingabe', lambda d: d.execute_script(
+                            "return document.activeElement === arguments[0];", input_field))
                         input_field.clear()
                         input_field.send_keys(vessel_name)
+                        typed_field = input_field
                         log_info(f"      ✓ Text eingegeben (Methode: Input-Feld)")
                     except:
                         # Methode 2: Klicke auf das Div und versuche dann Input
@@ -1026,12 +2995,14 @@ class VesselFinderScraper:
                                 var overlays = document.querySelectorAll('.fc-dialog-overlay, [class*="overlay"]');
                                 overlays.forEach(function(o) { o.remove(); });
                             """)
-                            time.sleep(0.5)
+                            self._wait_for('suchfeld', EC.element_to_be_clickable(search_box))
                             
                             search_box.click()
-                            time.sleep(1)
+                            self._wait_for('eingabe', lambda d: d.execute_script(
+                                "return document.activeElement === arguments[0];", search_box))
                             search_box.clear()
                             search_box.send_keys(vessel_name)
+                            typed_field = search_box
                             log_info(f"      ✓ Text eingegeben (Methode: Direkter Klick)")
                         except:
                             # Methode 3: Setze Wert direkt mit JavaScript
@@ -1044,7 +3015,10 @@ class VesselFinderScraper:
                             """, vessel_name)
                             log_info(f"      ✓ Text eingegeben (Methode: JavaScript)")
                     
-                    time.sleep(2)
+                    # Warte, bis der Text im Feld steht und die Vorschläge geladen sind
+                    if typed_field is not None:
+                        self._wait_for('eingabe', lambda d: typed_field.get_attribute("value") == vessel_name)
+                    self._wait_for('netz', self._network_idle())
                 except Exception as e:
                     log_error(f"      ✗ Fehler beim Texteingeben: {e}")
                     raise
@@ -1056,6 +3030,7 @@ class VesselFinderScraper:
                 search_submitted = False
                 
                 # Methode 1: Verwende shipfinder.com-spezifische Suchfunktion
+                results_idle = self._network_idle()
                 try:
                     self.driver.execute_script("""
                         // Methode 1a: Verwende die native shipfinder.com Suchfunktion
@@ -1129,7 +3104,13 @@ class VesselFinderScraper:
                 if not search_submitted:
                     log_warning(f"      ⚠️  Konnte Suche nicht starten, warte trotzdem auf Ergebnisse...")
                 
-                time.sleep(4)  # Warte auf Suchergebnisse
+                # Warte auf Suchergebnisse: "nicht gefunden" oder Suchanfrage beantwortet (Netzwerk ruhig)
+                def results_ready(driver):
+                    text = driver.execute_script("return document.body ? document.body.innerText.toLowerCase() : '';")
+                    if any(marker in text for marker in ("could not find", "not found", "no results")):
+                        return True
+                    return results_idle(driver)
+                self._wait_for('ergebnisse', results_ready)
                 
                 # Prüfe ob Schiff nicht gefunden wurde
                 page_text = self.driver.page_source.lower()
@@ -1154,7 +3135,7 @@ class VesselFinderScraper:
                     
                     if clicked:
                         log_info(f"      ✓ Klick auf Position ({click_x}, {click_y}) erfolgreich")
-                        time.sleep(4)  # Warte auf Detail-Seite
+                        self._wait_for('detail', self._detail_ready)  # Warte auf Detail-Seite
                     else:
                         log_warning(f"      ⚠️  Kein klickbares Element an Position ({click_x}, {click_y})")
                         # Fallback: Versuche ersten Link zu finden
@@ -1168,7 +3149,7 @@ class VesselFinderScraper:
                         result_url = result_link.get_attribute("href")
                         log_info(f"      ✓ Ergebnis-Link gefunden: {result_url}")
                         result_link.click()
-                        time.sleep(4)
+                        self._wait_for('detail', self._detail_ready)
                     except NoSuchElementException:
                         log_warning(f"      ✗ Kein Ergebnis-Link gefunden")
                         return None
@@ -1213,6 +3194,16 @@ class VesselFinderScraper:
             import traceback
             log_error(traceback.format_exc())
             return None
+        finally:
+            self._log_step_timings()
+    
+    @staticmethod
+    def _detail_ready(driver) -> bool:
+        """Wartebedingung Detailseite: #si_mmsi ist befüllt (Text oder title)"""
+        for element in driver.find_elements(By.CSS_SELECTOR, "#si_mmsi"):
+            if (element.get_attribute("title") or element.text or "").strip():
+                return True
+        return False
     
     def _extract_shipfinder_data(self, vessel_name: str) -> Optional[Dict]:
         """
@@ -1388,6 +3379,223 @@ class VesselFinderScraper:
         """Context Manager Ausgang"""
         self.close_driver()
 
+class DomainLimiter:
+    """
+    Prozessübergreifende Grenze für eine Domain: höchstens max_concurrent
+    gleichzeitige Suchen und höchstens rate_per_minute Suchstarts pro Minute
+    (gleichmäßig verteilt). Wird an die Worker-Prozesse übergeben.
+    """
+    
+    def __init__(self, ctx, domain: str, max_concurrent: int, rate_per_minute: float):
+        self.domain = domain
+        self.max_concurrent = max(1, max_concurrent)
+        self.slots = ctx.BoundedSemaphore(self.max_concurrent)
+        self.next_start = ctx.Value('d', 0.0)
+        self.interval = 60.0 / rate_per_minute if rate_per_minute else 0.0
+    
+    def __enter__(self):
+        self.slots.acquire()
+        with self.next_start.get_lock():
+            now = time.time()
+            start = max(now, self.next_start.value)
+            self.next_start.value = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.slots.release()
+
+def _has_vessel_data(vessel_data: Optional[Dict]) -> bool:
+    """Ein Suchergebnis zählt nur mit IMO oder Länge als Treffer"""
+    return bool(vessel_data and (vessel_data.get('imo_nummer') or vessel_data.get('laenge')))
+
+def _vesselfinder_worker(worker_id: int, tasks, results, limiter: DomainLimiter,
+                         headless: bool, attempts: int):
+    """
+    Browser-Worker (eigener Prozess): hält einen Browser offen und sucht
+    Schiffe aus der Warteschlange, bis das Endsignal (None) kommt.
+    Ergebnisse: (Name, Daten, Fehler, Worker, Sekunden); Sekunden None = Worker beendet.
+    """
+    scraper = None
+    try:
+        scraper = VesselFinderScraper(headless=headless, take_screenshots=False)
+        while True:
+            vessel_name = tasks.get()
+            if vessel_name is None:
+                break
+            start = time.time()
+            vessel_data, error = None, None
+            for attempt in range(1, attempts + 1):
+                try:
+                    with limiter:
+                        vessel_data = scraper.search_vessel(vessel_name)
+                    if _has_vessel_data(vessel_data):
+                        error = None
+                        break
+                    vessel_data = None
+                except Exception as e:
+                    error = str(e)
+                    vessel_data = None
+                    # Nächster Versuch mit frischem Browser
+                    try:
+                        scraper.close_driver()
+                    except Exception:
+                        scraper.driver = None
+            results.put((vessel_name, vessel_data, error, worker_id, time.time() - start))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if scraper is not None:
+            try:
+                scraper.close_driver()
+            except Exception:
+                pass
+        results.put((None, None, None, worker_id, None))
+
+class VesselFinderPool:
+    """
+    Pool langlebiger Browser-Worker in eigenen Prozessen.
+    
+    Alle Worker holen Schiffsnamen aus einer gemeinsamen Warteschlange und
+    teilen sich einen DomainLimiter (gleichzeitige Suchen, Suchstarts pro
+    Minute). Die Ergebnisse laufen zurück in den aufrufenden Prozess, der
+    als einziger in Datenbank und Sheet schreibt. Der Durchsatz wächst so
+    etwa linear mit der Worker-Zahl, bis die Ratengrenze erreicht ist.
+    
+    Benutzung:
+        with VesselFinderPool(workers=4) as pool:
+            for name, data, error in pool.map(namen):
+                ...
+    """
+    
+    def __init__(self, workers: int, headless: bool = True, attempts: int = 1,
+                 max_concurrent: int = SCRAPER_MAX_CONCURRENT,
+                 rate_per_minute: float = SCRAPER_RATE_PER_MINUTE):
+        if not SELENIUM_AVAILABLE:
+            raise ImportError("Selenium nicht verfügbar")
+        # spawn: jeder Worker startet sauber (keine geerbten Threads/Verbindungen)
+        self._ctx = multiprocessing.get_context("spawn")
+        self.workers = max(1, workers)
+        self.headless = headless
+        self.attempts = max(1, attempts)
+        self.limiter = DomainLimiter(self._ctx, SCRAPER_DOMAIN, max_concurrent, rate_per_minute)
+        self.tasks = self._ctx.Queue()
+        self.results = self._ctx.Queue()
+        self.processes = []
+        self.stats = {'vessels': 0, 'found': 0, 'seconds': 0.0, 'started': None}
+    
+    def __enter__(self):
+        self.start()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def start(self):
+        """Startet die Worker-Prozesse"""
+        if self.processes:
+            return
+        self.stats['started'] = time.time()
+        for worker_id in range(1, self.workers + 1):
+            process = self._ctx.Process(
+                target=_vesselfinder_worker, name=f"vesselfinder-{worker_id}",
+                args=(worker_id, self.tasks, self.results, self.limiter, self.headless, self.attempts)
+            )
+            process.start()
+            self.processes.append(process)
+        rate = f"{60 / self.limiter.interval:.0f}" if self.limiter.interval else "∞"
+        log_info(f"✓ {self.workers} Browser-Worker gestartet (max. {self.limiter.max_concurrent} gleichzeitig, "
+                 f"{rate} Suchen/min auf {self.limiter.domain})")
+    
+    def map(self, vessel_names: Iterable[str]) -> Iterator[Tuple[str, Optional[Dict], Optional[str]]]:
+        """
+        Verteilt die Namen auf die Worker und liefert Ergebnisse in Fertigstellungsreihenfolge.
+        
+        Yields:
+            (Name, Daten oder None, Fehlermeldung oder None)
+        """
+        self.start()
+        names = list(dict.fromkeys(vessel_names))
+        for name in names:
+            self.tasks.put(name)
+        remaining = len(names)
+        while remaining:
+            try:
+                name, vessel_data, error, worker_id, seconds = self.results.get(timeout=SCRAPER_POLL_SECONDS)
+            except queue.Empty:
+                if not any(p.is_alive() for p in self.processes):
+                    log_error(f"✗ Alle Browser-Worker beendet, {remaining} Schiffe nicht verarbeitet")
+                    return
+                continue
+            if seconds is None:
+                log_warning(f"  ⚠️  Browser-Worker {worker_id} beendet")
+                continue
+            remaining -= 1
+            self.stats['vessels'] += 1
+            self.stats['found'] += vessel_data is not None
+            self.stats['seconds'] += seconds
+            yield name, vessel_data, error
+    
+    def stop(self):
+        """Verwirft noch nicht begonnene Suchen (laufende werden beendet)"""
+        try:
+            while True:
+                self.tasks.get_nowait()
+        except queue.Empty:
+            pass
+    
+    def close(self):
+        """Beendet alle Worker (Browser werden geschlossen)"""
+        if not self.processes:
+            return
+        self.stop()
+        for _ in self.processes:
+            self.tasks.put(None)
+        deadline = time.time() + SCRAPER_STOP_TIMEOUT
+        for process in self.processes:
+            process.join(max(0.1, deadline - time.time()))
+            if process.is_alive():
+                process.terminate()
+                process.join(5)
+        elapsed = time.time() - (self.stats['started'] or time.time())
+        if self.stats['vessels']:
+            log_info(f"✓ Browser-Pool: {self.stats['vessels']} Schiffe in {elapsed:.0f}s "
+                     f"({self.stats['vessels'] * 60 / max(elapsed, 1e-6):.1f}/min, {self.workers} Worker, "
+                     f"Ø {self.stats['seconds'] / self.stats['vessels']:.1f}s je Schiff)")
+        self.processes = []
+
+def scrape_vessels(vessel_names: List[str], workers: int = 1, headless: bool = True,
+                   attempts: int = 1, delay: float = 3.0) -> Iterator[Tuple[str, Optional[Dict], Optional[str]]]:
+    """
+    Sucht mehrere Schiffe: mit workers > 1 über den VesselFinderPool,
+    sonst nacheinander in einem Browser mit delay Sekunden Pause.
+    
+    Yields:
+        (Name, Daten oder None, Fehlermeldung oder None)
+    """
+    if workers > 1:
+        with VesselFinderPool(workers, headless=headless, attempts=attempts) as pool:
+            yield from pool.map(vessel_names)
+        return
+    
+    with VesselFinderScraper(headless=headless, take_screenshots=False) as scraper:
+        for i, vessel_name in enumerate(vessel_names):
+            if i:
+                time.sleep(delay)
+            vessel_data, error = None, None
+            for attempt in range(1, attempts + 1):
+                try:
+                    vessel_data = scraper.search_vessel(vessel_name)
+                    if _has_vessel_data(vessel_data):
+                        error = None
+                        break
+                    vessel_data = None
+                except Exception as e:
+                    error = str(e)
+                    vessel_data = None
+            yield vessel_name, vessel_data, error
+
 # ========================= HAUPTFUNKTIONEN =========================
 def import_from_sheets(db: SchiffsDatenbank):
     """
@@ -1409,49 +3617,24 @@ def import_from_sheets(db: SchiffsDatenbank):
             print("Keine Daten zum Importieren gefunden")
             return
         
-        # Bestimme Spaltennamen (können je nach Blatt variieren)
-        # Typische Struktur: Spalte 2 = Liegeort, Spalte 3 = Länge, Spalte 4 = Name
-        df_cols = df_segelliste.columns.tolist()
-        
-        imported_count = 0
-        db.connect()
-        
-        for idx, row in df_segelliste.iterrows():
-            try:
-                # Versuche die relevanten Spalten zu identifizieren
-                # Diese Indizes basieren auf der Struktur aus segelliste_upload.py
-                if len(row) >= 5:
-                    name = str(row[4]).strip() if len(row) > 4 else ""
-                    laenge_str = str(row[3]).strip() if len(row) > 3 else ""
-                    liegeort = str(row[2]).strip() if len(row) > 2 else ""
-                    
-                    if not name or name == "":
-                        continue
-                    
-                    # Konvertiere Länge
-                    laenge = None
-                    if laenge_str and laenge_str != "":
-                        try:
-                            laenge = float(laenge_str.replace(",", "."))
-                        except ValueError:
-                            pass
-                    
-                    # Füge Schiff hinzu
-                    db.add_ship(name=name, laenge=laenge, liegeort=liegeort)
-                    imported_count += 1
-                    
-            except Exception as e:
-                print(f"  Fehler bei Zeile {idx}: {e}")
-                continue
+        # Spaltenweise Umwandlung (Name, Länge, Liegeort, Zeiten), dann Bulk-Upsert
+        ships = transform_segelliste(df_segelliste).to_dict('records')
         
-        # Speichere Import-Historie
-        db.cursor.execute("""
-            INSERT INTO import_historie (quelle, anzahl_datensaetze, status)
-            VALUES (?, ?, ?)
-        """, ('Google Sheets - Segelliste', imported_count, 'erfolreich'))
+        # Gesamter Import als Bulk-Upsert in einer Transaktion
+        imported_count = len(ships)
+        with db.transaction():
+            # Vollständige Liegeliste: nicht mehr gelistete Schiffe gelten als abgefahren
+            counts = db.upsert_ships(ships, complete_positions=True)
+            
+            # Speichere Import-Historie
+            db.cursor.execute("""
+                INSERT INTO import_historie (quelle, anzahl_datensaetze, status, bemerkung)
+                VALUES (?, ?, ?, ?)
+            """, ('Google Sheets - Segelliste', imported_count, 'erfolreich',
+                  f"{counts['inserted']} neu, {counts['updated']} aktualisiert, {counts['unchanged']} unverändert"))
         
-        db.conn.commit()
-        db.disconnect()
+        db.apply_position_retention()
+        db.prune_change_log()
         
         print(f"\n✓ Import abgeschlossen: {imported_count} Schiffe importiert/aktualisiert")
         
@@ -1473,21 +3656,9 @@ def export_to_sheets(db: SchiffsDatenbank, worksheet_name: str = "Schiffsdatenba
     print(f"\n=== Export zu Google Sheets ({worksheet_name}) ===")
     
     try:
-        # Hole alle Schiffe
-        ships = db.get_all_ships()
-        
-        if not ships:
-            print("Keine Daten zum Exportieren gefunden")
-            return
-        
-        # Konvertiere zu DataFrame
-        df = pd.DataFrame(ships)
-        
         # Wähle relevante Spalten
         export_columns = ['name', 'laenge', 'breite', 'tiefgang', 'imo_nummer', 
                          'mmsi_nummer', 'baujahr', 'typ', 'flagge', 'liegeort', 'status']
-        existing_columns = [col for col in export_columns if col in df.columns]
-        df_export = df[existing_columns]
         
         # Übersetze Spaltennamen ins Deutsche
         column_mapping = {
@@ -1503,21 +3674,289 @@ def export_to_sheets(db: SchiffsDatenbank, worksheet_name: str = "Schiffsdatenba
             'liegeort': 'Liegeort',
             'status': 'Status'
         }
-        df_export.rename(columns=column_mapping, inplace=True)
+        header = [column_mapping[col] for col in export_columns]
+        
+        # Schiffe direkt aus der Datenbank streamen (kein DataFrame / keine Gesamtliste)
+        rows = ([ship[col] if ship[col] is not None else '' for col in export_columns]
+                for ship in db.iter_ships())
         
         # Exportiere zu Google Sheets
         gs = GoogleSheetsConnector(SERVICE_ACCOUNT_FILE, SPREADSHEET_URL)
-        gs.export_to_sheet(df_export, worksheet_name)
+        count = gs.export_rows(header, rows, worksheet_name)
+        
+        if not count:
+            print("Keine Daten zum Exportieren gefunden")
+            return
         
-        print(f"✓ {len(df_export)} Schiffe nach Google Sheets exportiert")
+        print(f"✓ {count} Schiffe nach Google Sheets exportiert")
         
     except Exception as e:
         print(f"✗ Fehler beim Export: {e}")
 
-def update_hhla_sheet_with_data(db: SchiffsDatenbank):
+# Tabellen für den Parquet-Export: Spalten (Typ), Watermark-Spalte, Partition;
+# Tabellen mit 'cdc' werden über das Änderungsprotokoll inkrementell exportiert
+# (i = Ganzzahl, f = Kommazahl, t = Text, ts = Zeitstempel)
+PARQUET_TABLES = {
+    'schiffe': {
+        'columns': [('id', 'i'), ('name', 't'), ('laenge', 'f'), ('breite', 'f'), ('tiefgang', 'f'),
+                    ('imo_nummer', 't'), ('mmsi_nummer', 't'), ('typ', 't'), ('flagge', 't'),
+                    ('baujahr', 'i'), ('vesselfinder_link', 't'), ('erstellt_am', 'ts'),
+                    ('aktualisiert_am', 'ts')],
+        'watermark': 'aktualisiert_am',
+        'cdc': True,
+        'partition': ('export_datum', None),    # Partition = Exporttag
+    },
+    'positionen': {
+        'columns': [('id', 'i'), ('schiff_id', 'i'), ('liegeort', 't'), ('berth', 't'),
+                    ('ankunft', 'ts'), ('abfahrt', 'ts'), ('status', 't'), ('erstellt_am', 'ts'),
+                    ('zuletzt_gesehen', 'ts'), ('beobachtungen', 'i')],
+        'watermark': 'zuletzt_gesehen',
+        'cdc': True,
+        'partition': ('monat', 'ankunft'),      # Partition = Monat der Ankunft
+    },
+    'import_historie': {
+        'columns': [('id', 'i'), ('quelle', 't'), ('zeitpunkt', 'ts'), ('anzahl_datensaetze', 'i'),
+                    ('status', 't'), ('bemerkung', 't')],
+        'watermark': 'zeitpunkt',
+        'partition': ('monat', 'zeitpunkt'),
+    },
+}
+PARQUET_BATCH_ROWS = 50000
+PARQUET_WATERMARK_FILE = "_watermarks.json"
+# Zeilen der letzten N Sekunden erst im nächsten Lauf exportieren, damit noch
+# offene Schreib-Transaktionen (gleicher Zeitstempel) nicht verloren gehen
+PARQUET_WATERMARK_LAG_SECONDS = 60
+
+def _parquet_column(values: List, kind: str, label: str = ''):
+    """
+    Baut eine Arrow-Spalte aus SQLite-Werten. SQLite erzwingt die Spaltentypen
+    nicht (z.B. '199,9' als Text in einer REAL-Spalte): Zahlen werden je Zelle
+    wie beim Sheet-Import umgewandelt, nicht umwandelbare Werte werden null.
+    """
+    if kind in ('i', 'f'):
+        typ = int if kind == 'i' else float
+        numbers = [None if v is None else _ship_number(v, typ) for v in values]
+        invalid = [v for v, n in zip(values, numbers) if n is None and str(v or '').strip()]
+        if invalid:
+            log_warning(f"  ⚠️  {label}: {len(invalid)} Werte nicht als "
+                        f"{'Ganzzahl' if typ is int else 'Zahl'} lesbar (→ null), z.B. {invalid[0]!r}")
+        return pa.array(numbers, type=pa.int64() if typ is int else pa.float64())
+    text = pa.array([None if v is None else str(v) for v in values], type=pa.string())
+    if kind == 'ts':
+        return pc.strptime(text, format='%Y-%m-%d %H:%M:%S', unit='s', error_is_null=True)
+    return text
+
+def export_to_parquet(db: SchiffsDatenbank, target_dir: str = PARQUET_DIR, full: bool = False) -> Dict[str, int]:
+    """
+    Exportiert schiffe, positionen und import_historie als partitionierte
+    Parquet-Dateien (Hive-Layout, z.B. positionen/monat=2025-01/part-....parquet).
+    
+    Inkrementell: schiffe und positionen über das Änderungsprotokoll (nur
+    seit dem letzten Export geänderte ids), import_historie über den höchsten
+    exportierten Zeitpunkt (Zeilen der letzten PARQUET_WATERMARK_LAG_SECONDS
+    folgen im nächsten Lauf). Geänderte Zeilen tauchen dadurch mehrfach auf –
+    beim Lesen je 'id' die neueste Version (größte Watermark-Spalte) verwenden.
+    
+    Args:
+        db: Datenbank-Instanz
+        target_dir: Zielverzeichnis
+        full: Vollexport (bestehende Dateien und Watermarks verwerfen)
+        
+    Returns:
+        Dictionary {tabelle: anzahl exportierter Zeilen}
+    """
+    if not PARQUET_AVAILABLE:
+        log_error("✗ pyarrow nicht verfügbar. Installiere mit: pip install pyarrow")
+        return {}
+    
+    log_header(f"Parquet-Export nach {target_dir}")
+    os.makedirs(target_dir, exist_ok=True)
+    watermark_path = os.path.join(target_dir, PARQUET_WATERMARK_FILE)
+    watermarks = {}
+    if not full and os.path.exists(watermark_path):
+        with open(watermark_path, encoding='utf-8') as f:
+            watermarks = json.load(f)
+    
+    run_id = datetime.now().strftime('%Y%m%d%H%M%S%f')
+    export_datum = datetime.now().strftime('%Y-%m-%d')
+    counts = {}
+    new_watermarks = dict(watermarks)
+    
+    # Ein Lese-Schnappschuss für alle Tabellen: Änderungsnummer und Daten passen zusammen
+    with db.read_snapshot():
+        upto_seq = db.current_change_seq()
+        for table, spec in PARQUET_TABLES.items():
+            counts[table] = _export_parquet_table(db, table, spec, target_dir, watermarks,
+                                                  new_watermarks, upto_seq, run_id, export_datum, full)
+    
+    with open(watermark_path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(new_watermarks, f, indent=2)
+    os.replace(watermark_path + ".tmp", watermark_path)
+    return counts
+
+def _export_parquet_table(db: SchiffsDatenbank, table: str, spec: Dict, target_dir: str,
+                          watermarks: Dict, new_watermarks: Dict, upto_seq: int,
+                          run_id: str, export_datum: str, full: bool) -> int:
+    """Exportiert eine Tabelle für export_to_parquet(), gibt die Anzahl Zeilen zurück"""
+    if full:
+        shutil.rmtree(os.path.join(target_dir, table), ignore_errors=True)
+    
+    names = [c for c, _ in spec['columns']]
+    kinds = [k for _, k in spec['columns']]
+    schema = pa.schema([(c, pa.int64() if k == 'i' else pa.float64() if k == 'f'
+                         else pa.timestamp('s') if k == 'ts' else pa.string())
+                        for c, k in spec['columns']])
+    mark_col = spec['watermark']
+    part_name, part_col = spec['partition']
+    part_index = names.index(part_col) if part_col else None
+    
+    since = watermarks.get(table)
+    since_seq = watermarks.get(f"{table}_seq")
+    if spec.get('cdc') and since_seq is not None and db.change_log_covers(since_seq):
+        # Nur seit dem letzten Export geänderte Zeilen (Änderungsprotokoll)
+        rows_cursor = db.conn.execute(f"""
+            SELECT {', '.join(names)} FROM {table}
+            WHERE id IN (SELECT zeilen_id FROM aenderungen
+                         WHERE tabelle = ? AND seq > ? AND seq <= ? AND aktion <> 'D')
+            ORDER BY id
+        """, (table, since_seq, upto_seq))
+    elif spec.get('cdc'):
+        # Erster Lauf bzw. Protokoll lückenhaft: alle Zeilen
+        rows_cursor = db.conn.execute(f"SELECT {', '.join(names)} FROM {table} ORDER BY id")
+    else:
+        rows_cursor = db.conn.execute(
+            f"SELECT {', '.join(names)} FROM {table}"
+            f" WHERE {mark_col} < datetime('now', ?)"
+            + (f" AND {mark_col} > ?" if since else "")
+            + " ORDER BY id",
+            (f"-{PARQUET_WATERMARK_LAG_SECONDS} seconds",) + ((since,) if since else ())
+        )
+    
+    writers = {}
+    written = 0
+    max_mark = since
+    mark_index = names.index(mark_col)
+    try:
+        while True:
+            rows = rows_cursor.fetchmany(PARQUET_BATCH_ROWS)
+            if not rows:
+                break
+            # Zeilen auf Partitionen verteilen
+            partitions: Dict[str, List] = {}
+            for row in rows:
+                if part_index is None:
+                    key = export_datum
+                else:
+                    key = str(row[part_index] or '')[:7] or 'unbekannt'
+                partitions.setdefault(key, []).append(row)
+                mark = row[mark_index]
+                if mark and (max_mark is None or str(mark) > max_mark):
+                    max_mark = str(mark)
+            
+            for key, part_rows in partitions.items():
+                if key not in writers:
+                    part_dir = os.path.join(target_dir, table, f"{part_name}={key}")
+                    os.makedirs(part_dir, exist_ok=True)
+                    final_path = os.path.join(part_dir, f"part-{run_id}.parquet")
+                    writers[key] = (pq.ParquetWriter(final_path + ".tmp", schema), final_path)
+                columns = list(zip(*part_rows))
+                batch = pa.RecordBatch.from_arrays(
+                    [_parquet_column(list(col), kind, f"{table}.{name}")
+                     for col, kind, name in zip(columns, kinds, names)],
+                    schema=schema
+                )
+                writers[key][0].write_batch(batch)
+            written += len(rows)
+    except BaseException:
+        for writer, final_path in writers.values():
+            writer.close()
+            os.remove(final_path + ".tmp")
+        raise
+    
+    # Erst nach vollständigem Schreiben sichtbar machen
+    for writer, final_path in writers.values():
+        writer.close()
+        os.replace(final_path + ".tmp", final_path)
+    
+    if max_mark:
+        new_watermarks[table] = max_mark
+    if spec.get('cdc'):
+        new_watermarks[f"{table}_seq"] = upto_seq
+    log_info(f"✓ {table}: {written} Zeilen exportiert ({len(writers)} Partition(en))")
+    return written
+
+# Verbraucher-Name im Änderungsprotokoll für den Sheet-Abgleich
+HHLA_SHEET_CDC_CONSUMER = "hhla_sheet"
+
+HHLA_SHEET = "Schiffsdaten HHLA"
+HHLA_HEADER = ['Name', 'Schiffstyp', 'MMSI-Nummer', 'IMO-Nummer', 'Baujahr', 'Länge (m)', 'Breite (m)', '', 'VesselFinder-Link']
+
+# Abgeglichene Felder: (DB-Spalte, Sheet-Spalte, Anzeigename) – Spalte B (Typ) wird nicht abgeglichen
+HHLA_SYNC_FIELDS = [
+    ('mmsi_nummer', 'C', 'MMSI'),
+    ('imo_nummer', 'D', 'IMO'),
+    ('baujahr', 'E', 'Jahr'),
+    ('laenge', 'F', 'Länge'),
+    ('breite', 'G', 'Breite'),
+    ('vesselfinder_link', 'I', 'VF-Link'),
+]
+HHLA_SYNC_TYPES = {'baujahr': int, 'laenge': float, 'breite': float}
+
+# Konfliktregel je Feld, wenn Sheet und Datenbank seit dem letzten Abgleich
+# beide (unterschiedlich) geändert wurden: 'sheet' oder 'db' gewinnt
+HHLA_SYNC_RULES = {field: 'sheet' for field, _, _ in HHLA_SYNC_FIELDS}
+
+# Markierungen in Spalte C, die kein MMSI-Wert sind
+HHLA_NO_DATA_MARKERS = ("Keine Daten", "Keine Daten 2")
+
+def _sync_value(field: str, value) -> str:
+    """Vergleichbarer Text eines Feldwerts (Zahlen einheitlich: 200.0 / '200,0' → '200')"""
+    text = '' if value is None else str(value).strip()
+    if text and field in HHLA_SYNC_TYPES:
+        number = float(value) if isinstance(value, (int, float)) else sheets_client.convert_cell(text, float)
+        if number is not None:
+            return str(int(number)) if number.is_integer() else str(number)
+    return text
+
+def _sync_hash(values: List[str]) -> str:
+    """Fingerprint einer Zeile (Feldwerte in HHLA_SYNC_FIELDS-Reihenfolge)"""
+    return hashlib.sha1("\x1f".join(values).encode('utf-8')).hexdigest()
+
+def _merge_sync_field(sheet_value: str, db_value: str, base: Optional[str], rule: str) -> Tuple[str, bool]:
+    """
+    Dreiwege-Abgleich eines Felds gegen den Stand des letzten Abgleichs.
+    
+    Leere Werte werden nie übertragen (eine geleerte Zelle wird wieder befüllt).
+    Hat nur eine Seite geändert, gewinnt sie; haben beide geändert (oder gibt
+    es noch keinen Ausgangsstand), entscheidet die Regel.
+    
+    Returns:
+        (Ergebniswert, Konflikt)
+    """
+    if sheet_value == db_value or not db_value:
+        return sheet_value, False
+    if not sheet_value:
+        return db_value, False
+    sheet_changed, db_changed = sheet_value != base, db_value != base
+    if sheet_changed and not db_changed:
+        return sheet_value, False
+    if db_changed and not sheet_changed:
+        return db_value, False
+    return (db_value if rule == 'db' else sheet_value), True
+
+def sync_hhla_sheet(db: SchiffsDatenbank, full: bool = False,
+                    rules: Optional[Dict[str, str]] = None) -> Optional[Dict[str, int]]:
     """
-    Aktualisiert das Sheet 'Schiffsdaten HHLA' mit Daten aus der Datenbank.
-    Liest die Schiffsnamen aus Spalte A und schreibt die gefundenen Daten in die anderen Spalten.
+    Bidirektionaler Abgleich 'Schiffsdaten HHLA' ↔ Datenbank.
+    
+    Pro Schiffsname werden in 'sheet_abgleich' der Hash der Sheet-Werte, der
+    Hash der Datenbank-Werte und die abgeglichenen Feldwerte gespeichert. Ein
+    Lauf liest das Sheet einmal (ein batchGet über A–I) und vergleicht nur
+    Hashes; Datenbank-Werte werden nur für Zeilen geladen, deren Sheet-Hash
+    sich geändert hat oder deren Schiff laut Änderungsprotokoll geändert wurde.
+    Nur diese Zeilen werden feldweise abgeglichen (siehe _merge_sync_field)
+    und in beide Richtungen geschrieben: Datenbank per upsert_ships(), Sheet
+    per BatchWriter in einem values.batchUpdate.
     
     Spaltenaufteilung:
     A = Name
@@ -1529,206 +3968,186 @@ def update_hhla_sheet_with_data(db: SchiffsDatenbank):
     G = Breite
     H = (Reserve)
     I = VesselFinder-Link
+    
+    Args:
+        db: Datenbank
+        full: Datenbank-Werte aller Zeilen laden statt nur der geänderten
+              (z.B. nach manuellen Änderungen an der Datenbankdatei)
+        rules: Konfliktregeln je Feld, überschreiben HHLA_SYNC_RULES
+              (z.B. {'vesselfinder_link': 'db'})
+    
+    Returns:
+        Zähler ('rows', 'checked', 'to_sheet', 'to_db', 'conflicts')
+        oder None bei Fehler
     """
-    if not SHEETS_AVAILABLE:
+    if not SHEETS_AVAILABLE or sheets_client is None:
         log_error("✗ Google Sheets-Funktionen nicht verfügbar")
-        return
+        return None
     
-    log_header("Aktualisiere 'Schiffsdaten HHLA' mit Datenbank-Daten")
+    rules = {**HHLA_SYNC_RULES, **(rules or {})}
+    invalid = {field: rule for field, rule in rules.items()
+               if field not in HHLA_SYNC_RULES or rule not in ('sheet', 'db')}
+    if invalid:
+        raise ValueError(f"Ungültige Abgleich-Regeln: {invalid} (Felder: {', '.join(HHLA_SYNC_RULES)}; Regel: sheet|db)")
+    
+    log_header("Abgleich 'Schiffsdaten HHLA' ↔ Datenbank")
+    counts = {'rows': 0, 'checked': 0, 'to_sheet': 0, 'to_db': 0, 'conflicts': 0}
     
     try:
-        gs = GoogleSheetsConnector(SERVICE_ACCOUNT_FILE, SPREADSHEET_URL)
-        gs.connect()
+        db.connect()
+        upto_seq = db.current_change_seq()
+        checkpoint = None if full else db.get_checkpoint(HHLA_SHEET_CDC_CONSUMER)
+        state = db.load_sheet_sync_state(HHLA_SHEET)
         
+        gs = GoogleSheetsConnector(SERVICE_ACCOUNT_FILE, SPREADSHEET_URL)
         try:
-            worksheet = gs.sh.worksheet("Schiffsdaten HHLA")
+            gs.worksheet(HHLA_SHEET)
         except gspread.WorksheetNotFound:
-            log_error("✗ Blatt 'Schiffsdaten HHLA' nicht gefunden")
-            return
-        
-        # Lese alle Werte
-        all_values = worksheet.get_all_values()
-        
-        if len(all_values) < 1:
-            log_error("✗ Keine Daten im Sheet gefunden")
-            return
-        
-        # Prüfe/erstelle Header
-        header = all_values[0] if all_values else []
-        expected_header = ['Name', 'Schiffstyp', 'MMSI-Nummer', 'IMO-Nummer', 'Baujahr', 'Länge (m)', 'Breite (m)', '', 'VesselFinder-Link']
+            log_error(f"✗ Blatt '{HHLA_SHEET}' nicht gefunden")
+            return None
+        columns = gs.read_columns([(HHLA_SHEET, "A B C D E F G H I", 1)])[HHLA_SHEET]
         
-        if len(header) < 9 or header[:7] != expected_header[:7]:
-            # Erstelle/aktualisiere Header - neue API
-            worksheet.update(values=[expected_header], range_name='A1:I1')
+        writer = sheets_client.BatchWriter(sheets_client.gspread_flush(gs.sh), max_age_seconds=0)
+        header = [columns[letter][0] if columns[letter] else '' for letter in "ABCDEFGHI"]
+        if header[:7] != HHLA_HEADER[:7]:
+            writer.update(HHLA_SHEET, 1, 1, [HHLA_HEADER])
             log_info("✓ Header aktualisiert: A=Name, B=nicht geschrieben, C=MMSI, D=IMO, E=Jahr, F=Länge, G=Breite, I=Link")
         
-        # Sammle Updates
-        updates = []
-        row_num = 2  # Start bei Zeile 2 (nach Header)
-        
-        # Statistiken
-        count_skipped = 0  # Schiffe mit allen Daten
-        count_no_changes = 0  # Schiffe ohne neue Daten
-        count_updated = 0  # Schiffe mit Updates
-        missing_ranges = []  # Bereiche von Schiffen nicht in DB
-        missing_start = None
-        missing_end = None
-        
-        db.connect()
-        
-        # Verarbeite alle Zeilen (ab Zeile 2)
-        for row in all_values[1:]:
-            if not row or not row[0].strip():
-                row_num += 1
+        # Sheet-Zeilen je Name (erste Zeile gewinnt) mit Fingerprint
+        sheet_rows: Dict[str, Tuple[int, List[str]]] = {}
+        duplicates = 0
+        for index, name in enumerate(columns['A'][1:], start=1):
+            if not name:
                 continue
-            
-            vessel_name = row[0].strip()
-            
-            # Hole existierende Werte aus der Zeile (Spalten B-I)
-            # Erweitere das Array falls nötig
-            while len(row) < 9:
-                row.append('')
-            
-            # Spalte B (Typ) wird NICHT geschrieben, aber C (MMSI) wird geschrieben
-            existing_mmsi = row[2].strip() if len(row) > 2 else ''
-            existing_imo = row[3].strip() if len(row) > 3 else ''
-            existing_jahr = row[4].strip() if len(row) > 4 else ''
-            existing_laenge = row[5].strip() if len(row) > 5 else ''
-            existing_breite = row[6].strip() if len(row) > 6 else ''
-            existing_link = row[8].strip() if len(row) > 8 else ''
-            
-            # Prüfe ob alle wichtigen Felder bereits ausgefüllt sind (ohne Typ, aber mit MMSI)
-            if all([existing_mmsi, existing_imo, existing_jahr, existing_laenge, existing_breite, existing_link]):
-                count_skipped += 1
-                row_num += 1
+            if name in sheet_rows:
+                duplicates += 1
                 continue
+            values = [_sync_value(field, columns[letter][index]) for field, letter, _ in HHLA_SYNC_FIELDS]
+            sheet_rows[name] = (index + 1, values)
+        counts['rows'] = len(sheet_rows)
+        sheet_hashes = {name: _sync_hash(values) for name, (_, values) in sheet_rows.items()}
+        
+        # Kandidaten: geänderte Sheet-Zeilen + laut Änderungsprotokoll geänderte Schiffe
+        if checkpoint is not None and db.change_log_covers(checkpoint):
+            changed_ids, _ = db.changed_ids_since(checkpoint, 'schiffe', upto_seq)
+            db_data = db.load_hhla_projection(ship_ids=changed_ids) if changed_ids else {}
+            candidates = {name for name in db_data if name in sheet_rows}
+            sheet_changed = {name for name, h in sheet_hashes.items()
+                             if name not in state or state[name][0] != h}
+            missing = sheet_changed - set(db_data)
+            if missing:
+                db_data.update(db.load_hhla_projection(names=missing))
+            candidates |= sheet_changed
+            log_info(f"Inkrementeller Abgleich seit Änderung #{checkpoint}: {len(sheet_changed)} Sheet-Zeilen, "
+                     f"{len(changed_ids)} Schiffe in der Datenbank geändert")
+        else:
+            db_data = db.load_hhla_projection(names=sheet_rows)
+            candidates = set(sheet_rows)
+            log_info(f"Vollabgleich aller {len(sheet_rows)} Zeilen")
+        
+        empty = [''] * len(HHLA_SYNC_FIELDS)
+        db_values = {name: [_sync_value(field, value) for (field, _, _), value in zip(HHLA_SYNC_FIELDS, db_data[name][1:])]
+                     if name in db_data else empty for name in candidates}
+        
+        merged_rows: Dict[str, List[str]] = {}
+        sheet_after: Dict[str, List[str]] = {}
+        db_records: Dict[str, Dict] = {}
+        for name in sorted(candidates, key=lambda n: sheet_rows[n][0]):
+            row_num, sheet_values = sheet_rows[name]
+            entry = state.get(name)
+            if entry and entry[0] == sheet_hashes[name] and entry[1] == _sync_hash(db_values[name]):
+                continue
+            counts['checked'] += 1
+            base = entry[2] if entry else empty
             
-            # Suche in Datenbank
-            # Reihenfolge: typ, mmsi, imo, baujahr, laenge, breite, vesselfinder_link
-            db.cursor.execute("""
-                SELECT typ, mmsi_nummer, imo_nummer, baujahr, laenge, breite, vesselfinder_link
-                FROM schiffe
-                WHERE name = ?
-            """, (vessel_name,))
-            
-            result = db.cursor.fetchone()
-            
-            if result:
-                typ, mmsi, imo, baujahr, laenge, breite, vf_link = result
-                
-                # Bereite Update vor (Spalten C-G und I, ohne B/Typ)
-                # NUR leere Zellen füllen, bestehende Werte NICHT überschreiben
-                update_data_cg = [
-                    existing_mmsi if existing_mmsi else (str(mmsi) if mmsi else ''),       # C: MMSI-Nummer
-                    existing_imo if existing_imo else (str(imo) if imo else ''),           # D: IMO-Nummer
-                    existing_jahr if existing_jahr else (str(baujahr) if baujahr else ''), # E: Baujahr
-                    existing_laenge if existing_laenge else (str(laenge) if laenge else ''), # F: Länge
-                    existing_breite if existing_breite else (str(breite) if breite else '')  # G: Breite
-                ]
-                
-                # Spalte I: VesselFinder-Link
-                update_data_i = existing_link if existing_link else (str(vf_link) if vf_link else '')
-                
-                # Prüfe ob tatsächlich etwas geändert wurde
-                original_data = [existing_mmsi, existing_imo, existing_jahr, existing_laenge, existing_breite]
-                changes_made = False
-                
-                if update_data_cg != original_data:
-                    # Füge zu Batch-Update hinzu (ohne Spalte B)
-                    updates.append({
-                        'range': f'C{row_num}:G{row_num}',
-                        'values': [update_data_cg]
-                    })
-                    changes_made = True
-                
-                # Update Spalte I (VesselFinder-Link)
-                if not existing_link and vf_link:
-                    updates.append({
-                        'range': f'I{row_num}',
-                        'values': [[update_data_i]]
-                    })
-                    changes_made = True
-                
-                if changes_made:
-                    # Zeige nur die neu gefüllten Felder (ohne Typ)
-                    filled = []
-                    if not existing_mmsi and mmsi:
-                        filled.append(f"MMSI={mmsi}")
-                    if not existing_imo and imo:
-                        filled.append(f"IMO={imo}")
-                    if not existing_jahr and baujahr:
-                        filled.append(f"Jahr={baujahr}")
-                    if not existing_laenge and laenge:
-                        filled.append(f"Länge={laenge}m")
-                    if not existing_breite and breite:
-                        filled.append(f"Breite={breite}m")
-                    if not existing_link and vf_link:
-                        filled.append(f"VF-Link")
-                    
-                    if filled:
-                        log_info(f"  ✓ Zeile {row_num}: {vessel_name} → {', '.join(filled)}")
-                        count_updated += 1
-                        # Beende fehlenden Bereich falls einer läuft
-                        if missing_start is not None:
-                            missing_ranges.append((missing_start, missing_end))
-                            missing_start = None
-                            missing_end = None
-                    else:
-                        count_no_changes += 1
-                else:
-                    count_no_changes += 1
-                    # Beende fehlenden Bereich falls einer läuft
-                    if missing_start is not None:
-                        missing_ranges.append((missing_start, missing_end))
-                        missing_start = None
-                        missing_end = None
-            else:
-                # Sammle fehlende Schiffe in Bereichen
-                if missing_start is None:
-                    missing_start = row_num
-                missing_end = row_num
+            merged, after, record, to_sheet, to_db = [], list(sheet_values), {}, [], []
+            for i, (field, letter, label) in enumerate(HHLA_SYNC_FIELDS):
+                sheet_value, db_value = sheet_values[i], db_values[name][i]
+                if field == 'mmsi_nummer' and sheet_value in HHLA_NO_DATA_MARKERS:
+                    sheet_value = ''
+                value, conflict = _merge_sync_field(sheet_value, db_value, base[i] if entry else None, rules[field])
+                merged.append(value)
+                if conflict:
+                    counts['conflicts'] += 1
+                    log_warning(f"  ⚠️  Zeile {row_num}: {name} {label} Sheet '{sheet_value}' ≠ DB '{db_value}' "
+                                f"→ {rules[field]} gewinnt")
+                if value and value != sheet_value:
+                    writer.set(HHLA_SHEET, row_num, sheets_client.column_number(letter), value)
+                    after[i] = value
+                    to_sheet.append(f"{label}={value}")
+                if value and value != db_value:
+                    typ = HHLA_SYNC_TYPES.get(field)
+                    converted = sheets_client.convert_cell(value, typ) if typ else value
+                    if converted is None:
+                        log_warning(f"  ⚠️  Zeile {row_num}: {name} {label} '{value}' ist keine Zahl, nicht übernommen")
+                        continue
+                    record[field] = converted
+                    to_db.append(f"{label}={value}")
             
-            row_num += 1
-        
-        # Beende letzten fehlenden Bereich falls vorhanden
-        if missing_start is not None:
-            missing_ranges.append((missing_start, missing_end))
-        
-        db.disconnect()
+            merged_rows[name] = merged
+            sheet_after[name] = after
+            if record:
+                db_records[name] = record
+            if to_sheet:
+                counts['to_sheet'] += 1
+            if to_db:
+                counts['to_db'] += 1
+            if to_sheet or to_db:
+                parts = ([f"Sheet: {', '.join(to_sheet)}"] if to_sheet else []) + \
+                        ([f"DB: {', '.join(to_db)}"] if to_db else [])
+                log_info(f"  ✓ Zeile {row_num}: {name} → {' | '.join(parts)}")
+        
+        # Datenbank zuerst (eine Transaktion), frühere Namen auf den aktuellen Namen abbilden
+        if db_records:
+            current = db.current_names(db_records)
+            db.upsert_ships([{**record, 'name': current.get(name, name)} for name, record in db_records.items()])
+            for name, values in db.load_hhla_projection(names=db_records).items():
+                db_values[name] = [_sync_value(field, value) for (field, _, _), value in zip(HHLA_SYNC_FIELDS, values[1:])]
+        
+        # Sheet in einem values.batchUpdate
+        if len(writer):
+            log_info(f"Schreibe {len(writer)} Zellen ins Sheet...")
+        writer.close()
+        
+        # Erst nach erfolgreichem Schreiben als abgeglichen markieren
+        db.save_sheet_sync_state(HHLA_SHEET, {
+            name: (_sync_hash(sheet_after[name]), _sync_hash(db_values[name]), merged)
+            for name, merged in merged_rows.items()
+        }, keep=sheet_rows)
+        db.set_checkpoint(HHLA_SHEET_CDC_CONSUMER, upto_seq)
         
-        # Ausgabe Zusammenfassung
         log_info("")
         log_info("="*70)
         log_info("Zusammenfassung:")
-        log_info(f"  ✓ {count_skipped} Schiffe mit vollständigen Daten übersprungen")
-        log_info(f"  ✓ {count_updated} Schiffe aktualisiert")
-        if count_no_changes > 0:
-            log_info(f"  → {count_no_changes} Schiffe ohne neue Daten")
-        
-        # Zeige fehlende Bereiche
-        if missing_ranges:
-            log_warning(f"  ⚠️  {len(missing_ranges)} Bereich(e) nicht in Datenbank gefunden:")
-            for start, end in missing_ranges:
-                if start == end:
-                    log_warning(f"     • Zeile {start}")
-                else:
-                    log_warning(f"     • Zeile {start}-{end}")
-        
+        log_info(f"  ✓ {counts['rows']} Zeilen im Sheet, {counts['checked']} abgeglichen, "
+                 f"{counts['rows'] - counts['checked']} unverändert")
+        log_info(f"  ✓ {counts['to_sheet']} Zeilen im Sheet aktualisiert, {counts['to_db']} in der Datenbank")
+        if counts['conflicts']:
+            log_warning(f"  ⚠️  {counts['conflicts']} Konflikt(e) per Regel entschieden")
+        if duplicates:
+            log_warning(f"  ⚠️  {duplicates} doppelte Namen im Sheet ignoriert")
         log_info("="*70)
-        log_info("")
-        
-        # Führe Batch-Update aus
-        if updates:
-            log_info(f"Führe Batch-Update aus ({len(updates)} Bereiche)...")
-            worksheet.batch_update(updates)
-            log_info(f"✓ Update abgeschlossen: {len(updates)} Zellbereiche aktualisiert")
-        else:
-            log_info("✓ Keine Updates nötig - alle Daten sind aktuell")
+        return counts
         
     except Exception as e:
-        log_error(f"✗ Fehler beim Aktualisieren: {e}")
+        log_error(f"✗ Fehler beim Abgleich: {e}")
         import traceback
         log_error(traceback.format_exc())
+        return None
+
+def update_hhla_sheet_with_data(db: SchiffsDatenbank, full: bool = False,
+                                rules: Optional[Dict[str, str]] = None):
+    """
+    Aktualisiert das Sheet 'Schiffsdaten HHLA' mit Daten aus der Datenbank
+    (bidirektional, siehe sync_hhla_sheet).
+    """
+    return sync_hhla_sheet(db, full=full, rules=rules)
+
+def _as_mirror(worksheet):
+    """Gibt einen WorksheetMirror zurück (bestehenden Mirror oder neu geladen)"""
+    if isinstance(worksheet, sheets_client.WorksheetMirror):
+        return worksheet
+    return sheets_client.WorksheetMirror(worksheet)
 
 def update_single_ship_in_sheet(vessel_name: str, vessel_data: Dict, worksheet):
     """
@@ -1737,55 +4156,49 @@ def update_single_ship_in_sheet(vessel_name: str, vessel_data: Dict, worksheet):
     Args:
         vessel_name: Name des Schiffs
         vessel_data: Dictionary mit Schiffsdaten
-        worksheet: Google Sheets Worksheet-Objekt
+        worksheet: WorksheetMirror (Zeilensuche lokal) oder Google Sheets Worksheet-Objekt
     """
     try:
-        # Finde die Zeile mit diesem Schiffsnamen
-        all_values = worksheet.get_all_values()
-        
-        for row_idx, row in enumerate(all_values[1:], start=2):  # Überspringe Header
-            if not row or not row[0].strip():
-                continue
-            
-            if row[0].strip() == vessel_name:
-                # Gefunden! Aktualisiere diese Zeile
-                # Erweitere Row auf 9 Spalten falls nötig
-                while len(row) < 9:
-                    row.append('')
-                
-                # Hole existierende Werte
-                existing_link = row[8].strip() if len(row) > 8 else ''
-                
-                # Bereite Update-Daten vor (nur wenn leer)
-                # Spalte B (Typ) wird NICHT geschrieben
-                mmsi = vessel_data.get('mmsi_nummer', '')
-                imo = vessel_data.get('imo_nummer', '')
-                baujahr = vessel_data.get('baujahr', '')
-                laenge = vessel_data.get('laenge', '')
-                breite = vessel_data.get('breite', '')
-                vf_link = vessel_data.get('vesselfinder_link', '')
-                
-                # Schreibe Daten (Spalten C-G, ohne B/Typ)
-                update_data = [
-                    str(mmsi) if mmsi else '',
-                    str(imo) if imo else '',
-                    str(baujahr) if baujahr else '',
-                    str(laenge) if laenge else '',
-                    str(breite) if breite else ''
-                ]
-                
-                # Update Spalten C-G (ohne B) - neue API: values first, dann range_name
-                worksheet.update(values=[update_data], range_name=f'C{row_idx}:G{row_idx}')
-                
-                # Update Spalte I (Link) nur wenn leer
-                if not existing_link and vf_link:
-                    worksheet.update(values=[[str(vf_link)]], range_name=f'I{row_idx}')
-                
-                log_info(f"    ✓ Sheet aktualisiert: Zeile {row_idx}")
-                return True
-        
-        log_warning(f"    ⚠️  Schiff nicht im Sheet gefunden: {vessel_name}")
-        return False
+        # Finde die Zeile mit diesem Schiffsnamen (lokaler Index, kein API-Aufruf)
+        mirror = _as_mirror(worksheet)
+        row_idx = mirror.find_row(vessel_name)
+        
+        if row_idx is None:
+            log_warning(f"    ⚠️  Schiff nicht im Sheet gefunden: {vessel_name}")
+            return False
+        
+        row = mirror.get_row(vessel_name)
+        
+        # Hole existierende Werte
+        existing_link = row[8].strip()
+        
+        # Bereite Update-Daten vor (nur wenn leer)
+        # Spalte B (Typ) wird NICHT geschrieben
+        mmsi = vessel_data.get('mmsi_nummer', '')
+        imo = vessel_data.get('imo_nummer', '')
+        baujahr = vessel_data.get('baujahr', '')
+        laenge = vessel_data.get('laenge', '')
+        breite = vessel_data.get('breite', '')
+        vf_link = vessel_data.get('vesselfinder_link', '')
+        
+        # Schreibe Daten (Spalten C-G, ohne B/Typ)
+        update_data = [
+            str(mmsi) if mmsi else '',
+            str(imo) if imo else '',
+            str(baujahr) if baujahr else '',
+            str(laenge) if laenge else '',
+            str(breite) if breite else ''
+        ]
+        
+        # Update Spalten C-G (ohne B)
+        mirror.update_row(row_idx, 3, update_data)
+        
+        # Update Spalte I (Link) nur wenn leer
+        if not existing_link and vf_link:
+            mirror.update_row(row_idx, 9, [str(vf_link)])
+        
+        log_info(f"    ✓ Sheet aktualisiert: Zeile {row_idx}")
+        return True
         
     except Exception as e:
         log_error(f"    ✗ Fehler beim Sheet-Update: {e}")
@@ -1799,73 +4212,64 @@ def mark_vessel_as_no_data(vessel_name: str, worksheet):
     
     Args:
         vessel_name: Name des Schiffs
-        worksheet: Google Sheets Worksheet-Objekt
+        worksheet: WorksheetMirror (Zeilensuche lokal) oder Google Sheets Worksheet-Objekt
     """
     try:
-        # Finde die Zeile mit diesem Schiffsnamen
-        all_values = worksheet.get_all_values()
-        
-        for row_idx, row in enumerate(all_values[1:], start=2):
-            if not row or not row[0].strip():
-                continue
-            
-            if row[0].strip() == vessel_name:
-                # Erweitere Row auf 9 Spalten falls nötig
-                while len(row) < 9:
-                    row.append('')
-                
-                # Prüfe aktuellen Wert in Spalte C
-                current_value = row[2].strip() if len(row) > 2 else ''
-                
-                # Wenn bereits "Keine Daten" → schreibe "Keine Daten 2"
-                if current_value == "Keine Daten":
-                    worksheet.update(values=[["Keine Daten 2"]], range_name=f'C{row_idx}')
-                    log_info(f"    ✓ 'Keine Daten 2' in Spalte C geschrieben (Zeile {row_idx})")
-                # Wenn leer oder etwas anderes → schreibe "Keine Daten"
-                else:
-                    worksheet.update(values=[["Keine Daten"]], range_name=f'C{row_idx}')
-                    log_info(f"    ✓ 'Keine Daten' in Spalte C geschrieben (Zeile {row_idx})")
-                return True
-        
-        return False
+        # Finde die Zeile mit diesem Schiffsnamen (lokaler Index, kein API-Aufruf)
+        mirror = _as_mirror(worksheet)
+        row_idx = mirror.find_row(vessel_name)
+        if row_idx is None:
+            return False
+        
+        # Prüfe aktuellen Wert in Spalte C
+        current_value = mirror.get_row(vessel_name)[2].strip()
+        
+        # Wenn bereits "Keine Daten" → schreibe "Keine Daten 2"
+        if current_value == "Keine Daten":
+            mirror.update_row(row_idx, 3, ["Keine Daten 2"])
+            log_info(f"    ✓ 'Keine Daten 2' in Spalte C geschrieben (Zeile {row_idx})")
+        # Wenn leer oder etwas anderes → schreibe "Keine Daten"
+        else:
+            mirror.update_row(row_idx, 3, ["Keine Daten"])
+            log_info(f"    ✓ 'Keine Daten' in Spalte C geschrieben (Zeile {row_idx})")
+        return True
         
     except Exception as e:
         log_error(f"    ✗ Fehler beim Markieren: {e}")
         return False
 
-def get_vessels_without_data_from_sheet(gs_connector):
+def get_vessels_without_data_from_sheet(gs_connector, mirror=None):
     """
     Holt AKTUELL alle Schiffe aus dem Sheet, die noch Daten brauchen
     
+    Mit einem WorksheetMirror wird lokal gesucht; der Mirror gleicht sich
+    dabei höchstens alle MIRROR_REFRESH_SECONDS per Delta-Lesezugriff ab.
+    
     Args:
         gs_connector: GoogleSheetsConnector-Instanz
+        mirror: Optionaler WorksheetMirror von 'Schiffsdaten HHLA'
         
     Returns:
         Liste von Schiffsnamen ohne Daten
     """
     try:
-        worksheet = gs_connector.sh.worksheet("Schiffsdaten HHLA")
-        all_data = worksheet.get_all_values()
-        
-        if len(all_data) < 2:
-            return []
+        if mirror is None:
+            mirror = _as_mirror(gs_connector.worksheet("Schiffsdaten HHLA"))
+        else:
+            mirror.refresh()
         
         vessels_without_data = []
         
-        for row_idx, row in enumerate(all_data[1:], start=2):
-            if not row or not row[0].strip():
+        for row_idx, row in mirror.data_rows():
+            if not row[0].strip():
                 continue
             
             vessel_name = row[0].strip()
             
-            # Erweitere Row auf 9 Spalten falls nötig
-            while len(row) < 9:
-                row.append('')
-            
             # Prüfe ob wichtige Daten fehlen
-            has_mmsi = row[2].strip() if len(row) > 2 else ''
-            has_imo = row[3].strip() if len(row) > 3 else ''
-            has_laenge = row[5].strip() if len(row) > 5 else ''
+            has_mmsi = row[2].strip()
+            has_imo = row[3].strip()
+            has_laenge = row[5].strip()
             
             # Wenn "Keine Daten" oder "Keine Daten 2" → nicht nochmal versuchen
             if has_mmsi == "Keine Daten" or has_mmsi == "Keine Daten 2":
@@ -1881,114 +4285,17 @@ def get_vessels_without_data_from_sheet(gs_connector):
         log_error(f"Fehler beim Lesen der Schiffe ohne Daten: {e}")
         return []
 
-def sync_database_with_sheet(db: SchiffsDatenbank):
+def sync_database_with_sheet(db: SchiffsDatenbank, rules: Optional[Dict[str, str]] = None):
     """
     Synchronisiert die Datenbank mit dem Google Sheet.
-    Importiert manuell eingetragene Daten aus dem Sheet in die Datenbank.
+    Übernimmt manuell eingetragene Daten aus dem Sheet in die Datenbank
+    (bidirektional, siehe sync_hhla_sheet).
     """
     if not SHEETS_AVAILABLE:
         return
     
     log_info("🔄 Synchronisiere Datenbank mit Google Sheet...")
-    
-    try:
-        gs = GoogleSheetsConnector(SERVICE_ACCOUNT_FILE, SPREADSHEET_URL)
-        gs.connect()
-        
-        worksheet = gs.sh.worksheet("Schiffsdaten HHLA")
-        all_data = worksheet.get_all_values()
-        
-        if len(all_data) < 2:
-            log_info("  → Keine Daten im Sheet")
-            return
-        
-        db.connect()
-        imported_count = 0
-        updated_count = 0
-        
-        for row_idx, row in enumerate(all_data[1:], start=2):
-            if not row or not row[0].strip():
-                continue
-            
-            vessel_name = row[0].strip()
-            
-            # Erweitere auf 9 Spalten
-            while len(row) < 9:
-                row.append('')
-            
-            # Lese Daten aus Sheet (ohne Spalte B/Typ)
-            mmsi = row[2].strip() if len(row) > 2 else ''
-            imo = row[3].strip() if len(row) > 3 else ''
-            baujahr_str = row[4].strip() if len(row) > 4 else ''
-            laenge_str = row[5].strip() if len(row) > 5 else ''
-            breite_str = row[6].strip() if len(row) > 6 else ''
-            link = row[8].strip() if len(row) > 8 else ''
-            
-            # Überspringe "Keine Daten" Einträge
-            if mmsi == "Keine Daten":
-                continue
-            
-            # Prüfe ob Sheet überhaupt irgendwelche Daten hat
-            if not any([mmsi, imo, laenge_str, breite_str, baujahr_str, link]):
-                continue  # Komplett leer, überspringe
-            
-            # Konvertiere zu Zahlen
-            try:
-                baujahr = int(baujahr_str) if baujahr_str else None
-            except:
-                baujahr = None
-            
-            try:
-                laenge = float(laenge_str) if laenge_str else None
-            except:
-                laenge = None
-            
-            try:
-                breite = float(breite_str) if breite_str else None
-            except:
-                breite = None
-            
-            # Prüfe ob Schiff in DB existiert
-            db.cursor.execute("SELECT id, mmsi_nummer, imo_nummer FROM schiffe WHERE name = ?", (vessel_name,))
-            result = db.cursor.fetchone()
-            
-            if result:
-                # Update wenn Sheet neuere Daten hat
-                ship_id, db_mmsi, db_imo = result
-                if not db_mmsi or not db_imo:
-                    db.add_ship(
-                        name=vessel_name,
-                        mmsi_nummer=mmsi,
-                        imo_nummer=imo,
-                        baujahr=baujahr,
-                        laenge=laenge,
-                        breite=breite,
-                        vesselfinder_link=link
-                    )
-                    updated_count += 1
-            else:
-                # Neu in DB einfügen
-                db.add_ship(
-                    name=vessel_name,
-                    mmsi_nummer=mmsi,
-                    imo_nummer=imo,
-                    baujahr=baujahr,
-                    laenge=laenge,
-                    breite=breite,
-                    vesselfinder_link=link
-                )
-                imported_count += 1
-        
-        db.conn.commit()
-        db.disconnect()
-        
-        if imported_count > 0 or updated_count > 0:
-            log_info(f"  ✓ {imported_count} neue Schiffe importiert, {updated_count} aktualisiert")
-        else:
-            log_info(f"  ✓ Datenbank ist aktuell")
-        
-    except Exception as e:
-        log_error(f"  ✗ Fehler beim Sync: {e}")
+    return sync_hhla_sheet(db, rules=rules)
 
 def sync_schiffsdaten(db: SchiffsDatenbank):
     """
@@ -1998,6 +4305,14 @@ def sync_schiffsdaten(db: SchiffsDatenbank):
     - Fügt neue Schiffe alphabetisch sortiert hinzu
     - Schreibt Schiffstyp aus Segelliste Spalte N in Schiffsdaten HHLA Spalte B
     - Entfernt Duplikate
+    
+    Zusammengeführt wird lokal, geschrieben mit einem spreadsheets.batchUpdate:
+    Typ-Updates (Spalte B), Löschen der Duplikat-Zeilen, neue Schiffe unter
+    den Daten und ein sortRange nach Spalte A. Die Zeilen werden dabei vom
+    Sheet selbst verschoben, Spalten rechts von I (z.B. K = Bild-URL, die
+    Schiffsbilder parallel schreibt) werden nie aus dem gelesenen Stand
+    zurückgeschrieben. "Keine Daten"-Schiffe werden danach erneut gesucht
+    und gebündelt per BatchWriter aktualisiert.
     """
     if not SHEETS_AVAILABLE:
         log_error("✗ Google Sheets-Bibliotheken nicht verfügbar")
@@ -2006,259 +4321,189 @@ def sync_schiffsdaten(db: SchiffsDatenbank):
     log_header("Synchronisiere Schiffsdaten: Segelliste → Schiffsdaten HHLA")
     
     try:
+        calls_before = sheets_client.metrics.total_calls()
         gs = GoogleSheetsConnector(SERVICE_ACCOUNT_FILE, SPREADSHEET_URL)
-        gs.connect()
-        
-        # Lese Segelliste
-        segelliste_ws = gs.sh.worksheet("Segelliste")
-        segelliste_data = segelliste_ws.get_all_values()
-        
-        if len(segelliste_data) < 2:
-            log_warning("  ⚠️  Keine Daten in Segelliste gefunden")
-            return
-        
-        # Map für Schiffsname -> Schiffstyp aus Segelliste (Spalte E=Index 4, Spalte N=Index 13)
-        segelliste_map = {}
-        for i in range(1, len(segelliste_data)):  # Header überspringen
-            if len(segelliste_data[i]) > 13:
-                ship_name = segelliste_data[i][4].strip() if len(segelliste_data[i]) > 4 else ''
-                ship_type = segelliste_data[i][13].strip() if len(segelliste_data[i]) > 13 else ''
-                if ship_name:
-                    name_upper = ship_name.upper()
-                    if name_upper not in segelliste_map or not segelliste_map[name_upper]:
-                        segelliste_map[name_upper] = ship_type
         
-        log_info(f"  ✓ {len(segelliste_map)} Schiffe in Segelliste gefunden")
-        
-        # Lese Schiffsdaten HHLA
+        # Blätter sicherstellen (Handles aus dem Cache, noch kein Lesezugriff)
+        gs.worksheet("Segelliste")
         try:
-            hhla_ws = gs.sh.worksheet("Schiffsdaten HHLA")
+            hhla_ws = gs.worksheet("Schiffsdaten HHLA")
         except gspread.WorksheetNotFound:
             # Erstelle neues Blatt
-            hhla_ws = gs.sh.add_worksheet(title="Schiffsdaten HHLA", rows="1000", cols="9")
+            hhla_ws = gs.worksheet("Schiffsdaten HHLA", create=True, cols=9)
             headers = [['Schiffsname', 'Schiffstyp', 'MMSI-Nummer', 'IMO-Nummer', 
                        'Baujahr', 'Länge (m)', 'Breite (m)', '', 'VesselFinder-Link']]
             hhla_ws.update('A1:I1', headers)
             hhla_ws.format('A1:I1', {'textFormat': {'bold': True}})
             log_info("  ✓ Neues Blatt 'Schiffsdaten HHLA' erstellt")
         
-        hhla_data = hhla_ws.get_all_values()
+        # Ein batchGet für beide Blätter: aus der Segelliste nur Spalte E (Name)
+        # und N (Typ) ab Zeile 2, aus Schiffsdaten HHLA nur A–I (Rohtext)
+        hhla_columns = [sheets_client.column_letter(c) for c in range(1, 10)]
+        columns = gs.read_columns([
+            ("Segelliste", "E N", 2),
+            ("Schiffsdaten HHLA", {c: None for c in hhla_columns}, 1),
+        ])
+        segelliste_cols = columns.get("Segelliste", {})
+        segelliste_names = segelliste_cols.get("E", [])
+        
+        if not any(segelliste_names):
+            log_warning("  ⚠️  Keine Daten in Segelliste gefunden")
+            return
+        
+        # Map für Schiffsname -> Schiffstyp aus Segelliste (Spalte E, Spalte N)
+        segelliste_map = {}
+        for ship_name, ship_type in zip(segelliste_names, segelliste_cols.get("N", [])):
+            if ship_name:
+                name_upper = ship_name.upper()
+                if name_upper not in segelliste_map or not segelliste_map[name_upper]:
+                    segelliste_map[name_upper] = ship_type
+        
+        log_info(f"  ✓ {len(segelliste_map)} Schiffe in Segelliste gefunden")
+        
+        hhla_cols = columns.get("Schiffsdaten HHLA", {})
+        hhla_data = [list(row) for row in zip(*(hhla_cols.get(c, []) for c in hhla_columns))]
         
-        # Map für vorhandene Schiffe
+        # Vorhandene Schiffe: Name → Zeilenindex (0-basiert, erstes Vorkommen gewinnt);
+        # weitere Vorkommen werden als Zeilen gelöscht
         existing_ships = {}
         duplicate_rows = []
-        
         for i in range(1, len(hhla_data)):  # Header überspringen
-            if len(hhla_data[i]) > 0 and hhla_data[i][0].strip():
-                name_upper = hhla_data[i][0].strip().upper()
-                if name_upper in existing_ships:
-                    duplicate_rows.append(i + 1)  # 1-basierte Zeilennummer
-                    log_info(f"  ⚠️  Duplikat gefunden: {name_upper} in Zeile {i + 1}")
-                else:
-                    # Erweitere auf 9 Spalten
-                    row_data = hhla_data[i] + [''] * (9 - len(hhla_data[i]))
-                    existing_ships[name_upper] = {
-                        'data': row_data[:9],
-                        'row': i + 1
-                    }
-        
-        # Lösche Duplikate (von hinten nach vorne)
-        if duplicate_rows:
-            duplicate_rows.sort(reverse=True)
-            for row_num in duplicate_rows:
-                hhla_ws.delete_rows(row_num)
-            log_info(f"  ✓ {len(duplicate_rows)} Duplikate gelöscht")
-            # Daten neu lesen
-            hhla_data = hhla_ws.get_all_values()
-            existing_ships = {}
-            for i in range(1, len(hhla_data)):
-                if len(hhla_data[i]) > 0 and hhla_data[i][0].strip():
-                    name_upper = hhla_data[i][0].strip().upper()
-                    row_data = hhla_data[i] + [''] * (9 - len(hhla_data[i]))
-                    existing_ships[name_upper] = {
-                        'data': row_data[:9],
-                        'row': i + 1
-                    }
+            name_upper = hhla_data[i][0].strip().upper()
+            if not name_upper:
+                continue
+            if name_upper in existing_ships:
+                duplicate_rows.append(i)
+                log_info(f"  ⚠️  Duplikat gefunden: {name_upper} in Zeile {i + 1}")
+                continue
+            existing_ships[name_upper] = i
         
         log_info(f"  ✓ {len(existing_ships)} Schiffe in Schiffsdaten HHLA gefunden")
         
-        # Finde neue Schiffe und Updates
+        # Ein spreadsheets.batchUpdate mit Zell- und Struktur-Requests. Die Indizes
+        # beziehen sich auf den gelesenen Stand; Typ-Updates stehen deshalb vor
+        # dem Löschen, die Duplikate werden von unten nach oben gelöscht.
+        sheet_id = hhla_ws.id
+        requests = []
+        update_count = 0
         new_ships = []
-        updates = []
-        
         for name_upper, ship_type in segelliste_map.items():
-            if name_upper in existing_ships:
-                # Prüfe ob Schiffstyp aktualisiert werden muss
-                current_type = existing_ships[name_upper]['data'][1].strip() if len(existing_ships[name_upper]['data']) > 1 else ''
-                if ship_type and ship_type != current_type:
-                    updates.append({
-                        'name': name_upper,
-                        'type': ship_type,
-                        'row': existing_ships[name_upper]['row']
-                    })
-            else:
-                # Neues Schiff
-                new_ships.append({
-                    'name': name_upper,
-                    'type': ship_type
-                })
+            row_index = existing_ships.get(name_upper)
+            if row_index is None:
+                # Neues Schiff: A = Name, B = Typ
+                new_ships.append([name_upper, ship_type])
+            elif ship_type and ship_type != hhla_data[row_index][1].strip():
+                requests.append({'updateCells': {
+                    'start': {'sheetId': sheet_id, 'rowIndex': row_index, 'columnIndex': 1},
+                    'rows': [sheets_client.string_cells([ship_type])],
+                    'fields': 'userEnteredValue',
+                }})
+                update_count += 1
+        
+        for row_index in sorted(duplicate_rows, reverse=True):
+            requests.append({'deleteDimension': {'range': {
+                'sheetId': sheet_id, 'dimension': 'ROWS',
+                'startIndex': row_index, 'endIndex': row_index + 1,
+            }}})
         
         log_info(f"  ✓ {len(new_ships)} neue Schiffe gefunden")
-        log_info(f"  ✓ {len(updates)} Schiffstyp-Updates gefunden")
-        
-        # Erstelle sortierte Liste aller Schiffe
-        all_ships = []
-        added_names = set()
-        
-        # Bestehende Schiffe
-        for name_upper, ship_info in existing_ships.items():
-            if name_upper not in added_names:
-                all_ships.append({
-                    'name': name_upper,
-                    'data': ship_info['data'],
-                    'row': ship_info['row']
-                })
-                added_names.add(name_upper)
-        
-        # Neue Schiffe
-        for new_ship in new_ships:
-            if new_ship['name'] not in added_names:
-                all_ships.append({
-                    'name': new_ship['name'],
-                    'data': [
-                        new_ship['name'],  # A: Schiffsname
-                        new_ship['type'],  # B: Schiffstyp
-                        '',  # C: MMSI-Nummer
-                        '',  # D: IMO-Nummer
-                        '',  # E: Baujahr
-                        '',  # F: Länge (m)
-                        '',  # G: Breite (m)
-                        '',  # H: (leer)
-                        ''   # I: VesselFinder-Link
-                    ],
-                    'row': None
-                })
-                added_names.add(new_ship['name'])
-        
-        # Alphabetisch sortieren
-        all_ships.sort(key=lambda x: x['name'])
-        
-        # Updates anwenden
-        updates_map = {u['name']: u['type'] for u in updates}
-        for ship in all_ships:
-            if ship['name'] in updates_map:
-                ship['data'][1] = updates_map[ship['name']]
-        
-        # Neue Zeilen einfügen (von hinten nach vorne)
-        insert_positions = []
-        for i, ship in enumerate(all_ships):
-            if ship['row'] is None:
-                insert_positions.append(i + 2)  # Zielzeile (1-basiert, +1 für Header)
-        
-        if insert_positions:
-            insert_positions.sort(reverse=True)
-            for pos in insert_positions:
-                hhla_ws.insert_row([''] * 9, pos)
-            log_info(f"  ✓ {len(insert_positions)} neue Zeilen eingefügt")
-        
-        # Schreibe alle Daten auf einmal
-        sorted_data = [ship['data'] for ship in all_ships]
-        if sorted_data:
-            last_row = len(hhla_data)
-            if last_row > 1:
-                # Lösche alte Daten (nur Inhalt)
-                hhla_ws.batch_clear([f'A2:I{last_row}'])
-            
-            # Schreibe neue Daten
-            hhla_ws.update(f'A2:I{len(sorted_data) + 1}', sorted_data)
-            log_info(f"  ✓ {len(sorted_data)} Schiffe (alphabetisch sortiert) geschrieben")
-            
-            # Lösche überflüssige Zeilen
-            new_last_row = len(sorted_data) + 1
-            if last_row > new_last_row:
-                hhla_ws.delete_rows(new_last_row + 1, last_row - new_last_row)
+        log_info(f"  ✓ {update_count} Schiffstyp-Updates gefunden")
+        if duplicate_rows:
+            log_info(f"  ✓ {len(duplicate_rows)} Duplikate werden entfernt")
+        
+        # Neue Schiffe unter die letzte Datenzeile, danach sortiert das Sheet selbst
+        # (ganze Zeilen, also auch K und alles rechts davon bleibt beim Schiff)
+        data_end = len(hhla_data) - len(duplicate_rows)
+        if new_ships:
+            missing = data_end + len(new_ships) - (hhla_ws.row_count - len(duplicate_rows))
+            if missing > 0:
+                requests.append({'appendDimension': {
+                    'sheetId': sheet_id, 'dimension': 'ROWS', 'length': missing,
+                }})
+            requests.append({'updateCells': {
+                'start': {'sheetId': sheet_id, 'rowIndex': data_end, 'columnIndex': 0},
+                'rows': [sheets_client.string_cells(row) for row in new_ships],
+                'fields': 'userEnteredValue',
+            }})
+        
+        # Sortieren nur, wenn nötig (leere Namen gehören wie beim sortRange ans Ende)
+        dropped = set(duplicate_rows)
+        names = [row[0].strip() for i, row in enumerate(hhla_data[1:], 1) if i not in dropped]
+        while names and not names[-1]:
+            names.pop()
+        is_sorted = all(a and b and a.casefold() <= b.casefold() for a, b in zip(names, names[1:]))
+        if new_ships or not is_sorted:
+            requests.append({'sortRange': {
+                'range': {
+                    'sheetId': sheet_id,
+                    'startRowIndex': 1, 'endRowIndex': data_end + len(new_ships),
+                    'startColumnIndex': 0, 'endColumnIndex': hhla_ws.col_count,
+                },
+                'sortSpecs': [{'dimensionIndex': 0, 'sortOrder': 'ASCENDING'}],
+            }})
+        
+        if requests:
+            sheets_client.spreadsheet_batch_update(gs.sh, requests)
+            log_info(f"  ✓ {len(requests)} Änderungen in einem batchUpdate geschrieben"
+                     f"{' (alphabetisch sortiert)' if new_ships or not is_sorted else ''}")
+        else:
+            log_info("  ✓ Schiffsdaten HHLA bereits aktuell")
+        log_info(f"  ✓ Abgleich mit {sheets_client.metrics.total_calls() - calls_before} Sheets-API-Aufrufen")
         
         # Prüfe Schiffe mit "Keine Daten" in Spalte C und suche sie nochmal
         log_info("  🔍 Prüfe Schiffe mit 'Keine Daten' in Spalte C...")
-        ships_to_research = []
-        
-        for i, ship in enumerate(all_ships):
-            if len(ship['data']) > 2 and ship['data'][2].strip() == "Keine Daten":
-                ships_to_research.append({
-                    'name': ship['name'],
-                    'row': i + 2,  # Zeile im Sheet (1-basiert, +1 für Header)
-                    'data': ship['data']
-                })
+        ships_to_research = [hhla_data[i][0].strip() for i in existing_ships.values()
+                             if hhla_data[i][2].strip() == "Keine Daten"]
         
         if ships_to_research:
             log_info(f"  ✓ {len(ships_to_research)} Schiffe mit 'Keine Daten' gefunden - suche nochmal...")
             
             if SELENIUM_AVAILABLE:
-                scraper = VesselFinderScraper(headless=True, take_screenshots=False)
-                
-                for ship_info in ships_to_research:
-                    vessel_name = ship_info['name']
-                    row_num = ship_info['row']
-                    
-                    log_info(f"    🔍 Suche erneut: {vessel_name} (Zeile {row_num})")
-                    
-                    try:
-                        # Suche Schiff auf VesselFinder
-                        vessel_data = scraper.search_vessel(vessel_name)
-                        
-                        if vessel_data and vessel_data.get('mmsi'):
-                            # Daten gefunden - aktualisiere Sheet
+                # Nach dem Sortieren neu laden (Zeilennummern), Schreibzugriffe gebündelt
+                mirror = sheets_client.WorksheetMirror(hhla_ws)
+                mirror.writer = sheets_client.BatchWriter(sheets_client.gspread_flush(gs.sh))
+                try:
+                    for vessel_name, vessel_data, error in scrape_vessels(ships_to_research,
+                                                                          headless=True, delay=3):
+                        log_info(f"    🔍 Suche erneut: {vessel_name}")
+                        if vessel_data and vessel_data.get('mmsi_nummer'):
                             log_info(f"      ✓ Daten gefunden für {vessel_name}")
-                            
-                            # Aktualisiere die Daten
-                            ship_info['data'][2] = vessel_data.get('mmsi', '')  # C: MMSI
-                            ship_info['data'][3] = vessel_data.get('imo', '')  # D: IMO
-                            ship_info['data'][4] = str(vessel_data.get('baujahr', '')) if vessel_data.get('baujahr') else ''  # E: Baujahr
-                            ship_info['data'][5] = str(vessel_data.get('laenge', '')) if vessel_data.get('laenge') else ''  # F: Länge
-                            ship_info['data'][6] = str(vessel_data.get('breite', '')) if vessel_data.get('breite') else ''  # G: Breite
-                            ship_info['data'][8] = vessel_data.get('link', '')  # I: VesselFinder-Link
-                            
-                            # Schreibe aktualisierte Daten ins Sheet
-                            hhla_ws.update(f'A{row_num}:I{row_num}', [ship_info['data']])
-                            log_info(f"      ✓ Daten für {vessel_name} aktualisiert")
-                            
-                            # Warte zwischen Anfragen
-                            time.sleep(3)
+                            update_single_ship_in_sheet(vessel_name, vessel_data, mirror)
                         else:
-                            # Keine Daten gefunden - schreibe "Keine Daten 2"
-                            log_warning(f"      ✗ Keine Daten gefunden für {vessel_name} - schreibe 'Keine Daten 2'")
-                            ship_info['data'][2] = "Keine Daten 2"
-                            hhla_ws.update(f'C{row_num}', [["Keine Daten 2"]])
-                            log_info(f"      ✓ 'Keine Daten 2' für {vessel_name} geschrieben")
-                            
-                    except Exception as e:
-                        log_error(f"      ✗ Fehler beim Suchen von {vessel_name}: {e}")
-                        # Schreibe "Keine Daten 2" bei Fehler
-                        ship_info['data'][2] = "Keine Daten 2"
-                        hhla_ws.update(f'C{row_num}', [["Keine Daten 2"]])
-                        log_info(f"      ✓ 'Keine Daten 2' für {vessel_name} geschrieben (Fehler)")
-                    
-                    # Warte zwischen Anfragen
-                    time.sleep(3)
-                
-                # Schließe Browser
-                scraper.cleanup()
+                            # Keine Daten gefunden (oder Fehler) - "Keine Daten" → "Keine Daten 2"
+                            if error:
+                                log_error(f"      ✗ Fehler beim Suchen von {vessel_name}: {error}")
+                            else:
+                                log_warning(f"      ✗ Keine Daten gefunden für {vessel_name} - schreibe 'Keine Daten 2'")
+                            mark_vessel_as_no_data(vessel_name, mirror)
+                finally:
+                    mirror.writer.close()
                 log_info(f"  ✓ {len(ships_to_research)} Schiffe erneut durchsucht")
             else:
                 log_warning("  ⚠️  Selenium nicht verfügbar - kann Schiffe nicht erneut suchen")
         else:
             log_info("  ✓ Keine Schiffe mit 'Keine Daten' gefunden")
         
-        log_info("  ✓ Synchronisation abgeschlossen")
+        log_info(f"  ✓ Synchronisation abgeschlossen "
+                 f"({sheets_client.metrics.total_calls() - calls_before} Sheets-API-Aufrufe)")
         
     except Exception as e:
         log_error(f"  ✗ Fehler bei Synchronisation: {e}")
         import traceback
         traceback.print_exc()
 
-def search_keine_daten(db: SchiffsDatenbank):
+def search_keine_daten(db: SchiffsDatenbank, workers: int = 1, headless: bool = True):
     """
     Sucht alle Schiffe mit "Keine Daten" in Spalte C nochmal über VesselFinder.
+    
+    Das Blatt wird einmal in einen WorksheetMirror geladen; Treffer (C–G, I)
+    und "Keine Daten 2" gehen über einen BatchWriter gebündelt ins Sheet
+    (auch bei mehreren Workern unter dem Schreibkontingent).
+    
+    Args:
+        db: Datenbank-Instanz
+        workers: Anzahl paralleler Browser-Worker (siehe VesselFinderPool)
+        headless: Browser unsichtbar starten
     """
     if not SHEETS_AVAILABLE:
         log_error("✗ Google Sheets-Bibliotheken nicht verfügbar")
@@ -2272,37 +4517,25 @@ def search_keine_daten(db: SchiffsDatenbank):
     
     try:
         gs = GoogleSheetsConnector(SERVICE_ACCOUNT_FILE, SPREADSHEET_URL)
-        gs.connect()
         
         # Lese Schiffsdaten HHLA
         try:
-            hhla_ws = gs.sh.worksheet("Schiffsdaten HHLA")
+            hhla_ws = gs.worksheet("Schiffsdaten HHLA")
         except gspread.WorksheetNotFound:
             log_error("✗ Blatt 'Schiffsdaten HHLA' nicht gefunden")
             return
         
-        hhla_data = hhla_ws.get_all_values()
+        # Einmal laden (Zeilensuche lokal), Schreibzugriffe gebündelt per BatchWriter
+        mirror = sheets_client.WorksheetMirror(hhla_ws)
         
-        if len(hhla_data) < 2:
+        if len(mirror.rows) < 2:
             log_warning("  ⚠️  Keine Daten im Sheet gefunden")
             return
         
-        # Finde Schiffe mit "Keine Daten" in Spalte C
-        ships_to_research = []
-        
-        for i in range(1, len(hhla_data)):  # Header überspringen
-            if len(hhla_data[i]) > 2:
-                ship_name = hhla_data[i][0].strip() if len(hhla_data[i]) > 0 else ''
-                mmsi = hhla_data[i][2].strip() if len(hhla_data[i]) > 2 else ''
-                
-                if ship_name and mmsi == "Keine Daten":
-                    # Erweitere auf 9 Spalten
-                    row_data = hhla_data[i] + [''] * (9 - len(hhla_data[i]))
-                    ships_to_research.append({
-                        'name': ship_name,
-                        'row': i + 1,  # Zeile im Sheet (1-basiert)
-                        'data': row_data[:9]
-                    })
+        # Finde Schiffe mit "Keine Daten" in Spalte C (erste Zeile je Name)
+        ships_to_research = [row[0].strip() for row_num, row in mirror.data_rows()
+                             if row[0].strip() and row[2].strip() == "Keine Daten"
+                             and mirror.find_row(row[0]) == row_num]
         
         if not ships_to_research:
             log_info("  ✓ Keine Schiffe mit 'Keine Daten' gefunden")
@@ -2311,59 +4544,30 @@ def search_keine_daten(db: SchiffsDatenbank):
         log_info(f"  ✓ {len(ships_to_research)} Schiffe mit 'Keine Daten' gefunden")
         log_info("  🔍 Suche diese Schiffe nochmal über VesselFinder...")
         
-        scraper = VesselFinderScraper(headless=True, take_screenshots=False)
-        
         found_count = 0
         not_found_count = 0
-        
-        for ship_info in ships_to_research:
-            vessel_name = ship_info['name']
-            row_num = ship_info['row']
-            
-            log_info(f"    🔍 Suche: {vessel_name} (Zeile {row_num})")
-            
-            try:
-                # Suche Schiff auf VesselFinder
-                vessel_data = scraper.search_vessel(vessel_name)
+        mirror.writer = sheets_client.BatchWriter(sheets_client.gspread_flush(gs.sh))
+        try:
+            # Ergebnisse kommen (bei mehreren Workern in beliebiger Reihenfolge) hier an,
+            # geschrieben wird nur aus diesem Prozess
+            for vessel_name, vessel_data, error in scrape_vessels(ships_to_research, workers=workers,
+                                                                  headless=headless, delay=3):
+                log_info(f"    🔍 {vessel_name} (Zeile {mirror.find_row(vessel_name)})")
                 
-                if vessel_data and vessel_data.get('mmsi'):
-                    # Daten gefunden - aktualisiere Sheet
+                if vessel_data and vessel_data.get('mmsi_nummer'):
                     log_info(f"      ✓ Daten gefunden für {vessel_name}")
-                    
-                    # Aktualisiere die Daten
-                    ship_info['data'][2] = vessel_data.get('mmsi', '')  # C: MMSI
-                    ship_info['data'][3] = vessel_data.get('imo', '')  # D: IMO
-                    ship_info['data'][4] = str(vessel_data.get('baujahr', '')) if vessel_data.get('baujahr') else ''  # E: Baujahr
-                    ship_info['data'][5] = str(vessel_data.get('laenge', '')) if vessel_data.get('laenge') else ''  # F: Länge
-                    ship_info['data'][6] = str(vessel_data.get('breite', '')) if vessel_data.get('breite') else ''  # G: Breite
-                    ship_info['data'][8] = vessel_data.get('link', '')  # I: VesselFinder-Link
-                    
-                    # Schreibe aktualisierte Daten ins Sheet
-                    hhla_ws.update(f'A{row_num}:I{row_num}', [ship_info['data']])
-                    log_info(f"      ✓ Daten für {vessel_name} aktualisiert")
+                    update_single_ship_in_sheet(vessel_name, vessel_data, mirror)
                     found_count += 1
-                    
                 else:
-                    # Keine Daten gefunden - schreibe "Keine Daten 2"
-                    log_warning(f"      ✗ Keine Daten gefunden für {vessel_name} - schreibe 'Keine Daten 2'")
-                    ship_info['data'][2] = "Keine Daten 2"
-                    hhla_ws.update(f'C{row_num}', [["Keine Daten 2"]])
-                    log_info(f"      ✓ 'Keine Daten 2' für {vessel_name} geschrieben")
+                    # Keine Daten gefunden (oder Fehler) - "Keine Daten" → "Keine Daten 2"
+                    if error:
+                        log_error(f"      ✗ Fehler beim Suchen von {vessel_name}: {error}")
+                    else:
+                        log_warning(f"      ✗ Keine Daten gefunden für {vessel_name} - schreibe 'Keine Daten 2'")
+                    mark_vessel_as_no_data(vessel_name, mirror)
                     not_found_count += 1
-                    
-            except Exception as e:
-                log_error(f"      ✗ Fehler beim Suchen von {vessel_name}: {e}")
-                # Schreibe "Keine Daten 2" bei Fehler
-                ship_info['data'][2] = "Keine Daten 2"
-                hhla_ws.update(f'C{row_num}', [["Keine Daten 2"]])
-                log_info(f"      ✓ 'Keine Daten 2' für {vessel_name} geschrieben (Fehler)")
-                not_found_count += 1
-            
-            # Warte zwischen Anfragen
-            time.sleep(3)
-        
-        # Schließe Browser
-        scraper.cleanup()
+        finally:
+            mirror.writer.close()
         
         log_info(f"  ✓ Suche abgeschlossen:")
         log_info(f"    → {found_count} Schiffe mit Daten gefunden")
@@ -2374,11 +4578,17 @@ def search_keine_daten(db: SchiffsDatenbank):
         import traceback
         traceback.print_exc()
 
+def _vessel_record(vessel_data: Dict, vessel_name: str) -> Dict:
+    """Baut aus einem Scraper-Ergebnis einen Datensatz für upsert_ships()"""
+    record = {field: vessel_data.get(field) for field in SHIP_FIELDS}
+    record['name'] = vessel_data.get('name') or vessel_name
+    return record
+
 def import_from_vesselfinder(db: SchiffsDatenbank, vessel_names: List[str] = None, 
                               from_sheet: bool = False, delay: float = 5.0,
                               max_consecutive_errors: int = 25, headless: bool = True,
                               max_ships: int = None, skip_ships: int = 0,
-                              live_update: bool = False):
+                              live_update: bool = False, workers: int = 1):
     """
     Importiert Schiffsdaten von shipfinder.com
     
@@ -2392,6 +4602,9 @@ def import_from_vesselfinder(db: SchiffsDatenbank, vessel_names: List[str] = Non
         max_ships: Maximale Anzahl zu verarbeitender Schiffe (None = alle)
         skip_ships: Anzahl der zu überspringenden Schiffe am Anfang (Standard: 0)
         live_update: Wenn True, wird jedes Schiff sofort ins Sheet geschrieben (Standard: False)
+        workers: Anzahl paralleler Browser-Worker (Standard: 1 = ein Browser, nacheinander);
+                 bei mehr als einem Worker gilt statt delay die globale Ratengrenze
+                 (SCRAPER_RATE_PER_MINUTE, siehe VesselFinderPool)
     """
     if not SELENIUM_AVAILABLE:
         log_error("✗ Selenium nicht verfügbar. Installiere mit: pip install selenium webdriver-manager")
@@ -2406,9 +4619,11 @@ def import_from_vesselfinder(db: SchiffsDatenbank, vessel_names: List[str] = Non
         try:
             log_info("Öffne Google Sheet für Live-Updates...")
             gs_conn = GoogleSheetsConnector(SERVICE_ACCOUNT_FILE, SPREADSHEET_URL)
-            gs_conn.connect()
-            gs_worksheet = gs_conn.sh.worksheet("Schiffsdaten HHLA")
-            log_info("  ✓ Sheet bereit für Live-Updates")
+            # Einmal laden, danach Zeilensuche lokal (Name → Zeile)
+            gs_worksheet = sheets_client.WorksheetMirror(gs_conn.worksheet("Schiffsdaten HHLA"))
+            # Schreibzugriffe puffern und gebündelt (values.batchUpdate) schreiben
+            gs_worksheet.writer = sheets_client.BatchWriter(sheets_client.gspread_flush(gs_conn.sh))
+            log_info(f"  ✓ Sheet bereit für Live-Updates ({len(gs_worksheet.index)} Schiffe im Index)")
         except Exception as e:
             log_warning(f"  ⚠️  Konnte Sheet nicht öffnen: {e}")
             log_warning(f"  ⚠️  Live-Updates deaktiviert")
@@ -2424,10 +4639,9 @@ def import_from_vesselfinder(db: SchiffsDatenbank, vessel_names: List[str] = Non
         log_info("Lese Schiffsnamen aus Google Sheet 'Schiffsdaten HHLA'...")
         try:
             gs = GoogleSheetsConnector(SERVICE_ACCOUNT_FILE, SPREADSHEET_URL)
-            gs.connect()
             
             try:
-                worksheet = gs.sh.worksheet("Schiffsdaten HHLA")
+                worksheet = gs.worksheet("Schiffsdaten HHLA")
                 
                 # Lese alle Daten (nicht nur Spalte A)
                 all_data = worksheet.get_all_values()
@@ -2538,67 +4752,192 @@ def import_from_vesselfinder(db: SchiffsDatenbank, vessel_names: List[str] = Non
     consecutive_errors = 0  # Zähler für aufeinanderfolgende Fehler
     successful_ships = []  # Liste der erfolgreichen Schiffe mit Details
     failed_ships = []  # Liste der fehlgeschlagenen Schiffe
+    pending_ships = []  # Gefundene Schiffe, die noch in die DB geschrieben werden
+    
+    def flush_pending_ships():
+        """Schreibt vorgemerkte Schiffe per Bulk-Upsert in die Datenbank"""
+        if pending_ships:
+            db.upsert_ships(pending_ships)
+            pending_ships.clear()
     
     try:
         # Screenshots nur bei Fehlern (deaktiviert für normale Schiffe)
         take_screenshots = False
         log_info(f"Browser-Modus: {'Headless (unsichtbar)' if headless else 'Sichtbar'}")
-        with VesselFinderScraper(headless=headless, take_screenshots=take_screenshots) as scraper:
+        if workers > 1:
+            # Parallele Browser-Worker; geschrieben wird nur aus diesem Prozess
+            live = bool(live_update and gs_worksheet and from_sheet)
+            processed_in_this_run = set()
+            with VesselFinderPool(workers, headless=headless, attempts=3 if live else 1) as pool:
+                batch = vessel_names
+                while batch:
+                    log_info(f"🔀 Verteile {len(batch)} Schiffe auf {pool.workers} Browser-Worker")
+                    for vessel_name, vessel_data, error in pool.map(batch):
+                        processed_in_this_run.add(vessel_name)
+                        log_info(f"[{len(processed_in_this_run)}] {vessel_name}")
+                        
+                        if vessel_data:
+                            pending_ships.append(_vessel_record(vessel_data, vessel_name))
+                            if len(pending_ships) >= VESSELFINDER_DB_BATCH:
+                                flush_pending_ships()
+                            success_count += 1
+                            consecutive_errors = 0
+                            successful_ships.append({
+                                'name': vessel_name,
+                                'imo': vessel_data.get('imo_nummer', ''),
+                                'mmsi': vessel_data.get('mmsi_nummer', ''),
+                                'laenge': vessel_data.get('laenge', ''),
+                                'breite': vessel_data.get('breite', '')
+                            })
+                            log_info(f"    ✓ Daten gefunden: IMO {vessel_data.get('imo_nummer') or '-'}, "
+                                     f"Länge {vessel_data.get('laenge') or '-'}m")
+                            if gs_worksheet:
+                                update_single_ship_in_sheet(vessel_name, vessel_data, gs_worksheet)
+                        else:
+                            error_count += 1
+                            consecutive_errors += 1
+                            failed_ships.append(vessel_name)
+                            log_warning(f"    ⚠️  Keine Daten{f' ({error})' if error else ''} – "
+                                        f"aufeinanderfolgende Fehler: {consecutive_errors}/{max_consecutive_errors}")
+                            if live:
+                                mark_vessel_as_no_data(vessel_name, gs_worksheet)
+                            if consecutive_errors >= max_consecutive_errors:
+                                log_error(f"\n⚠️  ABBRUCH: {max_consecutive_errors} Schiffe hintereinander nicht gefunden!")
+                                pool.stop()
+                                break
+                    
+                    if not live or consecutive_errors >= max_consecutive_errors:
+                        break
+                    # Live-Modus: danach erneut prüfen, welche Schiffe inzwischen Daten brauchen
+                    batch = [v for v in get_vessels_without_data_from_sheet(gs_conn, gs_worksheet)
+                             if v not in processed_in_this_run]
+                if live and consecutive_errors < max_consecutive_errors:
+                    log_info("\n✅ Alle Schiffe haben Daten! Fertig.")
+        else:
+            with VesselFinderScraper(headless=headless, take_screenshots=take_screenshots) as scraper:
             
-            # Bei live_update: Endlos-Schleife, prüft immer welche Schiffe noch fehlen
-            if live_update and gs_worksheet and from_sheet:
-                log_info("🔄 Live-Modus: Prüfe kontinuierlich welche Schiffe Daten brauchen")
-                log_info("   Strg+C zum Beenden\n")
+                # Bei live_update: Endlos-Schleife, prüft immer welche Schiffe noch fehlen
+                if live_update and gs_worksheet and from_sheet:
+                    log_info("🔄 Live-Modus: Prüfe kontinuierlich welche Schiffe Daten brauchen")
+                    log_info("   Strg+C zum Beenden\n")
                 
-                processed_in_this_run = set()  # Schiffe die in diesem Durchlauf verarbeitet wurden
-                total_processed = 0
+                    processed_in_this_run = set()  # Schiffe die in diesem Durchlauf verarbeitet wurden
+                    total_processed = 0
                 
-                while True:
-                    # Hole AKTUELL die Schiffe ohne Daten aus dem Sheet
-                    current_vessels_without_data = get_vessels_without_data_from_sheet(gs_conn)
+                    while True:
+                        # Hole AKTUELL die Schiffe ohne Daten aus dem Sheet
+                        current_vessels_without_data = get_vessels_without_data_from_sheet(gs_conn, gs_worksheet)
                     
-                    # Filtere: Nur Schiffe die noch nicht in diesem Durchlauf verarbeitet wurden
-                    vessels_to_process = [v for v in current_vessels_without_data if v not in processed_in_this_run]
+                        # Filtere: Nur Schiffe die noch nicht in diesem Durchlauf verarbeitet wurden
+                        vessels_to_process = [v for v in current_vessels_without_data if v not in processed_in_this_run]
                     
-                    if not vessels_to_process:
-                        log_info("\n✅ Alle Schiffe haben Daten! Fertig.")
-                        break
+                        if not vessels_to_process:
+                            log_info("\n✅ Alle Schiffe haben Daten! Fertig.")
+                            break
                     
-                    # Nimm das erste Schiff
-                    vessel_name = vessels_to_process[0]
-                    total_processed += 1
+                        # Nimm das erste Schiff
+                        vessel_name = vessels_to_process[0]
+                        total_processed += 1
                     
-                    log_info(f"[{total_processed}] {vessel_name} ({len(vessels_to_process)} noch ohne Daten)")
+                        log_info(f"[{total_processed}] {vessel_name} ({len(vessels_to_process)} noch ohne Daten)")
                     
-                    # 3 Versuche pro Schiff
-                    vessel_data = None
-                    has_important_data = False
+                        # 3 Versuche pro Schiff
+                        vessel_data = None
+                        has_important_data = False
+                    
+                        for attempt in range(1, 4):  # 3 Versuche
+                            try:
+                                # Hole Daten von VesselFinder
+                                vessel_data = scraper.search_vessel(vessel_name)
+                            
+                                # Prüfe ob WICHTIGE Daten vorhanden sind (IMO oder Länge)
+                                if vessel_data and (vessel_data.get('imo_nummer') or vessel_data.get('laenge')):
+                                    has_important_data = True
+                                
+                                    # Erfolgreich! Für Bulk-Upsert in die Datenbank vormerken
+                                    pending_ships.append(_vessel_record(vessel_data, vessel_name))
+                                    if len(pending_ships) >= VESSELFINDER_DB_BATCH:
+                                        flush_pending_ships()
+                                    success_count += 1
+                                    consecutive_errors = 0
+                                    processed_in_this_run.add(vessel_name)
+                                
+                                    # Speichere Details für Zusammenfassung
+                                    ship_details = {
+                                        'name': vessel_name,
+                                        'imo': vessel_data.get('imo_nummer', ''),
+                                        'mmsi': vessel_data.get('mmsi_nummer', ''),
+                                        'laenge': vessel_data.get('laenge', ''),
+                                        'breite': vessel_data.get('breite', '')
+                                    }
+                                    successful_ships.append(ship_details)
+                                
+                                    # Zeige gefundene Daten besser formatiert
+                                    log_info(f"    ✓ Daten gefunden:")
+                                    if ship_details['imo']:
+                                        log_info(f"        ✓ IMO: {ship_details['imo']}")
+                                    if ship_details['mmsi']:
+                                        log_info(f"        ✓ MMSI: {ship_details['mmsi']}")
+                                    if ship_details['laenge']:
+                                        log_info(f"        ✓ Länge: {ship_details['laenge']}m")
+                                    if ship_details['breite']:
+                                        log_info(f"        ✓ Breite: {ship_details['breite']}m")
+                                
+                                    # Schreibe sofort ins Sheet
+                                    log_info(f"    → Schreibe ins Google Sheet...")
+                                    update_single_ship_in_sheet(vessel_name, vessel_data, gs_worksheet)
+                                    break  # Erfolgreich, keine weiteren Versuche nötig
+                                else:
+                                    # Keine wichtigen Daten gefunden
+                                    log_warning(f"    ⚠️  Keine Daten {attempt}")
+                                    vessel_data = None  # Reset für nächsten Versuch
+                                
+                                    # Warte vor nächstem Versuch (außer beim letzten)
+                                    if attempt < 3:
+                                        time.sleep(2)
+                        
+                            except Exception as e:
+                                log_warning(f"    ⚠️  Fehler bei Versuch {attempt}: {e}")
+                                if attempt < 3:
+                                    time.sleep(2)
+                    
+                        # Nach 3 Versuchen ohne wichtige Daten
+                        if not has_important_data:
+                            error_count += 1
+                            consecutive_errors += 1
+                            processed_in_this_run.add(vessel_name)  # Als verarbeitet markieren
+                            failed_ships.append(vessel_name)
+                            log_error(f"    ✗ Schiff nach 3 Versuchen übersprungen")
+                        
+                            # Schreibe "Keine Daten" in Spalte C
+                            log_info(f"    → Schreibe 'Keine Daten' in Spalte C...")
+                            mark_vessel_as_no_data(vessel_name, gs_worksheet)
+                        
+                            # Prüfe Abbruchbedingung
+                            if consecutive_errors >= max_consecutive_errors:
+                                log_error(f"\n⚠️  ABBRUCH: {max_consecutive_errors} Schiffe hintereinander nicht gefunden!")
+                                break
+                    
+                        # Wartezeit zwischen Schiffen
+                        time.sleep(delay)
+                
+                else:
+                    # Normale Verarbeitung ohne live_update
+                    for i, vessel_name in enumerate(vessel_names, 1):
+                        log_info(f"[{i}/{len(vessel_names)}] {vessel_name}")
                     
-                    for attempt in range(1, 4):  # 3 Versuche
                         try:
                             # Hole Daten von VesselFinder
                             vessel_data = scraper.search_vessel(vessel_name)
-                            
-                            # Prüfe ob WICHTIGE Daten vorhanden sind (IMO oder Länge)
+                        
                             if vessel_data and (vessel_data.get('imo_nummer') or vessel_data.get('laenge')):
-                                has_important_data = True
-                                
-                                # Erfolgreich! Speichere in Datenbank
-                                db.add_ship(
-                                    name=vessel_data.get('name') or vessel_name,
-                                    laenge=vessel_data.get('laenge'),
-                                    breite=vessel_data.get('breite'),
-                                    imo_nummer=vessel_data.get('imo_nummer'),
-                                    mmsi_nummer=vessel_data.get('mmsi_nummer'),
-                                    baujahr=vessel_data.get('baujahr'),
-                                    typ=vessel_data.get('typ'),
-                                    flagge=vessel_data.get('flagge'),
-                                    vesselfinder_link=vessel_data.get('vesselfinder_link')
-                                )
+                                # Für Bulk-Upsert in die Datenbank vormerken
+                                pending_ships.append(_vessel_record(vessel_data, vessel_name))
+                                if len(pending_ships) >= VESSELFINDER_DB_BATCH:
+                                    flush_pending_ships()
                                 success_count += 1
-                                consecutive_errors = 0
-                                processed_in_this_run.add(vessel_name)
-                                
+                                consecutive_errors = 0  # Zurücksetzen bei Erfolg
+                            
                                 # Speichere Details für Zusammenfassung
                                 ship_details = {
                                     'name': vessel_name,
@@ -2608,7 +4947,7 @@ def import_from_vesselfinder(db: SchiffsDatenbank, vessel_names: List[str] = Non
                                     'breite': vessel_data.get('breite', '')
                                 }
                                 successful_ships.append(ship_details)
-                                
+                            
                                 # Zeige gefundene Daten besser formatiert
                                 log_info(f"    ✓ Daten gefunden:")
                                 if ship_details['imo']:
@@ -2619,126 +4958,42 @@ def import_from_vesselfinder(db: SchiffsDatenbank, vessel_names: List[str] = Non
                                     log_info(f"        ✓ Länge: {ship_details['laenge']}m")
                                 if ship_details['breite']:
                                     log_info(f"        ✓ Breite: {ship_details['breite']}m")
-                                
-                                # Schreibe sofort ins Sheet
-                                log_info(f"    → Schreibe ins Google Sheet...")
-                                update_single_ship_in_sheet(vessel_name, vessel_data, gs_worksheet)
-                                break  # Erfolgreich, keine weiteren Versuche nötig
-                            else:
-                                # Keine wichtigen Daten gefunden
-                                log_warning(f"    ⚠️  Keine Daten {attempt}")
-                                vessel_data = None  # Reset für nächsten Versuch
-                                
-                                # Warte vor nächstem Versuch (außer beim letzten)
-                                if attempt < 3:
-                                    time.sleep(2)
-                        
-                        except Exception as e:
-                            log_warning(f"    ⚠️  Fehler bei Versuch {attempt}: {e}")
-                            if attempt < 3:
-                                time.sleep(2)
-                    
-                    # Nach 3 Versuchen ohne wichtige Daten
-                    if not has_important_data:
-                        error_count += 1
-                        consecutive_errors += 1
-                        processed_in_this_run.add(vessel_name)  # Als verarbeitet markieren
-                        failed_ships.append(vessel_name)
-                        log_error(f"    ✗ Schiff nach 3 Versuchen übersprungen")
-                        
-                        # Schreibe "Keine Daten" in Spalte C
-                        log_info(f"    → Schreibe 'Keine Daten' in Spalte C...")
-                        mark_vessel_as_no_data(vessel_name, gs_worksheet)
-                        
-                        # Prüfe Abbruchbedingung
-                        if consecutive_errors >= max_consecutive_errors:
-                            log_error(f"\n⚠️  ABBRUCH: {max_consecutive_errors} Schiffe hintereinander nicht gefunden!")
-                            break
-                    
-                    # Wartezeit zwischen Schiffen
-                    time.sleep(delay)
-                
-            else:
-                # Normale Verarbeitung ohne live_update
-                for i, vessel_name in enumerate(vessel_names, 1):
-                    log_info(f"[{i}/{len(vessel_names)}] {vessel_name}")
-                    
-                    try:
-                        # Hole Daten von VesselFinder
-                        vessel_data = scraper.search_vessel(vessel_name)
-                        
-                        if vessel_data and (vessel_data.get('imo_nummer') or vessel_data.get('laenge')):
-                            # Speichere in Datenbank
-                            db.add_ship(
-                                name=vessel_data.get('name') or vessel_name,
-                                laenge=vessel_data.get('laenge'),
-                                breite=vessel_data.get('breite'),
-                                imo_nummer=vessel_data.get('imo_nummer'),
-                                mmsi_nummer=vessel_data.get('mmsi_nummer'),
-                                baujahr=vessel_data.get('baujahr'),
-                                typ=vessel_data.get('typ'),
-                                flagge=vessel_data.get('flagge'),
-                                vesselfinder_link=vessel_data.get('vesselfinder_link')
-                            )
-                            success_count += 1
-                            consecutive_errors = 0  # Zurücksetzen bei Erfolg
                             
-                            # Speichere Details für Zusammenfassung
-                            ship_details = {
-                                'name': vessel_name,
-                                'imo': vessel_data.get('imo_nummer', ''),
-                                'mmsi': vessel_data.get('mmsi_nummer', ''),
-                                'laenge': vessel_data.get('laenge', ''),
-                                'breite': vessel_data.get('breite', '')
-                            }
-                            successful_ships.append(ship_details)
+                                # Live-Update: Schreibe sofort ins Sheet
+                                if gs_worksheet:
+                                    log_info(f"    → Schreibe ins Google Sheet...")
+                                    update_single_ship_in_sheet(vessel_name, vessel_data, gs_worksheet)
+                            else:
+                                error_count += 1
+                                consecutive_errors += 1
+                                failed_ships.append(vessel_name)
+                                log_warning(f"    Aufeinanderfolgende Fehler: {consecutive_errors}/{max_consecutive_errors}")
                             
-                            # Zeige gefundene Daten besser formatiert
-                            log_info(f"    ✓ Daten gefunden:")
-                            if ship_details['imo']:
-                                log_info(f"        ✓ IMO: {ship_details['imo']}")
-                            if ship_details['mmsi']:
-                                log_info(f"        ✓ MMSI: {ship_details['mmsi']}")
-                            if ship_details['laenge']:
-                                log_info(f"        ✓ Länge: {ship_details['laenge']}m")
-                            if ship_details['breite']:
-                                log_info(f"        ✓ Breite: {ship_details['breite']}m")
+                                # Prüfe Abbruchbedingung
+                                if consecutive_errors >= max_consecutive_errors:
+                                    log_error(f"\n⚠️  ABBRUCH: {max_consecutive_errors} Schiffe hintereinander nicht gefunden!")
+                                    log_error(f"    Möglicherweise gibt es ein Problem mit der Website oder Verbindung.")
+                                    log_error(f"    Bisher erfolgreich: {success_count} von {i} Schiffen")
+                                    break
+                        
+                            # Wartezeit zwischen Anfragen
+                            if i < len(vessel_names):
+                                time.sleep(delay)
                             
-                            # Live-Update: Schreibe sofort ins Sheet
-                            if gs_worksheet:
-                                log_info(f"    → Schreibe ins Google Sheet...")
-                                update_single_ship_in_sheet(vessel_name, vessel_data, gs_worksheet)
-                        else:
+                        except Exception as e:
+                            log_error(f"    ✗ Fehler: {e}")
                             error_count += 1
                             consecutive_errors += 1
                             failed_ships.append(vessel_name)
-                            log_warning(f"    Aufeinanderfolgende Fehler: {consecutive_errors}/{max_consecutive_errors}")
-                            
-                            # Prüfe Abbruchbedingung
+                        
+                            # Prüfe Abbruchbedingung auch bei Exceptions
                             if consecutive_errors >= max_consecutive_errors:
-                                log_error(f"\n⚠️  ABBRUCH: {max_consecutive_errors} Schiffe hintereinander nicht gefunden!")
-                                log_error(f"    Möglicherweise gibt es ein Problem mit der Website oder Verbindung.")
+                                log_error(f"\n⚠️  ABBRUCH: {max_consecutive_errors} Fehler hintereinander!")
+                                log_error(f"    Es gibt möglicherweise ein technisches Problem.")
                                 log_error(f"    Bisher erfolgreich: {success_count} von {i} Schiffen")
                                 break
                         
-                        # Wartezeit zwischen Anfragen
-                        if i < len(vessel_names):
-                            time.sleep(delay)
-                            
-                    except Exception as e:
-                        log_error(f"    ✗ Fehler: {e}")
-                        error_count += 1
-                        consecutive_errors += 1
-                        failed_ships.append(vessel_name)
-                        
-                        # Prüfe Abbruchbedingung auch bei Exceptions
-                        if consecutive_errors >= max_consecutive_errors:
-                            log_error(f"\n⚠️  ABBRUCH: {max_consecutive_errors} Fehler hintereinander!")
-                            log_error(f"    Es gibt möglicherweise ein technisches Problem.")
-                            log_error(f"    Bisher erfolgreich: {success_count} von {i} Schiffen")
-                            break
-                        
-                        continue
+                            continue
         
         log_info("")
         log_info("="*70)
@@ -2784,6 +5039,9 @@ def import_from_vesselfinder(db: SchiffsDatenbank, vessel_names: List[str] = Non
         
         log_info("="*70)
         
+        # Restliche gefundene Schiffe schreiben
+        flush_pending_ships()
+        
         # Speichere Import-Historie
         db.connect()
         db.cursor.execute("""
@@ -2792,13 +5050,26 @@ def import_from_vesselfinder(db: SchiffsDatenbank, vessel_names: List[str] = Non
         """, ('VesselFinder.com', success_count, 
               'teilweise' if error_count > 0 else 'erfolg',
               f'{success_count} erfolgreich, {error_count} Fehler'))
-        db.conn.commit()
+        db.commit()
         db.disconnect()
         
     except Exception as e:
         print(f"\n✗ Kritischer Fehler beim Import: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        # Bereits gefundene Daten nicht verlieren (z.B. bei Strg+C)
+        try:
+            flush_pending_ships()
+        except Exception as e:
+            log_error(f"✗ Fehler beim Speichern der gefundenen Schiffe: {e}")
+        if gs_worksheet is not None and gs_worksheet.writer is not None:
+            try:
+                gs_worksheet.writer.close()
+                stats = gs_worksheet.writer.stats
+                log_info(f"✓ Sheet-Updates: {stats['cells']} Zellen in {stats['flushes']} Schreibaufrufen")
+            except Exception as e:
+                log_error(f"✗ Fehler beim Schreiben der gepufferten Sheet-Updates: {e}")
 
 def show_all_ships(db: SchiffsDatenbank):
     """
@@ -2806,17 +5077,12 @@ def show_all_ships(db: SchiffsDatenbank):
     """
     print("\n=== Alle Schiffe ===")
     
-    ships = db.get_all_ships()
-    
-    if not ships:
-        print("Keine Schiffe in der Datenbank gefunden")
-        return
-    
-    print(f"\nGefunden: {len(ships)} Schiffe\n")
-    print(f"{'ID':<5} {'Name':<40} {'Länge':<10} {'Liegeort':<20} {'Status':<10}")
-    print("-" * 90)
-    
-    for ship in ships:
+    count = 0
+    for ship in db.iter_ships():
+        if count == 0:
+            print(f"\n{'ID':<5} {'Name':<40} {'Länge':<10} {'Liegeort':<20} {'Status':<10}")
+            print("-" * 90)
+        count += 1
         id_str = str(ship.get('id', ''))
         name = str(ship.get('name', ''))[:40]
         laenge = f"{ship.get('laenge', '')} m" if ship.get('laenge') else '-'
@@ -2824,6 +5090,12 @@ def show_all_ships(db: SchiffsDatenbank):
         status = str(ship.get('status', '') or '-')[:10]
         
         print(f"{id_str:<5} {name:<40} {laenge:<10} {liegeort:<20} {status:<10}")
+    
+    if count == 0:
+        print("Keine Schiffe in der Datenbank gefunden")
+        return
+    
+    print(f"\nGefunden: {count} Schiffe")
 
 def show_statistics(db: SchiffsDatenbank):
     """
@@ -2922,7 +5194,9 @@ Beispiele (kurz):
   python Schiffs_Datenbank.py --import                 # Daten von VesselFinder importieren (mit Live-Update)
   python Schiffs_Datenbank.py --import --max 5         # Erste 5 Schiffe importieren
   python Schiffs_Datenbank.py --keine-daten            # Schiffe mit "Keine Daten" nochmal suchen
+  python Schiffs_Datenbank.py --import --workers 4     # Mit 4 parallelen Browsern importieren
   python Schiffs_Datenbank.py --show                   # Alle Schiffe anzeigen
+  python Schiffs_Datenbank.py --migrate --dry-run      # Ausstehende Schema-Migrationen anzeigen
 
 Beispiele (lang):
   python Schiffs_Datenbank.py --sync-from-hhla         # Alle Daten aus Sheet in Datenbank importieren
@@ -2943,6 +5217,9 @@ Beispiele (lang):
                        help="Schiffe mit 'Keine Daten' in Spalte C nochmal suchen")
     parser.add_argument("--show", action="store_true",
                        help="Alle Schiffe anzeigen")
+    parser.add_argument("--workers", type=int, default=1, metavar="N",
+                       help=f"Parallele Browser-Worker für --import/--keine-daten (Standard: 1; "
+                            f"global max. {SCRAPER_MAX_CONCURRENT} gleichzeitig, {SCRAPER_RATE_PER_MINUTE} Suchen/min)")
     
     # Lange Argumente (für Kompatibilität)
     parser.add_argument("--import-from-sheets", action="store_true",
@@ -2969,16 +5246,26 @@ Beispiele (lang):
                        help="Jedes Schiff sofort ins Google Sheet schreiben (live sehen)")
     parser.add_argument("--export-to-sheets", action="store_true",
                        help="Daten zu Google Sheets exportieren")
+    parser.add_argument("--export-parquet", nargs="?", const=PARQUET_DIR, default=None, metavar="VERZEICHNIS",
+                       help=f"Datenbank inkrementell als Parquet exportieren (Standard: {PARQUET_DIR})")
+    parser.add_argument("--full", action="store_true",
+                       help="Mit --export-parquet/--update-hhla-sheet: alles statt nur Änderungen")
     parser.add_argument("--update-hhla-sheet", action="store_true",
-                       help="Sheet 'Schiffsdaten HHLA' mit Datenbank-Daten aktualisieren")
+                       help="Sheet 'Schiffsdaten HHLA' und Datenbank abgleichen (beide Richtungen)")
+    parser.add_argument("--sync-regel", action="append", default=[], metavar="FELD=sheet|db",
+                       help="Konfliktregel beim HHLA-Abgleich, z.B. vesselfinder_link=db (mehrfach möglich)")
     parser.add_argument("--show-all", action="store_true",
                        help="Alle Schiffe anzeigen")
     parser.add_argument("--search", type=str, metavar="BEGRIFF",
-                       help="Nach Schiff suchen")
+                       help="Nach Schiff suchen (gerankt, auch unvollständige/fehlerhafte Namen)")
     parser.add_argument("--add-ship", action="store_true",
                        help="Neues Schiff interaktiv hinzufügen")
     parser.add_argument("--stats", action="store_true",
                        help="Statistiken anzeigen")
+    parser.add_argument("--migrate", action="store_true",
+                       help="Ausstehende Schema-Migrationen anwenden")
+    parser.add_argument("--dry-run", action="store_true",
+                       help="Mit --migrate: nur anzeigen, welche Migrationen ausstehen")
     parser.add_argument("--db-path", type=str, default=DB_PATH,
                        help=f"Pfad zur Datenbankdatei (Standard: {DB_PATH})")
     parser.add_argument("--api-key", type=str, default=None,
@@ -2986,6 +5273,11 @@ Beispiele (lang):
     
     args = parser.parse_args()
     
+    sync_rules = {}
+    for entry in args.sync_regel:
+        field, _, rule = entry.partition('=')
+        sync_rules[field.strip()] = rule.strip().lower()
+    
     # API-Key-Prüfung (optional - nur wenn --api-key angegeben)
     if args.api_key:
         if not check_api_key(args.api_key):
@@ -2993,6 +5285,10 @@ Beispiele (lang):
             sys.exit(1)
         log_info("✓ API-Key validiert")
     
+    # Sheets-API-Budget (Aufrufe je Funktion, Latenzen, Wiederholungen) am Ende des Laufs
+    if sheets_client is not None:
+        sheets_client.enable_budget_report(os.path.join(LOG_DIR, "sheets_api_budget.json"), log=log_info)
+    
     # Wenn keine Argumente, zeige Infotext
     if len(sys.argv) == 1:
         print("\n" + "="*70)
@@ -3005,6 +5301,7 @@ Beispiele (lang):
         print("  --import --max 5    Erste 5 Schiffe importieren")
         print("  --keine-daten       Schiffe mit 'Keine Daten' nochmal suchen")
         print("  --show              Alle Schiffe anzeigen")
+        print("  --migrate           Schema-Migrationen anwenden (--dry-run: nur anzeigen)")
         print("\n💡 Beispiel:")
         print("  python3 Schiffs_Datenbank.py --sync")
         print("  python3 Schiffs_Datenbank.py --import")
@@ -3018,6 +5315,13 @@ Beispiele (lang):
     
     # Führe gewünschte Aktion aus
     try:
+        if args.migrate:
+            log_header("Schema-Migration")
+            db.migrate(dry_run=args.dry_run)
+        elif not args.dry_run and db.pending_migrations():
+            # Schema-Änderungen automatisch nachziehen, bevor andere Aktionen laufen
+            db.migrate()
+        
         if args.init:
             db.init_database()
         
@@ -3027,7 +5331,7 @@ Beispiele (lang):
         
         if args.import_short:
             # Kurze Version: --import = --import-from-vesselfinder --from-sheet --live-update
-            sync_database_with_sheet(db)
+            sync_database_with_sheet(db, rules=sync_rules)
             use_headless = not args.visible
             max_ships = args.max_ships_short or args.max_ships
             import_from_vesselfinder(db, from_sheet=True, delay=args.delay,
@@ -3035,10 +5339,11 @@ Beispiele (lang):
                                     headless=use_headless,
                                     max_ships=max_ships,
                                     skip_ships=args.skip,
-                                    live_update=True)
+                                    live_update=True,
+                                    workers=args.workers)
         
         if args.keine_daten:
-            search_keine_daten(db)
+            search_keine_daten(db, workers=args.workers, headless=not args.visible)
         
         if args.show:
             show_all_ships(db)
@@ -3049,12 +5354,12 @@ Beispiele (lang):
         
         if args.sync_from_hhla:
             log_header("Sync: Sheet → Datenbank")
-            sync_database_with_sheet(db)
+            sync_database_with_sheet(db, rules=sync_rules)
         
         if args.import_from_vesselfinder:
             # Vor dem Import: Synchronisiere Datenbank mit Sheet (für manuell eingetragene Daten)
             if args.from_sheet or args.live_update:
-                sync_database_with_sheet(db)
+                sync_database_with_sheet(db, rules=sync_rules)
             
             # Headless = False wenn --visible gesetzt, sonst True (aber wir setzen jetzt False als Standard)
             use_headless = not args.visible  # Wenn --visible gesetzt, dann headless=False
@@ -3065,14 +5370,16 @@ Beispiele (lang):
                                         headless=use_headless,
                                         max_ships=args.max_ships,
                                         skip_ships=args.skip,
-                                        live_update=args.live_update)
+                                        live_update=args.live_update,
+                                        workers=args.workers)
             elif args.vessels:
                 import_from_vesselfinder(db, vessel_names=args.vessels, delay=args.delay,
                                         max_consecutive_errors=args.max_errors,
                                         headless=use_headless,
                                         max_ships=args.max_ships,
                                         skip_ships=args.skip,
-                                        live_update=args.live_update)
+                                        live_update=args.live_update,
+                                        workers=args.workers)
             else:
                 log_error("✗ Bitte entweder --from-sheet oder --vessels angeben")
                 log_info("Beispiel: python Schiffs_Datenbank.py --import-from-vesselfinder --from-sheet --visible")
@@ -3081,8 +5388,11 @@ Beispiele (lang):
         if args.export_to_sheets:
             export_to_sheets(db)
         
+        if args.export_parquet:
+            export_to_parquet(db, args.export_parquet, full=args.full)
+        
         if args.update_hhla_sheet:
-            update_hhla_sheet_with_data(db)
+            update_hhla_sheet_with_data(db, full=args.full, rules=sync_rules)
         
         if args.show_all:
             show_all_ships(db)
@@ -3092,17 +5402,18 @@ Beispiele (lang):
         
         if args.search:
             print(f"\n=== Suche nach '{args.search}' ===")
-            ships = db.search_ship(args.search)
+            ships = db.search_ships_ranked(args.search, limit=25)
             if ships:
                 print(f"\nGefunden: {len(ships)} Schiffe\n")
-                print(f"{'ID':<5} {'Name':<40} {'Länge':<10} {'Liegeort':<20}")
-                print("-" * 80)
+                print(f"{'ID':<5} {'Name':<40} {'Länge':<10} {'Liegeort':<20} {'MMSI':<10}")
+                print("-" * 90)
                 for ship in ships:
                     id_str = str(ship.get('id', ''))
                     name = str(ship.get('name', ''))[:40]
                     laenge = f"{ship.get('laenge', '')} m" if ship.get('laenge') else '-'
                     liegeort = str(ship.get('liegeort', '') or '-')[:20]
-                    print(f"{id_str:<5} {name:<40} {laenge:<10} {liegeort:<20}")
+                    mmsi = str(ship.get('mmsi_nummer', '') or '-')[:10]
+                    print(f"{id_str:<5} {name:<40} {laenge:<10} {liegeort:<20} {mmsi:<10}")
             else:
                 print("Keine Schiffe gefunden")
         
@@ -3120,6 +5431,8 @@ Beispiele (lang):
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        db.close()
 
 if __name__ == "__main__":
     main()
@@ -9,11 +9,15 @@ Schiffsbilder – Lädt Schiffsbilder von shipfinder.com
 """
 
 import re
+import sys
 import time
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
 import os
 
+# Gemeinsame Sheets-Schicht (geteilte Session, gebündeltes Schreiben,
+# Spalten-Projektion, Retry/Backoff und API-Budget)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import sheets_client
+
 # Selenium für JavaScript-rendered Content
 try:
     from selenium import webdriver
@@ -52,42 +56,37 @@ else:  # Linux
 # Wird verwendet um Website nicht zu überlasten
 MAX_SHIPS = 0  # 0 bedeutet alle Schiffe verarbeiten
 
-def get_credentials():
-    """Holt Google API Credentials vom Service Account"""
-    if not os.path.exists(SERVICE_ACCOUNT_FILE):
-        raise FileNotFoundError(
-            f"Service Account Datei nicht gefunden: {SERVICE_ACCOUNT_FILE}\n"
-            f"Bitte stelle sicher, dass die Datei existiert."
-        )
-    
-    creds = Credentials.from_service_account_file(
-        SERVICE_ACCOUNT_FILE,
-        scopes=SCOPES
-    )
+def get_sheet_data(sh, sheet_name, columns="A C K"):
+    """
+    Liest die benötigten Spalten aus dem Sheet (Standard: A=Name, C=MMSI, K=Bild).
     
-    return creds
+    Es werden nur diese Spalten übertragen (ein values.batchGet); die Zeilen
+    werden mit den Werten an ihren Spaltenpositionen (A=0 … K=10) aufgebaut,
+    alle anderen Zellen bleiben leer.
+    """
+    cols = sheets_client.read_columns(sh, [(sheet_name, {c: None for c in columns.split()})]).get(sheet_name, {})
+    width = max((sheets_client.column_number(c) for c in cols), default=0)
+    rows = []
+    for values in zip(*cols.values()):
+        row = [''] * width
+        for letter, value in zip(cols, values):
+            row[sheets_client.column_number(letter) - 1] = value
+        rows.append(row)
+    return rows
 
-def get_sheet_data(service, spreadsheet_id, sheet_name):
-    """Liest alle Daten aus dem Sheet"""
-    range_name = f'{sheet_name}!A:K'
-    result = service.spreadsheets().values().get(
-        spreadsheetId=spreadsheet_id,
-        range=range_name
-    ).execute()
-    return result.get('values', [])
-
-def update_cell(service, spreadsheet_id, sheet_name, row, col, value):
-    """Aktualisiert eine Zelle im Sheet"""
-    range_name = f'{sheet_name}!{chr(64 + col)}{row}'
-    body = {
-        'values': [[value]]
-    }
-    service.spreadsheets().values().update(
-        spreadsheetId=spreadsheet_id,
-        range=range_name,
-        valueInputOption='RAW',
-        body=body
-    ).execute()
+def update_cell(sh, sheet_name, row, col, value, writer=None):
+    """
+    Aktualisiert eine Zelle im Sheet.
+    Mit writer (sheets_client.BatchWriter) wird nur gepuffert und später gebündelt geschrieben.
+    """
+    if writer is not None:
+        writer.set(sheet_name, row, col, value)
+        return
+    sh.values_update(
+        sheets_client.a1_range(row, col, row, col, sheet_name),
+        params={'valueInputOption': 'RAW'},
+        body={'values': [[value]]}
+    )
 
 def extract_image_url(mmsi):
     """Extrahiert die Bild-URL von shipfinder.com mit Selenium (für JavaScript-rendered Content)"""
@@ -256,10 +255,10 @@ def extract_image_url(mmsi):
         if driver:
             driver.quit()
 
-def process_ships_batch(service, running_flag=None):
+def process_ships_batch(sh, running_flag=None):
     """Verarbeitet einen Batch von Schiffen (max. MAX_SHIPS)"""
     # Daten aus Sheet lesen
-    data = get_sheet_data(service, SPREADSHEET_ID, SHEET_NAME)
+    data = get_sheet_data(sh, SHEET_NAME)
     
     if not data:
         print("Keine Daten gefunden!")
@@ -271,6 +270,9 @@ def process_ships_batch(service, running_flag=None):
     with_images = 0
     without_images = 0
     
+    # Spalte K gepuffert schreiben (ein batchUpdate statt eines Aufrufs pro Schiff)
+    writer = sheets_client.BatchWriter(sheets_client.gspread_flush(sh))
+    
     # Zähle zuerst alle zu verarbeitenden Schiffe
     total_to_process = 0
     for i in range(1, len(data)):
@@ -341,7 +343,7 @@ def process_ships_batch(service, running_flag=None):
             print(f"   ✅ Bild gefunden!")
             print(f"   📷 URL: {image_url}")
             try:
-                update_cell(service, SPREADSHEET_ID, SHEET_NAME, i + 1, 11, image_url)
+                update_cell(sh, SHEET_NAME, i + 1, 11, image_url, writer)
                 processed += 1
                 with_images += 1
                 # Pause um Server nicht zu überlasten
@@ -359,7 +361,7 @@ def process_ships_batch(service, running_flag=None):
                 ship_name_clean = str(ship_name).strip() if ship_name else "Unbekannt"
                 mmsi_clean = str(mmsi_number).strip() if mmsi_number else ""
                 keine_bild_text = f"Keine Bild {ship_name_clean} {mmsi_clean}".strip()
-                update_cell(service, SPREADSHEET_ID, SHEET_NAME, i + 1, 11, keine_bild_text)
+                update_cell(sh, SHEET_NAME, i + 1, 11, keine_bild_text, writer)
                 print(f"   📝 Geschrieben in Spalte K: {keine_bild_text}")
                 processed += 1  # Zähle als verarbeitet, nicht als Fehler
                 without_images += 1
@@ -367,6 +369,12 @@ def process_ships_batch(service, running_flag=None):
                 print(f"  Fehler beim Schreiben: {e}")
                 errors += 1
     
+    # Restliche gepufferte Updates schreiben
+    try:
+        writer.close()
+    except Exception as e:
+        print(f"  Fehler beim Schreiben: {e}")
+    
     return processed, skipped, errors, with_images, without_images
 
 def main():
@@ -409,8 +417,7 @@ def main():
     
     # Google Sheets API initialisieren
     print("Verbinde mit Google Sheets...")
-    creds = get_credentials()
-    service = build('sheets', 'v4', credentials=creds)
+    sh = sheets_client.get_spreadsheet(SERVICE_ACCOUNT_FILE, SPREADSHEET_ID, SCOPES)
     
     total_processed = 0
     total_skipped = 0
@@ -429,7 +436,7 @@ def main():
         print(f"Batch {batch_count} - {time.strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"{'='*50}\n")
         
-        result = process_ships_batch(service, is_running)
+        result = process_ships_batch(sh, is_running)
         processed, skipped, errors, with_images, without_images = result
         
         total_processed += processed
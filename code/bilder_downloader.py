@@ -19,13 +19,11 @@ from urllib.parse import urlparse
 import argparse
 from typing import List, Optional, Tuple
 
-# Google Sheets API Support
-try:
-    from google.oauth2.service_account import Credentials
-    from googleapiclient.discovery import build
-    GOOGLE_SHEETS_AVAILABLE = True
-except ImportError:
-    GOOGLE_SHEETS_AVAILABLE = False
+# Google Sheets über die gemeinsame Sheets-Schicht (geteilte Session,
+# Spalten-Projektion, Retry/Backoff und API-Budget)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import sheets_client
+GOOGLE_SHEETS_AVAILABLE = sheets_client.GSPREAD_AVAILABLE
 
 # ============================================
 # KONFIGURATION - Hier kannst du alles anpassen
@@ -332,36 +330,18 @@ def format_ship_names_in_sheets():
         
         print(f"📁 {len(existing_images)} Bilder im Ordner gefunden")
         
-        # Verbinde mit Google Sheets
-        creds = get_google_sheets_credentials()
-        service = build('sheets', 'v4', credentials=creds)
-        
-        # Hole Sheet-ID
-        spreadsheet = service.spreadsheets().get(spreadsheetId=GOOGLE_SPREADSHEET_ID).execute()
-        sheet_id = None
-        for sheet in spreadsheet.get('sheets', []):
-            if sheet['properties']['title'] == GOOGLE_SHEET_NAME:
-                sheet_id = sheet['properties']['sheetId']
-                break
-        
-        if sheet_id is None:
+        # Verbinde mit Google Sheets (Sheet-ID aus den gecachten Metadaten)
+        sh = get_spreadsheet()
+        try:
+            sheet_id = sheets_client.get_worksheet(SERVICE_ACCOUNT_FILE, GOOGLE_SPREADSHEET_ID,
+                                                   GOOGLE_SHEET_NAME, scopes=SCOPES).id
+        except sheets_client.WorksheetNotFound:
             print(f"❌ Blatt '{GOOGLE_SHEET_NAME}' nicht gefunden")
             return
         
-        # Lese Schiffsdaten
-        name_col_idx = col_to_index(GOOGLE_NAME_COLUMN)
-        num_col_idx = col_to_index(GOOGLE_NUMBER_COLUMN)
-        max_col = max(name_col_idx, num_col_idx)
-        col_letter = chr(64 + max_col)
-        range_name = f'{GOOGLE_SHEET_NAME}!A:{col_letter}'
-        
-        result = service.spreadsheets().values().get(
-            spreadsheetId=GOOGLE_SPREADSHEET_ID,
-            range=range_name
-        ).execute()
-        
-        values = result.get('values', [])
-        if not values:
+        # Lese nur Name- und Nummern-Spalte
+        rows = read_sheet_columns(sh, GOOGLE_NAME_COLUMN, GOOGLE_NUMBER_COLUMN)
+        if not rows:
             print("⚠️  Keine Daten gefunden")
             return
         
@@ -369,13 +349,7 @@ def format_ship_names_in_sheets():
         rows_to_format = []
         rows_to_unformat = []
         
-        for i, row in enumerate(values[GOOGLE_START_ROW - 1:], start=GOOGLE_START_ROW):
-            while len(row) < max_col:
-                row.append('')
-            
-            name = str(row[name_col_idx - 1]).strip() if len(row) >= name_col_idx else ''
-            number = str(row[num_col_idx - 1]).strip() if len(row) >= num_col_idx else ''
-            
+        for i, (name, number) in enumerate(rows, start=GOOGLE_START_ROW):
             if name:
                 # Erstelle mögliche Dateinamen
                 possible_names = []
@@ -398,10 +372,10 @@ def format_ship_names_in_sheets():
         
         # Formatiere Zeilen
         if rows_to_format:
-            format_cells_bold(service, sheet_id, rows_to_format, True)
+            format_cells_bold(sh, sheet_id, rows_to_format, True)
         
         if rows_to_unformat:
-            format_cells_bold(service, sheet_id, rows_to_unformat, False)
+            format_cells_bold(sh, sheet_id, rows_to_unformat, False)
         
         print(f"✅ Formatierung abgeschlossen")
         
@@ -410,7 +384,7 @@ def format_ship_names_in_sheets():
         # Nicht kritisch, nur Warnung
 
 
-def format_cells_bold(service, sheet_id: int, rows: list, bold: bool):
+def format_cells_bold(sh, sheet_id: int, rows: list, bold: bool):
     """Formatiert Zellen in Spalte A fett oder normal"""
     if not rows:
         return
@@ -444,11 +418,7 @@ def format_cells_bold(service, sheet_id: int, rows: list, bold: bool):
         batch_size = 100
         for i in range(0, len(requests), batch_size):
             batch = requests[i:i + batch_size]
-            body = {'requests': batch}
-            service.spreadsheets().batchUpdate(
-                spreadsheetId=GOOGLE_SPREADSHEET_ID,
-                body=body
-            ).execute()
+            sh.batch_update({'requests': batch})
         
     except Exception as e:
         print(f"⚠️  Fehler beim Formatieren: {e}")
@@ -468,15 +438,25 @@ def read_urls_from_file(filepath: str) -> List[str]:
     return urls
 
 
-def get_google_sheets_credentials():
-    """Holt Google API Credentials vom Service Account"""
+def get_spreadsheet():
+    """Gecachtes Spreadsheet-Handle aus der gemeinsamen Sheets-Schicht"""
     if not GOOGLE_SHEETS_AVAILABLE:
-        raise ImportError("Google Sheets API nicht verfügbar. Installiere: pip install google-auth google-api-python-client")
-    
-    if not os.path.exists(SERVICE_ACCOUNT_FILE):
-        raise FileNotFoundError(f"Service Account Datei nicht gefunden: {SERVICE_ACCOUNT_FILE}")
-    
-    return Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPES)
+        raise ImportError("Google Sheets API nicht verfügbar. Installiere: pip install gspread google-auth")
+    return sheets_client.get_spreadsheet(SERVICE_ACCOUNT_FILE, GOOGLE_SPREADSHEET_ID, SCOPES)
+
+
+def read_sheet_columns(sh, *columns) -> List[Tuple[str, ...]]:
+    """
+    Liest nur die angegebenen Spalten (Buchstabe oder Nummer) ab
+    GOOGLE_START_ROW mit einem values.batchGet; liefert Tupel pro Zeile.
+    """
+    letters = [sheets_client.column_letter(col_to_index(c)) for c in columns]
+    cols = sheets_client.read_columns(
+        sh, [(GOOGLE_SHEET_NAME, sorted(set(letters), key=sheets_client.column_number), GOOGLE_START_ROW)]
+    ).get(GOOGLE_SHEET_NAME, {})
+    if not cols:
+        return []
+    return list(zip(*(cols[letter] for letter in letters)))
 
 
 def col_to_index(col):
@@ -509,35 +489,15 @@ def read_urls_from_google_sheets() -> List[Tuple[str, str]]:
         url_col_idx = col_to_index(GOOGLE_URL_COLUMN)
         num_col_idx = col_to_index(GOOGLE_NUMBER_COLUMN)
         
-        # Verbinde mit Google Sheets
-        creds = get_google_sheets_credentials()
-        service = build('sheets', 'v4', credentials=creds)
-        
-        # Lese Daten
-        max_col = max(name_col_idx, url_col_idx, num_col_idx)
-        col_letter = chr(64 + max_col)
-        range_name = f'{GOOGLE_SHEET_NAME}!A:{col_letter}'
-        
-        result = service.spreadsheets().values().get(
-            spreadsheetId=GOOGLE_SPREADSHEET_ID,
-            range=range_name
-        ).execute()
-        
-        values = result.get('values', [])
-        if not values:
+        # Verbinde mit Google Sheets und lese nur Name-, URL- und Nummern-Spalte
+        rows = read_sheet_columns(get_spreadsheet(), name_col_idx, url_col_idx, num_col_idx)
+        if not rows:
             print("⚠️  Keine Daten gefunden")
             return []
         
         # Extrahiere Daten
         name_url_pairs = []
-        for i, row in enumerate(values[GOOGLE_START_ROW - 1:], start=GOOGLE_START_ROW):
-            while len(row) < max_col:
-                row.append('')
-            
-            name = str(row[name_col_idx - 1]).strip() if len(row) >= name_col_idx else ''
-            url = str(row[url_col_idx - 1]).strip() if len(row) >= url_col_idx else ''
-            number = str(row[num_col_idx - 1]).strip() if len(row) >= num_col_idx else ''
-            
+        for i, (name, url, number) in enumerate(rows, start=GOOGLE_START_ROW):
             if url:  # Nur Zeilen mit URL
                 if name and number:
                     filename = f"{name}-{number}"
@@ -11,12 +11,15 @@ Enthält:
 """
 import os
 import re
+import sys
 import time
 import logging
 from datetime import datetime
 from bs4 import BeautifulSoup
-import gspread
-from google.oauth2.service_account import Credentials
+
+# Gemeinsame Sheets-Schicht (geteilte Session, Retry/Backoff, API-Budget)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import sheets_client
 
 # ---------- Konfiguration (anpassen / Umgebungsvariablen möglich) ----------
 HTML_FILE = os.getenv("DIENSTPLAN_HTML_FILE", "/root/Skrip/Downloads/dienstplanNestermonat.html")
@@ -312,12 +315,8 @@ def sortiere_tabelle_nach_datum_zeit(ws, start_row=4):
 # ---------- Hauptfunktion zum Schreiben ----------
 def write_schichten_to_sheet(schichten_rows, start_row=3):
     log.info("Starte Dienstplan-Import")
-    scopes = ["https://www.googleapis.com/auth/spreadsheets"]
     try:
-        credentials = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=scopes)
-        gc = gspread.authorize(credentials)
-        sh = gc.open_by_url(SPREADSHEET_URL)
-        ws = sh.worksheet(TABNAME)
+        ws = sheets_client.get_worksheet(SERVICE_ACCOUNT_FILE, SPREADSHEET_URL, TABNAME)
     except Exception as e:
         log.exception("Fehler bei Google-Authentifizierung / Öffnen der Tabelle: %s", e)
         raise
@@ -366,7 +365,7 @@ def write_schichten_to_sheet(schichten_rows, start_row=3):
     wochen_spalte_aktualisieren(ws, start_row=4)
     sortiere_tabelle_nach_datum_zeit(ws, start_row=4)
     try:
-        batch_update_column_d(sh, ws.title, d_updates)
+        batch_update_column_d(ws.spreadsheet, ws.title, d_updates)
     except Exception:
         log.exception("Fehler beim Batch-Update von Spalte D")
     zeitpunkt = datetime.now().strftime("Daten-Aktualisierung %d.%m.%Y %H:%M:%S")
@@ -1,9 +1,14 @@
 # Dieses Skript liest die gespeicherte HTML-Datei (dienstplan.html) aus /root/Skrip/Downloads und schreibt alle Schichten aus dem Oktober in eine Google-Tabelle.
 
+import os
 import re
+import sys
 from bs4 import BeautifulSoup
 import gspread
-from google.oauth2.service_account import Credentials
+
+# Gemeinsame Sheets-Schicht (geteilte Session, Retry/Backoff, API-Budget)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import sheets_client
 
 # === KONFIGURATION ===
 HTML_FILE = "/root/Skrip/Downloads/dienstplan.html"
@@ -74,11 +79,7 @@ def parse_html_for_shifts(html):
 
 def write_schichten_to_sheet(schichten_rows, start_row=3, col=1):
     print("Schreibe Schicht-Details als Zeilen in die Tabelle ...")
-    scopes = ["https://www.googleapis.com/auth/spreadsheets"]
-    credentials = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=scopes)
-    gc = gspread.authorize(credentials)
-    sh = gc.open_by_url(SPREADSHEET_URL)
-    ws = sh.worksheet(TABNAME)
+    ws = sheets_client.get_worksheet(SERVICE_ACCOUNT_FILE, SPREADSHEET_URL, TABNAME)
     headers = [["Woche", "Tag", "Datum", "Zeit", "Name", "Bereich"]]
     ws.update(values=headers, range_name=gspread.utils.rowcol_to_a1(start_row, col) + ":" + gspread.utils.rowcol_to_a1(start_row, col+5))
     end_row = start_row + len(schichten_rows)
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Schiffs_Datenbank Benchmark – Mikro-Benchmarks für die SQLite-Datenschicht
+- Erzeugt synthetische Schiffsregister (Standard: 1k/10k/100k Schiffe, 1M Positionen)
+  in einer temporären Datenbank, komplett offline (kein Google Sheets, kein Browser)
+- Misst add_ship, Bulk-Upsert, get_all_ships, iter_ships, search_ship,
+  search_ships_ranked, find_best_match, get_statistics, die HHLA-Projektion und
+  Positionsabfragen
+- Misst die Segelliste-Umwandlung (spaltenweise vs. bisherige iterrows-Schleife)
+  auf einer synthetischen Segelliste (Standard: 10k Zeilen)
+- Schreibt die Ergebnisse als JSON und vergleicht optional mit einer Baseline
+
+Benutzung:
+    python3 schiffs_datenbank_benchmark.py                          # Alle Größen, Ergebnis als JSON
+    python3 schiffs_datenbank_benchmark.py --sizes 1000 --positions 10000   # Schnelllauf
+    python3 schiffs_datenbank_benchmark.py --save-baseline baseline.json    # Baseline speichern
+    python3 schiffs_datenbank_benchmark.py --baseline baseline.json         # Regressionen prüfen (Exit-Code 1)
+    python3 schiffs_datenbank_benchmark.py --sizes 1000 --segelliste 10000  # Nur kleine DB + Segelliste
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import platform
+import sqlite3
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import Schiffs_Datenbank as sdb
+
+# ============================================
+# KONFIGURATION
+# ============================================
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_POSITIONS = 1000000          # Positionen für das größte Register
+REPEAT = 3                           # Wiederholungen je Messung (bestes Ergebnis zählt)
+ADD_SHIP_CALLS = 200                 # Einzelaufrufe für add_ship
+QUERY_CALLS = 50                     # Suchbegriffe je Suchmessung
+STATS_CALLS = 200                    # Aufrufe für get_statistics
+SEGELLISTE_ROWS = 10000              # Zeilen der synthetischen Segelliste (0 = aus)
+RESULT_FILE = "benchmark_ergebnis.json"
+
+# Erlaubte Verschlechterung gegenüber der Baseline (Faktor) und
+# Mindestabstand, unter dem Schwankungen ignoriert werden
+REGRESSION_TOLERANCE = 0.25
+REGRESSION_MIN_DELTA_MS = 1.0
+
+# Absolute Obergrenzen (ms pro Operation), unabhängig von einer Baseline
+THRESHOLDS_MS = {
+    'add_ship': 5.0,
+    'get_statistics': 2.0,
+    'search_ships_ranked': 20.0,     # inkl. Tippfehler-Suche über Trigramme
+    'find_best_match': 1.0,          # halb eingetippte Namen (Präfix), z.B. im Upload-Server
+    'ships_at': 50.0,
+    'segelliste_transform': 0.05,
+}
+
+LIEGEORTE = ['CTT', 'CTA', 'CTB', 'EUROGATE', 'O\'SWALDKAI', 'UNIKAI', 'STEINWERDER']
+PRAEFIXE = ['MSC', 'MAERSK', 'CMA CGM', 'COSCO SHIPPING', 'EVER', 'HMM', 'ONE', 'YM', 'HAPAG']
+WOERTER = ['ALPHA', 'BALTIC', 'TRANSPORT', 'STAR', 'OCEAN', 'HAMBURG', 'SOLAR', 'ATLANTIC',
+           'PACIFIC', 'NORDIC', 'EXPRESS', 'PIONEER', 'HARMONY', 'FORTUNE', 'AURORA', 'VEGA']
+
+# ============================================
+# DATENERZEUGUNG
+# ============================================
+def synthetic_ships(count: int, seed: int = 42) -> List[Dict]:
+    """Erzeugt ein reproduzierbares, realistisch aussehendes Schiffsregister"""
+    rng = random.Random(seed)
+    ships = []
+    for i in range(count):
+        name = f"{rng.choice(PRAEFIXE)} {rng.choice(WOERTER)} {rng.choice(WOERTER)} {i}"
+        ships.append({
+            'name': name,
+            'laenge': round(rng.uniform(90, 400), 1),
+            'breite': round(rng.uniform(15, 61), 1),
+            'imo_nummer': str(9000000 + i),
+            'mmsi_nummer': str(200000000 + i),
+            'typ': rng.choice(['Container Ship', 'Bulk Carrier', 'Tanker', 'Ro-Ro']),
+            'flagge': rng.choice(['DE', 'LR', 'PA', 'MT', 'SG']),
+            'baujahr': rng.randint(1990, 2024),
+            'liegeort': rng.choice(LIEGEORTE),
+        })
+    return ships
+
+def synthetic_segelliste(rows: int, seed: int = 11):
+    """
+    Erzeugt eine Segelliste wie von get_segelliste_data(): Textzellen, deutsche
+    Dezimalkommas, Zeitspalten (Ist vor Plan), Leerzeilen und Wiederholungen
+    """
+    rng = random.Random(seed)
+    names = [f"{rng.choice(PRAEFIXE)}  {rng.choice(WOERTER)} {i} " for i in range(max(1, rows // 3))]
+    start = datetime(2024, 1, 1)
+    data = []
+    for i in range(rows):
+        if rng.random() < 0.02:
+            data.append([''] * 8)
+            continue
+        eta = start + timedelta(hours=rng.randint(0, 5000))
+        etd = eta + timedelta(hours=rng.randint(6, 72))
+        ata = eta.strftime('%d.%m.%Y %H:%M') if rng.random() < 0.5 else ''
+        laenge = f"{rng.uniform(90, 400):.1f}".replace('.', ',') if rng.random() < 0.95 else 'k.A.'
+        data.append([str(i), '', rng.choice(LIEGEORTE), laenge, rng.choice(names),
+                     eta.strftime('%d.%m.%Y %H:%M'), etd.strftime('%d.%m.%Y %H:%M'), ata])
+    return sdb.pd.DataFrame(data, columns=['Nr', 'Info', 'Liegeort', 'Länge', 'Schiff', 'ETA', 'ETD', 'ATA'])
+
+def transform_segelliste_iterrows(df) -> List[Dict]:
+    """Referenz: bisherige Zeilenschleife aus import_from_sheets() (iterrows, parse_zeitpunkt je Zelle)"""
+    zeit_spalten = sdb.segelliste_zeit_spalten(df.columns.tolist())
+
+    def first_time(row, key):
+        for i in zeit_spalten[key]:
+            value = sdb.parse_zeitpunkt(row.iloc[i])
+            if value:
+                return value
+        return None
+
+    ships = []
+    for _, row in df.iterrows():
+        name = str(row.iloc[4]).strip()
+        if not name:
+            continue
+        laenge = None
+        laenge_str = str(row.iloc[3]).strip()
+        if laenge_str:
+            try:
+                laenge = float(laenge_str.replace(",", "."))
+            except ValueError:
+                pass
+        ships.append({'name': name, 'laenge': laenge, 'liegeort': str(row.iloc[2]).strip(),
+                      'ankunft': first_time(row, 'ankunft'), 'abfahrt': first_time(row, 'abfahrt')})
+    return ships
+
+def run_segelliste(rows: int, workdir: str) -> List[Dict]:
+    """Segelliste → Schiffe: spaltenweise Umwandlung gegen iterrows, dazu der Bulk-Import"""
+    results = []
+    df = synthetic_segelliste(rows)
+
+    def record(name: str, data: Dict):
+        results.append({'name': name, 'size': rows, 'positions': None, **data})
+        print(f"  {name:<28} {data['seconds']:>10.4f}s  {data['per_op_ms']:>10.4f} ms/op")
+
+    print(f"\n=== Segelliste {rows} Zeilen ===")
+    record('segelliste_iterrows', measure(lambda: transform_segelliste_iterrows(df), ops=rows, repeat=1))
+    record('segelliste_transform', measure(lambda: sdb.transform_segelliste(df), ops=rows))
+
+    db_path = os.path.join(workdir, "bench_segelliste.db")
+    db = sdb.SchiffsDatenbank(db_path)
+    db.init_database()
+    record('segelliste_import', measure(
+        lambda: db.upsert_ships(sdb.transform_segelliste(df).to_dict('records')), ops=rows, repeat=1))
+    db.close()
+    return results
+
+def fill_positions(db: sdb.SchiffsDatenbank, count: int, seed: int = 7):
+    """Füllt die Positions-Historie direkt (Intervalle, das letzte je Schiff offen)"""
+    rng = random.Random(seed)
+    ship_ids = [row[0] for row in db.conn.execute("SELECT id FROM schiffe ORDER BY id")]
+    if not ship_ids:
+        return
+    per_ship = max(1, count // len(ship_ids))
+    start = datetime(2023, 1, 1)
+
+    def rows():
+        for ship_id in ship_ids:
+            t = start + timedelta(hours=rng.randint(0, 2000))
+            for n in range(per_ship):
+                ankunft = t
+                abfahrt = t + timedelta(hours=rng.randint(6, 60))
+                t = abfahrt + timedelta(hours=rng.randint(24, 400))
+                last = n == per_ship - 1
+                yield (ship_id, rng.choice(LIEGEORTE), ankunft.strftime('%Y-%m-%d %H:%M:%S'),
+                       None if last else abfahrt.strftime('%Y-%m-%d %H:%M:%S'),
+                       'aktiv' if last else 'beendet', abfahrt.strftime('%Y-%m-%d %H:%M:%S'))
+
+    with db.transaction():
+        db.cursor.executemany("""
+            INSERT INTO positionen (schiff_id, liegeort, ankunft, abfahrt, status, zuletzt_gesehen)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows())
+
+# ============================================
+# MESSUNG
+# ============================================
+def measure(func: Callable, ops: int = 1, repeat: int = REPEAT, setup: Optional[Callable] = None) -> Dict:
+    """Führt func mehrfach aus und gibt die beste Laufzeit zurück"""
+    best = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {
+        'seconds': round(best, 6),
+        'ops': ops,
+        'per_op_ms': round(best * 1000 / ops, 4),
+    }
+
+def run_size(size: int, positions: int, workdir: str) -> List[Dict]:
+    """Führt alle Benchmarks für eine Registergröße aus"""
+    results = []
+    db_path = os.path.join(workdir, f"bench_{size}.db")
+    db = sdb.SchiffsDatenbank(db_path)
+    db.init_database()
+    ships = synthetic_ships(size)
+    rng = random.Random(size)
+
+    def record(name: str, data: Dict, **extra):
+        entry = {'name': name, 'size': size, 'positions': positions, **data, **extra}
+        results.append(entry)
+        print(f"  {name:<28} {data['seconds']:>10.4f}s  {data['per_op_ms']:>10.4f} ms/op")
+
+    print(f"\n=== {size} Schiffe ===")
+
+    # Bulk-Upsert: erster Lauf = Einfügen, zweiter Lauf = unverändert
+    record('upsert_ships_insert', measure(lambda: db.upsert_ships(ships), ops=size, repeat=1))
+    record('upsert_ships_unchanged', measure(lambda: db.upsert_ships(ships), ops=size))
+    changed = [dict(s, laenge=s['laenge'] + 1) for s in ships]
+    record('upsert_ships_update', measure(lambda: db.upsert_ships(changed), ops=size, repeat=1))
+
+    if positions:
+        fill_start = time.perf_counter()
+        fill_positions(db, positions)
+        print(f"  ({positions} Positionen erzeugt in {time.perf_counter() - fill_start:.1f}s)")
+
+    # Einzel-Inserts über add_ship (jeweils eigener Commit)
+    counter = iter(range(10 ** 9))
+
+    def add_ships():
+        for _ in range(ADD_SHIP_CALLS):
+            db.add_ship(f"BENCH SHIP {next(counter)}", laenge=200.0, liegeort='CTT')
+    record('add_ship', measure(add_ships, ops=ADD_SHIP_CALLS, repeat=1))
+
+    record('get_all_ships', measure(lambda: db.get_all_ships(), ops=1))
+    record('iter_ships', measure(lambda: sum(1 for _ in db.iter_ships()), ops=1))
+    record('get_ships_page', measure(lambda: db.get_ships_page(limit=100, after_name='M'), ops=1))
+
+    terms = [rng.choice(ships)['name'].split()[-2] for _ in range(QUERY_CALLS)]
+    record('search_ship', measure(lambda: [db.search_ship(t) for t in terms], ops=len(terms)))
+    fuzzy = [rng.choice(ships)['name'][:-3].replace('A', 'E', 1) for _ in range(QUERY_CALLS)]
+    record('search_ships_ranked', measure(lambda: [db.search_ships_ranked(t) for t in fuzzy], ops=len(fuzzy)))
+    prefixes = [rng.choice(ships)['name'][:12] for _ in range(QUERY_CALLS)]
+    record('find_best_match', measure(lambda: [db.find_best_match(t) for t in prefixes], ops=len(prefixes)))
+
+    mmsis = [rng.choice(ships)['mmsi_nummer'] for _ in range(QUERY_CALLS)]
+    record('get_by_mmsi', measure(lambda: [db.get_by_mmsi(m) for m in mmsis], ops=len(mmsis)))
+
+    record('get_statistics', measure(lambda: [db.get_statistics() for _ in range(STATS_CALLS)], ops=STATS_CALLS))
+    record('refresh_statistics', measure(lambda: db.refresh_statistics(full=True), ops=1))
+
+    # HHLA-Projektion: Vollabgleich (alle Namen) und Delta (1 % der Schiffe)
+    names = [s['name'] for s in ships]
+    record('hhla_projection_full', measure(lambda: db.load_hhla_projection(names=names), ops=1))
+    delta_ids = list(range(1, max(2, size // 100)))
+    record('hhla_projection_delta', measure(lambda: db.load_hhla_projection(ship_ids=delta_ids), ops=1))
+
+    if positions:
+        windows = []
+        for _ in range(QUERY_CALLS):
+            von = datetime(2023, 1, 1) + timedelta(days=rng.randint(0, 700))
+            windows.append((rng.choice(LIEGEORTE), von, von + timedelta(days=1)))
+        record('ships_at', measure(lambda: [db.ships_at(l, v, b) for l, v, b in windows], ops=len(windows)))
+        observations = [(s['name'], rng.choice(LIEGEORTE), None, None) for s in rng.sample(ships, min(1000, size))]
+        record('record_positions', measure(lambda: db.record_positions(observations),
+                                           ops=len(observations), repeat=1))
+
+    db.close()
+    for suffix in ('', '-wal', '-shm'):
+        try:
+            os.remove(db_path + suffix)
+        except OSError:
+            pass
+    return results
+
+# ============================================
+# AUSWERTUNG
+# ============================================
+def check_results(results: List[Dict], baseline: Optional[Dict],
+                  tolerance: float = REGRESSION_TOLERANCE) -> List[str]:
+    """Prüft absolute Grenzwerte und (optional) Verschlechterung gegenüber der Baseline"""
+    problems = []
+    base_index = {}
+    if baseline:
+        base_index = {(r['name'], r['size'], r.get('positions')): r for r in baseline.get('results', [])}
+
+    for r in results:
+        limit = THRESHOLDS_MS.get(r['name'])
+        if limit is not None and r['per_op_ms'] > limit:
+            problems.append(f"{r['name']} ({r['size']}): {r['per_op_ms']:.3f} ms/op > Grenzwert {limit} ms")
+
+        # Nur gleiche Konfiguration vergleichen (Größe und Positionsanzahl)
+        base = base_index.get((r['name'], r['size'], r.get('positions')))
+        if base:
+            allowed = base['per_op_ms'] * (1 + tolerance)
+            delta = r['per_op_ms'] - base['per_op_ms']
+            if r['per_op_ms'] > allowed and delta * r['ops'] > REGRESSION_MIN_DELTA_MS:
+                problems.append(f"{r['name']} ({r['size']}): {r['per_op_ms']:.3f} ms/op, "
+                                f"Baseline {base['per_op_ms']:.3f} ms/op (+{delta / base['per_op_ms'] * 100:.0f}%)")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="Mikro-Benchmarks für die Schiffsdatenbank (SQLite)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                       help=f"Registergrößen (Standard: {' '.join(map(str, DEFAULT_SIZES))})")
+    parser.add_argument("--positions", type=int, default=DEFAULT_POSITIONS,
+                       help=f"Positionen für die größte Registergröße (Standard: {DEFAULT_POSITIONS})")
+    parser.add_argument("--output", type=str, default=RESULT_FILE,
+                       help=f"Ergebnisdatei (Standard: {RESULT_FILE})")
+    parser.add_argument("--baseline", type=str, default=None,
+                       help="Baseline-Datei zum Vergleich (Exit-Code 1 bei Regression)")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE,
+                       help=f"Erlaubte Verschlechterung gegenüber der Baseline (Standard: {REGRESSION_TOLERANCE})")
+    parser.add_argument("--save-baseline", type=str, default=None,
+                       help="Ergebnis zusätzlich als Baseline speichern")
+    parser.add_argument("--segelliste", type=int, default=SEGELLISTE_ROWS,
+                       help=f"Zeilen der synthetischen Segelliste (Standard: {SEGELLISTE_ROWS}, 0 = aus)")
+    parser.add_argument("--workdir", type=str, default=None,
+                       help="Verzeichnis für die temporären Datenbanken (Standard: System-Temp)")
+    args = parser.parse_args()
+
+    # Fortschrittsmeldungen der Datenbank unterdrücken (verfälschen sonst die Zeiten)
+    sdb.logger.setLevel(logging.WARNING)
+
+    sizes = sorted(args.sizes)
+    results = []
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        for size in sizes:
+            # Positions-Historie nur für das größte Register (1M Positionen)
+            positions = args.positions if size == sizes[-1] else min(args.positions, size * 10)
+            results.extend(run_size(size, positions, workdir))
+        if args.segelliste and sdb.SHEETS_AVAILABLE:
+            results.extend(run_segelliste(args.segelliste, workdir))
+
+    report = {
+        'meta': {
+            'zeitpunkt': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'plattform': platform.platform(),
+            'sizes': sizes,
+            'positions': args.positions,
+            'segelliste': args.segelliste,
+            'repeat': REPEAT,
+        },
+        'thresholds_ms': THRESHOLDS_MS,
+        'results': results,
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    problems = check_results(results, baseline, args.tolerance)
+    report['regressions'] = problems
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n✓ Ergebnisse gespeichert: {args.output}")
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"✓ Baseline gespeichert: {args.save_baseline}")
+
+    if problems:
+        print(f"\n✗ {len(problems)} Regression(en) / Grenzwertverletzung(en):")
+        for problem in problems:
+            print(f"  • {problem}")
+        sys.exit(1)
+    print("✓ Keine Regressionen")
+
+if __name__ == "__main__":
+    main()
@@ -7,9 +7,13 @@ Schiffsbilder Formatieren – Formatiert Schiffsnamen in Google Sheets fett, wen
 """
 
 import os
+import sys
 from pathlib import Path
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
+
+# Gemeinsame Sheets-Schicht (geteilte Session, Spalten-Projektion,
+# Retry/Backoff und API-Budget)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import sheets_client
 
 # ============================================
 # KONFIGURATION
@@ -90,35 +94,22 @@ def get_ship_data_from_sheets():
     try:
         print(f"📊 Verbinde mit Google Sheets...")
         
-        creds = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPES)
-        service = build('sheets', 'v4', credentials=creds)
-        
-        # Lese Daten
-        name_col_idx = col_to_index(GOOGLE_NAME_COLUMN)
-        num_col_idx = col_to_index(GOOGLE_NUMBER_COLUMN)
-        max_col = max(name_col_idx, num_col_idx)
-        col_letter = chr(64 + max_col)
-        range_name = f'{GOOGLE_SHEET_NAME}!A:{col_letter}'
+        sh = sheets_client.get_spreadsheet(SERVICE_ACCOUNT_FILE, GOOGLE_SPREADSHEET_ID, SCOPES)
         
-        result = service.spreadsheets().values().get(
-            spreadsheetId=GOOGLE_SPREADSHEET_ID,
-            range=range_name
-        ).execute()
+        # Lese nur Name- und Nummern-Spalte (ein values.batchGet)
+        name_col = sheets_client.column_letter(col_to_index(GOOGLE_NAME_COLUMN))
+        num_col = sheets_client.column_letter(col_to_index(GOOGLE_NUMBER_COLUMN))
+        cols = sheets_client.read_columns(
+            sh, [(GOOGLE_SHEET_NAME, sorted({name_col, num_col}, key=sheets_client.column_number), GOOGLE_START_ROW)]
+        ).get(GOOGLE_SHEET_NAME, {})
         
-        values = result.get('values', [])
-        if not values:
+        if not cols:
             print("⚠️  Keine Daten gefunden")
-            return []
+            return [], sh
         
         # Extrahiere Schiffsdaten
         ships = []
-        for i, row in enumerate(values[GOOGLE_START_ROW - 1:], start=GOOGLE_START_ROW):
-            while len(row) < max_col:
-                row.append('')
-            
-            name = str(row[name_col_idx - 1]).strip() if len(row) >= name_col_idx else ''
-            number = str(row[num_col_idx - 1]).strip() if len(row) >= num_col_idx else ''
-            
+        for i, (name, number) in enumerate(zip(cols[name_col], cols[num_col]), start=GOOGLE_START_ROW):
             if name:  # Nur Zeilen mit Namen
                 ships.append({
                     'row': i,
@@ -127,7 +118,7 @@ def get_ship_data_from_sheets():
                 })
         
         print(f"✅ {len(ships)} Schiffe in Tabelle gefunden")
-        return ships, service
+        return ships, sh
         
     except Exception as e:
         print(f"❌ Fehler beim Lesen: {e}")
@@ -136,7 +127,7 @@ def get_ship_data_from_sheets():
         return [], None
 
 
-def format_ship_names(service, ships, existing_images: set):
+def format_ship_names(sh, ships, existing_images: set):
     """Formatiert Schiffsnamen fett, wenn Bild vorhanden"""
     try:
         print(f"\n🔍 Prüfe welche Schiffe Bilder haben...")
@@ -172,10 +163,10 @@ def format_ship_names(service, ships, existing_images: set):
         
         # Formatiere Zeilen
         if rows_to_format:
-            format_cells_bold(service, rows_to_format, True)
+            format_cells_bold(sh, rows_to_format, True)
         
         if rows_to_unformat:
-            format_cells_bold(service, rows_to_unformat, False)
+            format_cells_bold(sh, rows_to_unformat, False)
         
         return len(rows_to_format)
         
@@ -186,21 +177,17 @@ def format_ship_names(service, ships, existing_images: set):
         return 0
 
 
-def format_cells_bold(service, rows: list, bold: bool):
+def format_cells_bold(sh, rows: list, bold: bool):
     """Formatiert Zellen in Spalte A fett oder normal"""
     if not rows:
         return
     
     try:
-        # Hole Sheet-ID
-        spreadsheet = service.spreadsheets().get(spreadsheetId=GOOGLE_SPREADSHEET_ID).execute()
-        sheet_id = None
-        for sheet in spreadsheet.get('sheets', []):
-            if sheet['properties']['title'] == GOOGLE_SHEET_NAME:
-                sheet_id = sheet['properties']['sheetId']
-                break
-        
-        if sheet_id is None:
+        # Sheet-ID aus den gecachten Metadaten
+        try:
+            sheet_id = sheets_client.get_worksheet(SERVICE_ACCOUNT_FILE, GOOGLE_SPREADSHEET_ID,
+                                                   GOOGLE_SHEET_NAME, scopes=SCOPES).id
+        except sheets_client.WorksheetNotFound:
             print(f"❌ Blatt '{GOOGLE_SHEET_NAME}' nicht gefunden")
             return
         
@@ -233,11 +220,7 @@ def format_cells_bold(service, rows: list, bold: bool):
         batch_size = 100
         for i in range(0, len(requests), batch_size):
             batch = requests[i:i + batch_size]
-            body = {'requests': batch}
-            service.spreadsheets().batchUpdate(
-                spreadsheetId=GOOGLE_SPREADSHEET_ID,
-                body=body
-            ).execute()
+            sh.batch_update({'requests': batch})
         
         status = "fett" if bold else "normal"
         print(f"✅ {len(rows)} Zeilen auf {status} formatiert")
@@ -265,14 +248,14 @@ def main():
         return
     
     # Lese Schiffsdaten
-    ships, service = get_ship_data_from_sheets()
+    ships, sh = get_ship_data_from_sheets()
     
-    if not ships or not service:
+    if not ships or not sh:
         print("\n❌ Konnte keine Daten lesen. Beende.")
         return
     
     # Formatiere Schiffsnamen
-    formatted_count = format_ship_names(service, ships, existing_images)
+    formatted_count = format_ship_names(sh, ships, existing_images)
     
     print(f"\n{'='*50}")
     print(f"✅ Fertig! {formatted_count} Schiffsnamen fett formatiert")
@@ -20,17 +20,25 @@ from PIL import Image
 from io import BytesIO
 from typing import Optional, Tuple, Dict, List
 
-# Google Sheets Integration
-try:
-    import gspread
-    from google.oauth2.service_account import Credentials
-    SHEETS_AVAILABLE = True
-except ImportError:
-    SHEETS_AVAILABLE = False
-    print("WARNUNG: gspread nicht verfügbar. Google Sheets-Funktionen deaktiviert.")
-
 # Importiere Funktionen aus bilder_downloader.py
 sys.path.insert(0, os.path.dirname(__file__))
+
+# Google Sheets über die gemeinsame Sheets-Schicht sheets_client
+# (Spalten-Projektion: nur benötigte Spalten per values.batchGet lesen)
+import sheets_client
+SHEETS_AVAILABLE = sheets_client.GSPREAD_AVAILABLE
+if not SHEETS_AVAILABLE:
+    print("WARNUNG: gspread nicht verfügbar. Google Sheets-Funktionen deaktiviert.")
+
+# Lokale Schiffsdatenbank für indizierte Name/MMSI-Auflösung (Fallback: Google Sheets)
+try:
+    import sqlite3
+    from Schiffs_Datenbank import SchiffsDatenbank, DB_PATH
+    DB_AVAILABLE = True
+except Exception:
+    DB_AVAILABLE = False
+    print("WARNUNG: Schiffs_Datenbank nicht verfügbar. Name/MMSI werden aus Google Sheets gelesen.")
+
 try:
     from bilder_downloader import sanitize_filename, download_image, resize_image
 except ImportError:
@@ -128,6 +136,9 @@ BASE_UPLOAD_FOLDER = '/root/Skrip/Datenbank/Schiffsbilder'
 MAX_WIDTH = 1024
 QUALITY = 85
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp', 'bmp'}
+# Unvollständige Namen (z.B. "BALTIC TRANSP") nur bei exaktem oder
+# Präfix-Treffer (Score 1.0/0.9) auflösen, nicht bei Tippfehler-Treffern
+DB_NAME_MIN_SCORE = 0.9
 
 # Google Sheets Konfiguration
 if os.name == 'nt':  # Windows
@@ -142,19 +153,54 @@ SHEET_NAME = "Schiffsdaten HHLA"
 os.makedirs(BASE_UPLOAD_FOLDER, exist_ok=True)
 
 def get_google_sheets_connection():
-    """Stellt Verbindung zu Google Sheets her"""
+    """
+    Gibt das Spreadsheet-Handle zurück. Session, Token und Handle kommen aus
+    dem prozessweiten Cache – pro Request fällt keine Anmeldung mehr an.
+    """
     if not SHEETS_AVAILABLE:
         return None
     try:
-        scopes = ["https://www.googleapis.com/auth/spreadsheets"]
-        credentials = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=scopes)
-        gc = gspread.authorize(credentials)
-        sh = gc.open_by_url(SPREADSHEET_URL)
-        return sh
+        return sheets_client.get_spreadsheet(SERVICE_ACCOUNT_FILE, SPREADSHEET_URL)
     except Exception as e:
         print(f"Fehler bei Google Sheets Verbindung: {e}")
         return None
 
+_schiffs_db = None
+
+def get_schiffs_db() -> Optional['SchiffsDatenbank']:
+    """Gibt die (einmalig geöffnete) lokale Schiffsdatenbank zurück, falls vorhanden"""
+    global _schiffs_db
+    if not DB_AVAILABLE or not os.path.exists(DB_PATH):
+        return None
+    if _schiffs_db is None:
+        _schiffs_db = SchiffsDatenbank(DB_PATH)
+    return _schiffs_db
+
+def lookup_ship_in_db(name: Optional[str] = None, mmsi: Optional[str] = None) -> Optional[Dict]:
+    """
+    Sucht ein Schiff per Name (inkl. früherer Namen) oder MMSI in der lokalen Datenbank.
+    Ohne exakten Namenstreffer wird der beste Treffer der gerankten Suche
+    (find_best_match) genommen, wenn er mindestens DB_NAME_MIN_SCORE erreicht.
+    """
+    db = get_schiffs_db()
+    if not db:
+        return None
+    try:
+        if mmsi:
+            return db.get_by_mmsi(mmsi)
+        if name:
+            ship = db.get_by_name(name)
+            if ship:
+                return ship
+            match = db.find_best_match(name)
+            if match and (match['score'] or 0) >= DB_NAME_MIN_SCORE:
+                print(f"Name '{name}' aufgelöst zu '{match['name']}' (Score {match['score']})")
+                return match
+            return None
+    except sqlite3.Error as e:
+        print(f"Fehler bei Datenbank-Suche: {e}")
+    return None
+
 def get_ships_without_image() -> List[Dict]:
     """Holt alle Schiffe mit 'Keine Bild' in Spalte K"""
     sh = get_google_sheets_connection()
@@ -162,21 +208,12 @@ def get_ships_without_image() -> List[Dict]:
         return []
     
     try:
-        worksheet = sh.worksheet(SHEET_NAME)
-        all_data = worksheet.get_all_values()
-        
-        if len(all_data) < 2:
-            return []
+        # Nur Spalten A (Name), C (MMSI) und K (Bild) ab Zeile 2 lesen
+        cols = sheets_client.read_columns(sh, [(SHEET_NAME, "A C K", 2)]).get(SHEET_NAME, {})
         
         ships = []
-        for i, row in enumerate(all_data[1:], start=2):  # Überspringe Header
-            if len(row) < 11:  # Mindestens Spalte K (Index 10)
-                continue
-            
-            ship_name = row[0].strip() if len(row) > 0 else ''  # Spalte A
-            mmsi = row[2].strip() if len(row) > 2 else ''  # Spalte C
-            k_value = row[10].strip() if len(row) > 10 else ''  # Spalte K
-            
+        for i, (ship_name, mmsi, k_value) in enumerate(zip(cols.get('A', []), cols.get('C', []),
+                                                           cols.get('K', [])), start=2):
             if ship_name and k_value and 'keine bild' in k_value.lower():
                 ships.append({
                     'name': ship_name,
@@ -190,26 +227,26 @@ def get_ships_without_image() -> List[Dict]:
         print(f"Fehler beim Lesen der Schiffe: {e}")
         return []
 
+def get_name_mmsi_columns(sh) -> List[Tuple[str, str]]:
+    """Liest nur Spalte A (Name) und C (MMSI) ab Zeile 2 → Liste (Name, MMSI)"""
+    cols = sheets_client.read_columns(sh, [(SHEET_NAME, "A C", 2)]).get(SHEET_NAME, {})
+    return list(zip(cols.get('A', []), cols.get('C', [])))
+
 def find_mmsi_by_name(ship_name: str) -> Optional[str]:
-    """Sucht MMSI-Nummer basierend auf Schiffsname"""
+    """Sucht MMSI-Nummer basierend auf Schiffsname (zuerst lokale DB, dann Google Sheets)"""
+    ship = lookup_ship_in_db(name=ship_name)
+    if ship and ship.get('mmsi_nummer'):
+        return ship['mmsi_nummer']
+    
     sh = get_google_sheets_connection()
     if not sh:
         return None
     
     try:
-        worksheet = sh.worksheet(SHEET_NAME)
-        all_data = worksheet.get_all_values()
-        
         ship_name_upper = ship_name.upper().strip()
         
-        for row in all_data[1:]:  # Überspringe Header
-            if len(row) < 3:
-                continue
-            
-            name = row[0].strip().upper() if len(row) > 0 else ''
-            mmsi = row[2].strip() if len(row) > 2 else ''
-            
-            if name == ship_name_upper and mmsi:
+        for name, mmsi in get_name_mmsi_columns(sh):
+            if name.upper() == ship_name_upper and mmsi:
                 return mmsi
         
         return None
@@ -238,14 +275,15 @@ def extract_name_and_mmsi(text: str) -> Tuple[Optional[str], Optional[str]]:
     # Wenn Name leer, versuche MMSI aus Google Sheets zu finden
     if not name and mmsi:
         # Suche Name basierend auf MMSI
-        sh = get_google_sheets_connection()
+        ship = lookup_ship_in_db(mmsi=mmsi)
+        if ship:
+            name = ship['name']
+        sh = get_google_sheets_connection() if not name else None
         if sh:
             try:
-                worksheet = sh.worksheet(SHEET_NAME)
-                all_data = worksheet.get_all_values()
-                for row in all_data[1:]:
-                    if len(row) > 2 and row[2].strip() == mmsi:
-                        name = row[0].strip() if len(row) > 0 else None
+                for sheet_name, sheet_mmsi in get_name_mmsi_columns(sh):
+                    if sheet_mmsi == mmsi:
+                        name = sheet_name or None
                         break
             except:
                 pass
@@ -397,6 +435,41 @@ def ships_without_image():
         'ships': ships
     })
 
+@app.route('/api/ships', methods=['GET'])
+def list_ships():
+    """Listet Schiffe aus der lokalen Datenbank seitenweise (?limit=100&after=NAME&liegeort=CTT)"""
+    db = get_schiffs_db()
+    if not db:
+        return jsonify({'error': 'Schiffsdatenbank nicht verfügbar'}), 503
+    
+    limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+    after = request.args.get('after') or None
+    filters = {key: request.args[key] for key in ('liegeort', 'status', 'flagge', 'typ')
+               if request.args.get(key)}
+    try:
+        page = db.get_ships_page(limit=limit, after_name=after, filters=filters)
+    except sqlite3.Error as e:
+        return jsonify({'error': f'Datenbankfehler: {e}'}), 500
+    
+    return jsonify({
+        'success': True,
+        'count': len(page['ships']),
+        'ships': page['ships'],
+        'next_after': page['next_after']
+    })
+
+@app.route('/api/stats', methods=['GET'])
+def ship_statistics():
+    """Statistiken der Schiffsdatenbank (Trigger-gepflegte Zähler, günstig für Polling)"""
+    db = get_schiffs_db()
+    if not db:
+        return jsonify({'error': 'Schiffsdatenbank nicht verfügbar'}), 503
+    try:
+        stats = db.get_statistics()
+    except sqlite3.Error as e:
+        return jsonify({'error': f'Datenbankfehler: {e}'}), 500
+    return jsonify({'success': True, **stats})
+
 @app.route('/api/extract-ship-info', methods=['POST'])
 def extract_ship_info():
     """Extrahiert Name und MMSI aus Text"""
@@ -10,7 +10,6 @@ from datetime import datetime, timedelta
 
 import pandas as pd
 import gspread
-from google.oauth2.service_account import Credentials
 
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
@@ -18,6 +17,10 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from webdriver_manager.chrome import ChromeDriverManager
 
+# Minimal-Diff-Schreiben (nur geänderte Bereiche statt clear + rewrite)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import sheets_client
+
 # ============================================================
 # KONFIGURATION
 # ============================================================
@@ -193,22 +196,18 @@ def update_google_sheets(original_filename, segelliste_path):
     col_count = len(df.columns)
     log(f"Excel geladen – Zeilen: {row_count}, Spalten: {col_count}")
 
-    scopes = ["https://www.googleapis.com/auth/spreadsheets"]
-    credentials = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=scopes)
-    gc = gspread.authorize(credentials)
-    sh = gc.open_by_url(SPREADSHEET_URL)
-
-    # Blatt Segelliste
+    # Blatt Segelliste (Session und Blatt-Metadaten aus sheets_client)
     try:
-        seg = sh.worksheet("Segelliste")
+        seg = sheets_client.get_worksheet(SERVICE_ACCOUNT_FILE, SPREADSHEET_URL, "Segelliste")
     except gspread.WorksheetNotFound:
-        seg = sh.add_worksheet(title="Segelliste", rows="2000", cols="40")
+        seg = sheets_client.get_worksheet(SERVICE_ACCOUNT_FILE, SPREADSHEET_URL, "Segelliste",
+                                          create=True, rows=2000, cols=40)
         log("Blatt 'Segelliste' neu angelegt.")
 
-    seg.clear()
-    seg.update(values=[[os.path.basename(original_filename)]], range_name="A1")
-    seg.update(values=[df.columns.tolist()] + df.values.tolist(), range_name="A2")
-    log("Google Sheet 'Segelliste' aktualisiert.")
+    # Nur Änderungen schreiben (meist nur einige ETAs), Rest bleibt unangetastet
+    target = [[os.path.basename(original_filename)], df.columns.tolist()] + df.values.tolist()
+    stats = sheets_client.write_grid(seg, target)
+    log(f"Google Sheet 'Segelliste' aktualisiert: {sheets_client.format_diff_stats(stats)}")
 
     if col_count < 5:
         log("Warnung: Erwartete Spalten für Schiffslänge nicht vollständig (mindestens 5).", level="warning")
@@ -223,19 +222,21 @@ def update_google_sheets(original_filename, segelliste_path):
     values = [['Name', 'Länge']] + data_ctt[['Name', 'Länge']].values.tolist()
 
     try:
-        sl = sh.worksheet("Schiffslänge")
+        sl = sheets_client.get_worksheet(SERVICE_ACCOUNT_FILE, SPREADSHEET_URL, "Schiffslänge")
     except gspread.WorksheetNotFound:
-        sl = sh.add_worksheet(title="Schiffslänge", rows="1000", cols="5")
+        sl = sheets_client.get_worksheet(SERVICE_ACCOUNT_FILE, SPREADSHEET_URL, "Schiffslänge",
+                                         create=True, rows=1000, cols=5)
         log("Blatt 'Schiffslänge' neu angelegt.")
 
-    sl.clear()
-    sl.update(values=values, range_name="A1")
-    log(f"Google Sheet 'Schiffslänge' aktualisiert. Einträge: {len(values) - 1}")
+    stats = sheets_client.write_grid(sl, values)
+    log(f"Google Sheet 'Schiffslänge' aktualisiert. Einträge: {len(values) - 1} "
+        f"({sheets_client.format_diff_stats(stats)})")
 
 
 def main():
     start_ts = time.time()
     log("=== Start segelliste_upload.py ===")
+    sheets_client.enable_budget_report(os.path.join(LOG_DIR, "sheets_api_budget_segelliste.json"), log=log)
     log(f"Download-Verzeichnis: {DOWNLOAD_DIR}")
     log(f"Headless-Modus: {'Ja' if HEADLESS else 'Nein'}")
     log(f"Behalte Timestamp-Dateien: {KEEP_TIMESTAMP_FILES}")
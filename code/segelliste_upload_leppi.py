@@ -1,15 +1,19 @@
 import glob
 import os
+import sys
 import time
 import pandas as pd
-import gspread
-from google.oauth2.service_account import Credentials
+
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from webdriver_manager.chrome import ChromeDriverManager
 
+# Gemeinsame Sheets-Schicht (geteilte Session, Retry/Backoff, API-Budget)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import sheets_client
+
 # ======= Einstellungen =======
 download_dir = r"C:\Users\Mirko\Documents\Scripts"
 service_account_file = r"C:\Users\Mirko\Documents\Scripts\service_account.json"
@@ -56,10 +60,7 @@ try:
     df = pd.read_excel(latest_file)
     df = df.fillna("")  # NaN durch leere Strings ersetzen
 
-    scopes = ["https://www.googleapis.com/auth/spreadsheets"]
-    credentials = Credentials.from_service_account_file(service_account_file, scopes=scopes)
-    gc = gspread.authorize(credentials)
-    sh = gc.open_by_url(spreadsheet_url)
+    sh = sheets_client.get_spreadsheet(service_account_file, spreadsheet_url)
     sheet = sh.sheet1
 
     # Tabellenblatt umbenennen
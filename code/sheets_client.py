@@ -0,0 +1,1327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+sheets_client.py
+
+Gemeinsame Google-Sheets-Schicht aller Skripte (Schiffs_Datenbank,
+Schiffsbilder, bilder_downloader, schiffsbilder_formatieren,
+schiffsbilder_server, segelliste_upload, dienstplan).
+
+- Eine Credentials-Instanz und eine HTTP-Session (Keep-Alive-Pool, OAuth-Token
+  wird nur bei Ablauf erneuert) pro Service-Account-Datei und Scope-Kombination;
+  gspread-Clients und googleapiclient-Services (build_service, Discovery aus
+  dem Paket) teilen sich diese Session
+- Spreadsheet-Handles pro URL und Worksheet-Handles pro Blattname werden
+  zwischengespeichert, die Metadaten aller Blätter mit einem einzigen
+  API-Aufruf geladen
+- Thread-sicher: Aufbau und Cache-Zugriffe laufen unter einem Lock
+- WorksheetMirror: lokale Kopie eines Blatts mit Index Name → Zeile;
+  eigene Schreibzugriffe werden lokal nachgezogen, Fremdänderungen über
+  günstige Delta-Lesezugriffe (Schlüsselspalte + neue Zeilen) erkannt
+- BatchWriter: puffert Zell-Updates, fasst benachbarte Zellen zu Rechtecken
+  zusammen und schreibt sie mit einem values.batchUpdate; ein TokenBucket
+  hält das Schreib-Kontingent pro Minute ein
+- read_columns: liest nur die benötigten Spalten mehrerer Blätter mit einem
+  einzigen values.batchGet und liefert typisierte Spalten-Arrays
+- write_grid: schreibt eine Zieltabelle als minimalen Diff (nur geänderte
+  Rechtecke, angehängte Zeilen, geleerte Restzeilen) statt clear + rewrite
+- Instrumentierter Transport (SheetsAdapter in der gemeinsamen Session): Retry mit exponentiellem Backoff und Jitter bei
+  429/5xx (Retry-After wird beachtet), Zähler je Methode, Blatt und
+  aufrufender Funktion, Latenz-Histogramme; am Prozessende ein
+  API-Budget-Bericht (Konsole + JSON)
+- SHEETS_API_ENDPOINT: leitet alle Aufrufe (gspread und googleapiclient über
+  build_service) ohne Anmeldung an einen lokalen Ersatzserver um, z.B.
+  sheets_fake_server.py für Offline-Tests und Benchmarks
+
+Benutzung:
+    from sheets_client import get_spreadsheet, get_worksheet
+    sh = get_spreadsheet(SERVICE_ACCOUNT_FILE, SPREADSHEET_URL)   # URL oder ID
+    ws = get_worksheet(SERVICE_ACCOUNT_FILE, SPREADSHEET_URL, "Segelliste")
+"""
+
+import os
+import sys
+import json
+import time
+import email.utils
+import random
+import atexit
+import bisect
+import tempfile
+import threading
+import itertools
+import weakref
+from urllib.parse import urlsplit, parse_qs, unquote
+from typing import Callable, Dict, List, Optional, Tuple, Sequence, Iterator, Union
+
+try:
+    import gspread
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.exceptions import NewConnectionError, ConnectTimeoutError
+    from google.oauth2.service_account import Credentials
+    from google.auth.transport.requests import AuthorizedSession
+    from gspread import WorksheetNotFound
+    GSPREAD_AVAILABLE = True
+except ImportError:
+    GSPREAD_AVAILABLE = False
+
+    class WorksheetNotFound(Exception):
+        pass
+
+try:
+    from googleapiclient.discovery import build as _build_service
+    GOOGLEAPI_AVAILABLE = True
+except ImportError:
+    GOOGLEAPI_AVAILABLE = False
+
+DEFAULT_SCOPES = ("https://www.googleapis.com/auth/spreadsheets",)
+
+# Ersatz-Endpunkt statt https://sheets.googleapis.com (z.B. http://127.0.0.1:8765)
+ENDPOINT_ENV = "SHEETS_API_ENDPOINT"
+GOOGLE_SHEETS_ROOT = "https://sheets.googleapis.com"
+
+# Retry: bei Kontingent- (429) und Serverfehlern mit exponentiellem Backoff
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# Nicht idempotent: nach 5xx/Timeout evtl. schon ausgeführt → nur 429 bzw.
+# Verbindungsfehler vor dem Senden wiederholen (sonst doppelte Zeilen)
+NON_IDEMPOTENT_METHODS = {"values.append"}
+RETRY_MAX_ATTEMPTS = 6
+RETRY_BASE_SECONDS = 1.0
+RETRY_MAX_SECONDS = 64.0
+# Obergrenzen der Latenz-Histogramm-Klassen
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# Zieldatei des API-Budget-Berichts (Standard: Temp-Verzeichnis)
+BUDGET_FILE_ENV = "SHEETS_BUDGET_FILE"
+
+# WorksheetMirror: Abstand der Delta-Prüfungen bzw. der vollständigen Neuladungen
+MIRROR_REFRESH_SECONDS = 60
+MIRROR_FULL_REFRESH_SECONDS = 900
+
+# BatchWriter: Flush bei so vielen Zellen bzw. wenn die älteste Zelle so alt ist
+BATCH_MAX_CELLS = 500
+BATCH_MAX_AGE_SECONDS = 30
+# Sheets-API: 60 Schreibanfragen pro Minute und Nutzer (Reserve für andere Skripte)
+WRITE_REQUESTS_PER_MINUTE = 50
+WRITE_BURST = 5
+
+_lock = threading.RLock()
+_clients: Dict[Tuple[str, Tuple[str, ...], Optional[str]], "gspread.Client"] = {}
+_spreadsheets: Dict[Tuple[str, str], "gspread.Spreadsheet"] = {}
+_worksheets: Dict[Tuple[str, str], Dict[str, "gspread.Worksheet"]] = {}
+_services: Dict[Tuple[str, Tuple[str, ...], Optional[str]], object] = {}
+_credentials: Dict[Tuple[str, Tuple[str, ...]], object] = {}
+_sessions: Dict[Tuple[str, Tuple[str, ...], Optional[str]], "requests.Session"] = {}
+_stats = {"authorize": 0, "open": 0, "metadata": 0}
+
+
+def _require_gspread():
+    if not GSPREAD_AVAILABLE:
+        raise ImportError("gspread/google-auth nicht verfügbar (pip install gspread google-auth)")
+
+
+def api_endpoint() -> Optional[str]:
+    """Ersatz-Endpunkt aus SHEETS_API_ENDPOINT (None = echte Google-API)"""
+    endpoint = os.environ.get(ENDPOINT_ENV, "").strip()
+    return endpoint.rstrip("/") or None
+
+
+def credentials_required() -> bool:
+    """False, wenn gegen einen Ersatzserver gearbeitet wird (keine Service-Account-Datei nötig)"""
+    return api_endpoint() is None
+
+
+# Methoden, die vom Schreib-Kontingent abgehen
+WRITE_METHODS = {
+    "spreadsheets.batchUpdate", "values.update", "values.batchUpdate",
+    "values.append", "values.clear", "values.batchClear",
+}
+# Module, die bei der Zuordnung zur aufrufenden Funktion übersprungen werden
+_TRANSPORT_MODULES = {
+    "sheets_client", "gspread", "googleapiclient", "google_auth_httplib2", "httplib2",
+    "requests", "urllib3", "google", "http", "socket", "ssl", "threading", "atexit",
+}
+
+
+class ApiMetrics:
+    """
+    Prozessweite Zähler aller Sheets-Aufrufe: je Methode, Blatt und
+    aufrufender Funktion, dazu Latenz-Histogramme, Fehler und Wiederholungen.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.calls: Dict[str, int] = {}
+            self.by_tab: Dict[str, int] = {}
+            self.by_caller: Dict[str, Dict[str, float]] = {}
+            self.status: Dict[str, int] = {}
+            self.latency: Dict[str, Dict] = {}
+            self.retries = 0
+            self.retry_wait_seconds = 0.0
+
+    def record(self, method: str, tabs: Sequence[str], caller: str, status, latency_ms: float):
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            for tab in tabs:
+                self.by_tab[tab] = self.by_tab.get(tab, 0) + 1
+            entry = self.by_caller.setdefault(caller, {"calls": 0, "writes": 0, "latency_ms": 0.0})
+            entry["calls"] += 1
+            entry["writes"] += method in WRITE_METHODS
+            entry["latency_ms"] += latency_ms
+            self.status[str(status)] = self.status.get(str(status), 0) + 1
+            hist = self.latency.setdefault(method, {
+                "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                "buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+            })
+            hist["count"] += 1
+            hist["total_ms"] += latency_ms
+            hist["max_ms"] = max(hist["max_ms"], latency_ms)
+            hist["buckets"][bisect.bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+
+    def record_retry(self, wait_seconds: float):
+        with self._lock:
+            self.retries += 1
+            self.retry_wait_seconds += wait_seconds
+
+    def total_calls(self) -> int:
+        """Anzahl bisheriger Aufrufe (für Differenzen um einen Arbeitsschritt)"""
+        with self._lock:
+            return sum(self.calls.values())
+
+    def summary(self) -> Dict:
+        """Auswertung als JSON-taugliches Dict"""
+        with self._lock:
+            total = sum(self.calls.values())
+            writes = sum(n for m, n in self.calls.items() if m in WRITE_METHODS)
+            labels = [f"<{b}ms" for b in LATENCY_BUCKETS_MS] + [f">={LATENCY_BUCKETS_MS[-1]}ms"]
+            return {
+                "started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started)),
+                "duration_seconds": round(time.time() - self.started, 1),
+                "calls_total": total,
+                "reads": total - writes,
+                "writes": writes,
+                "retries": self.retries,
+                "retry_wait_seconds": round(self.retry_wait_seconds, 2),
+                "status": dict(self.status),
+                "calls_by_method": dict(sorted(self.calls.items(), key=lambda kv: -kv[1])),
+                "calls_by_tab": dict(sorted(self.by_tab.items(), key=lambda kv: -kv[1])),
+                "calls_by_caller": {
+                    caller: {"calls": e["calls"], "writes": e["writes"], "latency_ms": round(e["latency_ms"], 1)}
+                    for caller, e in sorted(self.by_caller.items(), key=lambda kv: -kv[1]["calls"])
+                },
+                "latency_ms": {
+                    method: {
+                        "count": h["count"],
+                        "avg": round(h["total_ms"] / h["count"], 1),
+                        "max": round(h["max_ms"], 1),
+                        "histogram": dict(zip(labels, h["buckets"])),
+                    }
+                    for method, h in self.latency.items()
+                },
+            }
+
+
+# Prozessweite Zähler (siehe budget_report)
+metrics = ApiMetrics()
+_budget = {"path": None, "log": print, "registered": False}
+
+def classify_request(http_method: str, url: str, body=None) -> Tuple[str, List[str]]:
+    """
+    Ordnet einen HTTP-Aufruf der Sheets-API einer Methode zu
+    (z.B. 'values.batchGet') und ermittelt die betroffenen Blätter.
+    """
+    parts = urlsplit(url)
+    path = parts.path
+    marker = "/v4/spreadsheets/"
+    if marker not in path:
+        return f"{http_method} {path}", []
+    rest = path.split(marker, 1)[1]
+    rest = rest[rest.find("/"):] if "/" in rest else rest[rest.find(":"):] if ":" in rest else ""
+    query = parse_qs(parts.query)
+
+    def titles(ranges) -> List[str]:
+        result = []
+        for a1 in ranges:
+            a1 = unquote(str(a1))
+            title = a1.rsplit("!", 1)[0] if "!" in a1 else a1
+            if title.startswith("'") and title.endswith("'"):
+                title = title[1:-1].replace("''", "'")
+            if title not in result:
+                result.append(title)
+        return result
+
+    def payload() -> Dict:
+        if not body:
+            return {}
+        try:
+            return json.loads(body.decode("utf-8") if isinstance(body, bytes) else body)
+        except (ValueError, UnicodeDecodeError):
+            return {}
+
+    if rest == "":
+        return "spreadsheets.get", []
+    if rest == ":batchUpdate":
+        return "spreadsheets.batchUpdate", []
+    if rest == "/values:batchGet":
+        return "values.batchGet", titles(query.get("ranges", []))
+    if rest == "/values:batchUpdate":
+        return "values.batchUpdate", titles(d.get("range", "") for d in payload().get("data", []))
+    if rest == "/values:batchClear":
+        return "values.batchClear", titles(payload().get("ranges", []))
+    if rest.startswith("/values/"):
+        a1 = rest[len("/values/"):]
+        for suffix, method in ((":append", "values.append"), (":clear", "values.clear")):
+            if a1.endswith(suffix):
+                return method, titles([a1[:-len(suffix)]])
+        return ("values.get" if http_method.upper() == "GET" else "values.update"), titles([a1])
+    return f"{http_method} {rest}", []
+
+
+def _caller() -> str:
+    """Erste Funktion außerhalb der Transport-Schichten (z.B. 'Schiffs_Datenbank.sync_schiffsdaten')"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.split(".")[0] not in _TRANSPORT_MODULES:
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "<hintergrund>"
+
+
+def _retry_after_seconds(value) -> Optional[float]:
+    """Retry-After als Sekunden (Zahl oder HTTP-Datum)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Exponentielles Backoff mit Jitter; ein Retry-After des Servers hat Vorrang"""
+    if retry_after is not None:
+        return retry_after + random.uniform(0, 1)
+    return random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * (2 ** attempt)))
+
+
+def _send_with_retry(send: Callable, http_method: str, url: str, body,
+                     status_of: Callable, retry_after_of: Callable, network_errors: Tuple,
+                     unsent: Callable[[BaseException], bool] = lambda exc: False):
+    """
+    Gemeinsame Retry-Schleife beider Transporte: misst jeden Versuch und
+    wiederholt bei 429/5xx bzw. Netzwerkfehlern bis RETRY_MAX_ATTEMPTS.
+    
+    Nicht idempotente Aufrufe (NON_IDEMPOTENT_METHODS) werden nur bei 429
+    und bei Netzwerkfehlern wiederholt, für die unsent() bestätigt, dass die
+    Anfrage den Server nie erreicht hat. Verworfene Antworten werden
+    geschlossen, damit die Verbindung in den Pool zurückgeht.
+    """
+    method, tabs = classify_request(http_method, url, body)
+    idempotent = method not in NON_IDEMPOTENT_METHODS
+    caller = _caller()
+    _ensure_budget_report()
+    for attempt in range(RETRY_MAX_ATTEMPTS):
+        last = attempt == RETRY_MAX_ATTEMPTS - 1
+        start = time.perf_counter()
+        try:
+            response = send()
+        except network_errors as exc:
+            metrics.record(method, tabs, caller, "network", (time.perf_counter() - start) * 1000)
+            if last or not (idempotent or unsent(exc)):
+                raise
+            delay = backoff_delay(attempt)
+        else:
+            status = status_of(response)
+            metrics.record(method, tabs, caller, status, (time.perf_counter() - start) * 1000)
+            if status not in RETRY_STATUS or last or not (idempotent or status == 429):
+                return response
+            delay = backoff_delay(attempt, _retry_after_seconds(retry_after_of(response)))
+            response.close()
+        metrics.record_retry(delay)
+        time.sleep(delay)
+
+
+if GSPREAD_AVAILABLE:
+    class SheetsAdapter(HTTPAdapter):
+        """
+        Transport für gspread/requests: Retry mit Backoff, Messung und
+        optional Umleitung von sheets.googleapis.com auf SHEETS_API_ENDPOINT.
+        """
+
+        def __init__(self, endpoint: Optional[str] = None):
+            super().__init__()
+            self.endpoint = endpoint
+
+        def send(self, request, **kwargs):
+            if self.endpoint and request.url.startswith(GOOGLE_SHEETS_ROOT):
+                request.url = self.endpoint + request.url[len(GOOGLE_SHEETS_ROOT):]
+            return _send_with_retry(
+                lambda: super(SheetsAdapter, self).send(request, **kwargs),
+                request.method, request.url, request.body,
+                status_of=lambda r: r.status_code,
+                retry_after_of=lambda r: r.headers.get("Retry-After"),
+                network_errors=(requests.ConnectionError, requests.Timeout),
+                unsent=_request_unsent,
+            )
+
+    def _request_unsent(exc: BaseException) -> bool:
+        """True, wenn requests die Verbindung gar nicht erst aufbauen konnte"""
+        if isinstance(exc, requests.ConnectTimeout):
+            return True
+        reason = exc.args[0] if exc.args else None
+        reason = getattr(reason, "reason", reason)  # urllib3 MaxRetryError
+        return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+class SessionHttp:
+    """
+    httplib2-kompatible Hülle um eine requests-Session: googleapiclient nutzt
+    so dieselbe Verbindung, dasselbe Token und denselben instrumentierten
+    Transport (SheetsAdapter) wie gspread.
+    """
+
+    def __init__(self, session: "requests.Session"):
+        self.session = session
+
+    def request(self, uri, method="GET", body=None, headers=None, *args, **kwargs):
+        import httplib2
+        r = self.session.request(method, uri, data=body, headers=headers)
+        info = {key.lower(): value for key, value in r.headers.items()}
+        info["status"] = str(r.status_code)
+        response = httplib2.Response(info)
+        response.reason = r.reason
+        return response, r.content
+
+    def close(self):
+        # Die Session gehört dem Registry-Cache und bleibt offen
+        pass
+
+
+def instrument_client(client: "gspread.Client", endpoint: Optional[str] = None) -> "gspread.Client":
+    """Hängt den instrumentierten Transport in die Session eines fremden gspread-Clients"""
+    client.http_client.session.mount(GOOGLE_SHEETS_ROOT, SheetsAdapter(endpoint))
+    return client
+
+
+def _ensure_budget_report():
+    if not _budget["registered"]:
+        with _lock:
+            if not _budget["registered"]:
+                atexit.register(_report_at_exit)
+                _budget["registered"] = True
+
+
+def enable_budget_report(path: Optional[str] = None, log: Callable[[str], None] = print):
+    """
+    Legt fest, wohin der API-Budget-Bericht am Prozessende geschrieben wird
+    (Standard: $SHEETS_BUDGET_FILE bzw. sheets_api_budget_<skript>.json im
+    Temp-Verzeichnis) und über welche Funktion er ausgegeben wird.
+    """
+    _budget["path"] = path
+    _budget["log"] = log
+    _ensure_budget_report()
+
+
+def _default_budget_path() -> str:
+    script = os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0] or "python"
+    return os.environ.get(BUDGET_FILE_ENV) or os.path.join(tempfile.gettempdir(),
+                                                           f"sheets_api_budget_{script}.json")
+
+
+def format_budget(summary: Dict, top: int = 8) -> List[str]:
+    """Bericht als Textzeilen"""
+    lines = [
+        f"{summary['calls_total']} Sheets-Aufrufe ({summary['reads']} Lesen, {summary['writes']} Schreiben) "
+        f"in {summary['duration_seconds']} s, {summary['retries']} Wiederholungen "
+        f"({summary['retry_wait_seconds']} s gewartet)"
+    ]
+    errors = {s: n for s, n in summary["status"].items() if s != "200"}
+    if errors:
+        lines.append("  Fehlerstatus: " + ", ".join(f"{s}×{n}" for s, n in errors.items()))
+    for method, h in summary["latency_ms"].items():
+        lines.append(f"  {method:<26} {summary['calls_by_method'][method]:>5}×  "
+                     f"Ø {h['avg']:>7.1f} ms  max {h['max']:>8.1f} ms")
+    if summary["calls_by_tab"]:
+        lines.append("  Nach Blatt: " + ", ".join(
+            f"{tab} {n}" for tab, n in list(summary["calls_by_tab"].items())[:top]))
+    for caller, e in list(summary["calls_by_caller"].items())[:top]:
+        lines.append(f"  {caller:<48} {e['calls']:>5} Aufrufe ({e['writes']} Schreiben, "
+                     f"{e['latency_ms'] / 1000:.1f} s)")
+    return lines
+
+
+def budget_report(path: Optional[str] = None, log: Optional[Callable[[str], None]] = None) -> Dict:
+    """Gibt den API-Budget-Bericht aus und schreibt ihn als JSON; liefert die Auswertung"""
+    log = log or _budget["log"]
+    summary = metrics.summary()
+    log("=== Sheets-API-Budget ===")
+    for line in format_budget(summary):
+        log(line)
+    path = path or _budget["path"] or _default_budget_path()
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        log(f"API-Budget gespeichert: {path}")
+    except OSError as e:
+        log(f"⚠️  API-Budget konnte nicht gespeichert werden: {e}")
+    return summary
+
+
+def _report_at_exit():
+    if metrics.summary()["calls_total"]:
+        try:
+            budget_report()
+        except Exception as e:  # am Prozessende nie mit Traceback abbrechen
+            print(f"⚠️  API-Budget-Bericht fehlgeschlagen: {e}")
+
+
+def get_credentials(service_account_file: str, scopes: Sequence[str] = DEFAULT_SCOPES):
+    """
+    Gibt die (gecachten) Service-Account-Credentials zurück; gegen den
+    Ersatzserver (SHEETS_API_ENDPOINT) anonyme Credentials.
+    """
+    _require_gspread()
+    key = (service_account_file, tuple(scopes))
+    with _lock:
+        credentials = _credentials.get(key)
+        if credentials is None:
+            if not credentials_required():
+                from google.auth.credentials import AnonymousCredentials
+                credentials = AnonymousCredentials()
+            else:
+                if not os.path.exists(service_account_file):
+                    raise FileNotFoundError(f"Service Account Datei nicht gefunden: {service_account_file}")
+                credentials = Credentials.from_service_account_file(service_account_file, scopes=list(scopes))
+            _credentials[key] = credentials
+        return credentials
+
+
+def get_session(service_account_file: str, scopes: Sequence[str] = DEFAULT_SCOPES) -> "requests.Session":
+    """
+    Gibt die gemeinsame HTTP-Session (Keep-Alive-Pool + OAuth-Token) zurück,
+    über die alle Sheets-Aufrufe dieses Service Accounts laufen – gspread wie
+    googleapiclient. Der instrumentierte Transport ist bereits eingehängt.
+    """
+    _require_gspread()
+    endpoint = api_endpoint()
+    key = (service_account_file, tuple(scopes), endpoint)
+    with _lock:
+        session = _sessions.get(key)
+        if session is None:
+            if endpoint:
+                session = requests.Session()
+            else:
+                session = AuthorizedSession(get_credentials(service_account_file, scopes))
+            session.mount(GOOGLE_SHEETS_ROOT, SheetsAdapter(endpoint))
+            if endpoint:
+                # googleapiclient spricht den Ersatzserver direkt an
+                session.mount(endpoint, SheetsAdapter())
+            _sessions[key] = session
+            _stats["authorize"] += 1
+        return session
+
+
+def get_client(service_account_file: str,
+               scopes: Sequence[str] = DEFAULT_SCOPES) -> "gspread.Client":
+    """
+    Gibt den gspread-Client für diesen Service Account zurück.
+
+    Der Client wird nur beim ersten Aufruf erstellt und nutzt die gemeinsame
+    Session (get_session); Token und Verbindungen werden wiederverwendet.
+    """
+    _require_gspread()
+    key = (service_account_file, tuple(scopes), api_endpoint())
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = gspread.Client(None, session=get_session(service_account_file, scopes))
+            _clients[key] = client
+        return client
+
+
+def build_service(service_account_file: str, scopes: Sequence[str] = DEFAULT_SCOPES):
+    """
+    Gibt den (gecachten) googleapiclient-Service für die Sheets-API v4 zurück,
+    für Code, der die Discovery-Schnittstelle braucht.
+
+    Das Discovery-Dokument kommt aus dem Paket (static_discovery, kein
+    Netzwerkaufruf); die Aufrufe laufen über die gemeinsame Session.
+    """
+    if not GOOGLEAPI_AVAILABLE:
+        raise ImportError("google-api-python-client nicht verfügbar (pip install google-api-python-client)")
+    endpoint = api_endpoint()
+    key = (service_account_file, tuple(scopes), endpoint)
+    with _lock:
+        service = _services.get(key)
+        if service is None:
+            options = {'api_endpoint': endpoint} if endpoint else None
+            service = _build_service('sheets', 'v4', http=SessionHttp(get_session(service_account_file, scopes)),
+                                     client_options=options, static_discovery=True, cache_discovery=False)
+            _services[key] = service
+        return service
+
+
+def get_spreadsheet(service_account_file: str, spreadsheet_url: str,
+                    scopes: Sequence[str] = DEFAULT_SCOPES) -> "gspread.Spreadsheet":
+    """Gibt das (gecachte) Spreadsheet-Handle für eine URL oder Spreadsheet-ID zurück"""
+    key = (service_account_file, spreadsheet_url)
+    with _lock:
+        sh = _spreadsheets.get(key)
+        if sh is None:
+            client = get_client(service_account_file, scopes)
+            if spreadsheet_url.startswith(("http://", "https://")):
+                sh = client.open_by_url(spreadsheet_url)
+            else:
+                sh = client.open_by_key(spreadsheet_url)
+            _spreadsheets[key] = sh
+            _stats["open"] += 1
+        return sh
+
+
+def _load_worksheets(key: Tuple[str, str], sh: "gspread.Spreadsheet") -> Dict[str, "gspread.Worksheet"]:
+    """Lädt die Handles aller Blätter mit einem Metadaten-Aufruf"""
+    handles = {ws.title: ws for ws in sh.worksheets()}
+    _worksheets[key] = handles
+    _stats["metadata"] += 1
+    return handles
+
+
+def get_worksheet(service_account_file: str, spreadsheet_url: str, title: str,
+                  create: bool = False, rows: int = 1000, cols: int = 20,
+                  scopes: Sequence[str] = DEFAULT_SCOPES) -> "gspread.Worksheet":
+    """
+    Gibt das (gecachte) Worksheet-Handle zurück.
+
+    Ist das Blatt nicht im Cache, werden die Metadaten einmal neu geladen
+    (das Blatt könnte inzwischen angelegt worden sein). Fehlt es dann immer
+    noch, wird es mit create=True angelegt, sonst gspread.WorksheetNotFound
+    ausgelöst.
+    """
+    key = (service_account_file, spreadsheet_url)
+    with _lock:
+        sh = get_spreadsheet(service_account_file, spreadsheet_url, scopes)
+        handles = _worksheets.get(key)
+        if handles is None or title not in handles:
+            handles = _load_worksheets(key, sh)
+        ws = handles.get(title)
+        if ws is None:
+            if not create:
+                raise WorksheetNotFound(title)
+            ws = sh.add_worksheet(title=title, rows=str(rows), cols=str(cols))
+            handles[title] = ws
+        return ws
+
+
+def invalidate(spreadsheet_url: Optional[str] = None):
+    """
+    Verwirft gecachte Spreadsheet-/Worksheet-Handles (z.B. nach Umbenennen
+    oder Löschen von Blättern). Ohne URL wird alles verworfen, die
+    autorisierten Clients bleiben erhalten.
+    """
+    with _lock:
+        for key in list(_spreadsheets):
+            if spreadsheet_url is None or key[1] == spreadsheet_url:
+                _spreadsheets.pop(key, None)
+                _worksheets.pop(key, None)
+
+
+def reset():
+    """Verwirft alle Clients und Handles (z.B. nach Wechsel des Service Accounts)"""
+    with _lock:
+        _credentials.clear()
+        _sessions.clear()
+        _clients.clear()
+        _services.clear()
+        _spreadsheets.clear()
+        _worksheets.clear()
+
+
+def cache_stats() -> Dict[str, int]:
+    """Zähler: wie oft autorisiert, geöffnet und Metadaten geladen wurde"""
+    with _lock:
+        return dict(_stats)
+
+
+def column_letter(col: int) -> str:
+    """Spaltennummer (1-basiert) → Buchstaben (1 → A, 27 → AA)"""
+    letters = ''
+    while col > 0:
+        col, rest = divmod(col - 1, 26)
+        letters = chr(65 + rest) + letters
+    return letters
+
+
+def a1_range(row1: int, col1: int, row2: int, col2: int, sheet: Optional[str] = None) -> str:
+    """A1-Bereich (z.B. 'Blatt'!C2:G2); einzelne Zelle ohne Doppelpunkt"""
+    rng = f"{column_letter(col1)}{row1}"
+    if (row2, col2) != (row1, col1):
+        rng += f":{column_letter(col2)}{row2}"
+    if sheet:
+        rng = "'" + sheet.replace("'", "''") + "'!" + rng
+    return rng
+
+
+def column_number(letters: str) -> int:
+    """Spaltenbuchstaben → Spaltennummer (A → 1, AA → 27)"""
+    number = 0
+    for ch in letters.strip().upper():
+        number = number * 26 + (ord(ch) - 64)
+    return number
+
+
+class WorksheetMirror:
+    """
+    Lokale Kopie eines Worksheets mit Index Schlüssel (Spalte key_col) → Zeilennummer.
+    
+    Das Blatt wird einmal komplett gelesen. Danach sind Suchen lokale
+    Dictionary-Zugriffe; eigene Schreibvorgänge (update_row) werden ins
+    Sheet geschrieben und sofort lokal übernommen.
+    
+    refresh() gleicht höchstens alle refresh_seconds mit dem Sheet ab:
+    Es liest nur die Schlüsselspalte und – falls neue Zeilen dazugekommen
+    sind – nur diese Zeilen. Haben sich Zeilen verschoben oder wurden
+    gelöscht, oder ist die letzte vollständige Ladung älter als
+    full_refresh_seconds, wird das Blatt komplett neu gelesen.
+    """
+    
+    def __init__(self, worksheet, key_col: int = 0, header_rows: int = 1, width: int = 9,
+                 refresh_seconds: float = MIRROR_REFRESH_SECONDS,
+                 full_refresh_seconds: float = MIRROR_FULL_REFRESH_SECONDS):
+        """
+        Args:
+            worksheet: gspread-Worksheet
+            key_col: Spalte mit dem Schlüssel (0-basiert, Standard: A = Schiffsname)
+            header_rows: Anzahl Kopfzeilen
+            width: Zeilen werden lokal auf diese Spaltenanzahl aufgefüllt
+            refresh_seconds: Mindestabstand zwischen zwei Delta-Prüfungen
+            full_refresh_seconds: Höchstalter einer vollständigen Ladung
+        """
+        self.worksheet = worksheet
+        self.key_col = key_col
+        self.header_rows = header_rows
+        self.width = width
+        self.refresh_seconds = refresh_seconds
+        self.full_refresh_seconds = full_refresh_seconds
+        self.rows: List[List[str]] = []
+        self.index: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self._last_check = 0.0
+        self._last_full = 0.0
+        self.writer: Optional["BatchWriter"] = None
+        self.load()
+    
+    @property
+    def title(self) -> str:
+        return self.worksheet.title
+    
+    def _pad(self, row: List) -> List[str]:
+        row = [str(v) if v is not None else '' for v in row]
+        if len(row) < self.width:
+            row.extend([''] * (self.width - len(row)))
+        return row
+    
+    def _key(self, row: List[str]) -> str:
+        return row[self.key_col].strip() if len(row) > self.key_col else ''
+    
+    def _rebuild_index(self):
+        self.index = {}
+        for row_num, row in self.data_rows():
+            key = self._key(row)
+            if key and key not in self.index:  # erstes Vorkommen gewinnt
+                self.index[key] = row_num
+    
+    def load(self):
+        """Liest das komplette Blatt (ein API-Aufruf) und baut den Index neu auf"""
+        if self.writer is not None:
+            self.writer.flush()  # sonst würden gepufferte Werte überschrieben
+        with self._lock:
+            self.rows = [self._pad(row) for row in self.worksheet.get_all_values()]
+            self._rebuild_index()
+            self._last_check = self._last_full = time.monotonic()
+    
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Gleicht mit dem Sheet ab (siehe Klassenbeschreibung).
+        
+        Returns:
+            True wenn ein Abgleich stattgefunden hat
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_check < self.refresh_seconds:
+                return False
+            if force or now - self._last_full >= self.full_refresh_seconds:
+                self.load()
+                return True
+            
+            # Delta: nur die Schlüsselspalte lesen
+            keys = [str(k).strip() for k in self.worksheet.col_values(self.key_col + 1)]
+            known = [self._key(row) for row in self.rows]
+            while known and not known[-1]:  # col_values() liefert keine leeren Zeilen am Ende
+                known.pop()
+            if keys[:len(known)] != known or any(keys[len(known):len(self.rows)]):
+                # Zeilen verschoben/gelöscht → vollständig neu laden
+                self.load()
+                return True
+            
+            if len(keys) > len(self.rows):
+                # Nur die neu angehängten Zeilen holen
+                rng = a1_range(len(self.rows) + 1, 1, len(keys), self.width)
+                new_rows = list(self.worksheet.get(rng))
+                new_rows.extend([[]] * (len(keys) - len(self.rows) - len(new_rows)))
+                for row in new_rows:
+                    self.rows.append(self._pad(row))
+                    key = self._key(self.rows[-1])
+                    if key and key not in self.index:
+                        self.index[key] = len(self.rows)
+            self._last_check = now
+            return True
+    
+    def data_rows(self) -> Iterator[Tuple[int, List[str]]]:
+        """Iteriert über (Zeilennummer, Zeile) ohne Kopfzeilen"""
+        for offset, row in enumerate(self.rows[self.header_rows:], start=self.header_rows + 1):
+            yield offset, row
+    
+    def find_row(self, key: str) -> Optional[int]:
+        """Zeilennummer (1-basiert) zu einem Schlüssel oder None"""
+        with self._lock:
+            return self.index.get(str(key).strip())
+    
+    def get_row(self, key: str) -> Optional[List[str]]:
+        """Lokale Kopie der Zeile zu einem Schlüssel oder None"""
+        with self._lock:
+            row_num = self.index.get(str(key).strip())
+            return list(self.rows[row_num - 1]) if row_num else None
+    
+    def update_row(self, row_num: int, start_col: int, values: List):
+        """
+        Schreibt zusammenhängende Zellen einer Zeile ins Sheet und übernimmt sie lokal.
+        Ist ein BatchWriter gesetzt (mirror.writer), wird nur gepuffert.
+        
+        Args:
+            row_num: Zeilennummer (1-basiert)
+            start_col: erste Spalte (1-basiert, A = 1)
+            values: Zellwerte ab start_col
+        """
+        end_col = start_col + len(values) - 1
+        if self.writer is not None:
+            self.writer.update(self.title, row_num, start_col, [list(values)])
+        else:
+            rng = a1_range(row_num, start_col, row_num, end_col)
+            self.worksheet.update(values=[list(values)], range_name=rng)
+        with self._lock:
+            while len(self.rows) < row_num:
+                self.rows.append(self._pad([]))
+            row = self.rows[row_num - 1]
+            if len(row) < end_col:
+                row.extend([''] * (end_col - len(row)))
+            row[start_col - 1:end_col] = [str(v) if v is not None else '' for v in values]
+            if self.key_col + 1 in range(start_col, end_col + 1):
+                self._rebuild_index()
+
+
+class TokenBucket:
+    """
+    Einfacher Token-Bucket: rate Token pro Minute, höchstens burst auf Vorrat.
+    acquire() blockiert, bis ein Token frei ist.
+    """
+    
+    def __init__(self, rate_per_minute: float = WRITE_REQUESTS_PER_MINUTE, burst: int = WRITE_BURST):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Nimmt Token; gibt die Wartezeit in Sekunden zurück"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return waited
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+# Ein Bucket pro Prozess, da das Kontingent pro Service Account gilt
+_write_bucket = TokenBucket()
+
+
+def gspread_flush(spreadsheet) -> Callable[[List[Dict]], None]:
+    """Flush-Funktion für ein gspread-Spreadsheet"""
+    def flush(data: List[Dict]):
+        spreadsheet.values_batch_update(body={'valueInputOption': 'RAW', 'data': data})
+    return flush
+
+
+def service_flush(service, spreadsheet_id: str) -> Callable[[List[Dict]], None]:
+    """Flush-Funktion für einen googleapiclient-Service (Sheets v4)"""
+    def flush(data: List[Dict]):
+        service.spreadsheets().values().batchUpdate(
+            spreadsheetId=spreadsheet_id,
+            body={'valueInputOption': 'RAW', 'data': data}
+        ).execute()
+    return flush
+
+
+class BatchWriter:
+    """
+    Write-Behind-Puffer für Zell-Updates.
+    
+    Updates werden pro Zelle gesammelt (spätere Werte überschreiben frühere)
+    und beim Flush zu möglichst großen Rechtecken zusammengefasst: erst
+    zusammenhängende Spalten einer Zeile, dann aufeinanderfolgende Zeilen
+    mit gleicher Spaltenspanne. Alle Rechtecke gehen in einem einzigen
+    values.batchUpdate raus.
+    
+    Flush erfolgt bei max_cells gepufferten Zellen, wenn die älteste Zelle
+    max_age_seconds alt ist (auch ohne weitere Updates, per Timer; 0 = aus), bei
+    flush()/close() und beim Prozessende. Jeder Flush nimmt ein Token aus
+    dem TokenBucket, damit das Schreib-Kontingent nicht überschritten wird.
+    
+    Benutzung:
+        with BatchWriter(gspread_flush(sh)) as writer:
+            writer.set("Schiffsdaten HHLA", 5, 3, "211234560")
+    """
+    
+    def __init__(self, flush_fn: Callable[[List[Dict]], None],
+                 max_cells: int = BATCH_MAX_CELLS,
+                 max_age_seconds: float = BATCH_MAX_AGE_SECONDS,
+                 bucket: Optional[TokenBucket] = None):
+        self.flush_fn = flush_fn
+        self.max_cells = max_cells
+        self.max_age_seconds = max_age_seconds
+        self.bucket = bucket or _write_bucket
+        self._cells: Dict[Tuple[str, int, int], object] = {}
+        self._oldest: Optional[float] = None
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        self.stats = {'cells': 0, 'flushes': 0, 'ranges': 0, 'wait_seconds': 0.0}
+        _live_writers.add(self)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def __len__(self):
+        return len(self._cells)
+    
+    def set(self, sheet: str, row: int, col: int, value):
+        """Puffert eine Zelle (Zeile/Spalte 1-basiert)"""
+        self.update(sheet, row, col, [[value]])
+    
+    def update(self, sheet: str, row: int, col: int, values: List[List]):
+        """Puffert einen rechteckigen Block ab (row, col)"""
+        with self._lock:
+            for r, row_values in enumerate(values):
+                for c, value in enumerate(row_values):
+                    self._cells[(sheet, row + r, col + c)] = '' if value is None else value
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+                self._start_timer()
+            due = len(self._cells) >= self.max_cells or \
+                bool(self.max_age_seconds) and time.monotonic() - self._oldest >= self.max_age_seconds
+        if due:
+            self.flush()
+    
+    def _start_timer(self):
+        if self.max_age_seconds and self.max_age_seconds > 0:
+            self._timer = threading.Timer(self.max_age_seconds, self._flush_from_timer)
+            self._timer.daemon = True
+            self._timer.start()
+    
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"⚠️  Gepufferte Sheet-Updates konnten nicht geschrieben werden: {e}")
+    
+    def _flush_at_exit(self):
+        if self._cells:
+            self._flush_from_timer()
+    
+    @staticmethod
+    def merge_ranges(cells: Dict[Tuple[str, int, int], object]) -> List[Dict]:
+        """Fasst Zellen zu Rechtecken zusammen → Liste von {'range', 'values'}"""
+        # 1. Pro Zeile zusammenhängende Spalten-Segmente bilden
+        segments: Dict[Tuple[str, int, int], List] = {}  # (sheet, col_start, col_end) → [(row, values)]
+        by_row: Dict[Tuple[str, int], List[int]] = {}
+        for sheet, row, col in cells:
+            by_row.setdefault((sheet, row), []).append(col)
+        for (sheet, row), cols in sorted(by_row.items()):
+            cols.sort()
+            start = prev = cols[0]
+            for col in cols[1:] + [None]:
+                if col is not None and col == prev + 1:
+                    prev = col
+                    continue
+                values = [cells[(sheet, row, c)] for c in range(start, prev + 1)]
+                segments.setdefault((sheet, start, prev), []).append((row, values))
+                if col is not None:
+                    start = prev = col
+        
+        # 2. Aufeinanderfolgende Zeilen mit gleicher Spaltenspanne stapeln
+        data = []
+        for (sheet, col_start, col_end), rows in sorted(segments.items()):
+            block_start, block = None, []
+            for row, values in rows + [(None, None)]:
+                if block and row is not None and row == block_start + len(block):
+                    block.append(values)
+                    continue
+                if block:
+                    data.append({
+                        'range': a1_range(block_start, col_start, block_start + len(block) - 1, col_end, sheet),
+                        'values': block,
+                    })
+                block_start, block = row, [values] if values is not None else []
+        return data
+    
+    def flush(self) -> int:
+        """
+        Schreibt alle gepufferten Zellen (ein API-Aufruf).
+        
+        Returns:
+            Anzahl geschriebener Zellen
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._cells:
+                return 0
+            cells, self._cells, self._oldest = self._cells, {}, None
+            data = self.merge_ranges(cells)
+            try:
+                self.stats['wait_seconds'] += self.bucket.acquire()
+                self.flush_fn(data)
+            except Exception:
+                # Zurücklegen, neuere Werte gewinnen
+                cells.update(self._cells)
+                self._cells = cells
+                self._oldest = time.monotonic()
+                self._start_timer()
+                raise
+            self.stats['cells'] += len(cells)
+            self.stats['ranges'] += len(data)
+            self.stats['flushes'] += 1
+            return len(cells)
+    
+    def close(self):
+        """Schreibt verbleibende Zellen und beendet den Timer"""
+        self.flush()
+        _live_writers.discard(self)
+
+
+# Offene BatchWriter (schwach referenziert, damit ein atexit-Eintrag je
+# Instanz sie nicht bis zum Prozessende festhält); ein Handler für alle
+_live_writers: "weakref.WeakSet[BatchWriter]" = weakref.WeakSet()
+
+
+def _flush_writers_at_exit():
+    for writer in list(_live_writers):
+        writer._flush_at_exit()
+
+
+atexit.register(_flush_writers_at_exit)
+
+
+def _cell_str(value) -> str:
+    """Vergleichswert einer Zelle (Sheets liefert alle Werte als Text)"""
+    if value is None:
+        return ''
+    if isinstance(value, float):
+        if value != value:  # NaN
+            return ''
+        if value.is_integer():
+            return str(int(value))
+    return str(value)
+
+
+def diff_grids(current: List[List], target: List[List], start_row: int = 1, start_col: int = 1,
+               width: Optional[int] = None, sheet: Optional[str] = None) -> Dict:
+    """
+    Vergleicht den aktuellen Blattinhalt mit der Zieltabelle (positionsgenau).
+    
+    Zeilen werden zuerst über ihren Hash verglichen; nur abweichende Zeilen
+    werden zellweise verglichen. Geänderte Zellen werden zu Rechtecken
+    zusammengefasst (BatchWriter.merge_ranges), angehängte Zeilen komplett
+    geschrieben, überzählige Zeilen des aktuellen Inhalts geleert.
+    
+    Args:
+        current: Aktueller Inhalt ab (start_row, start_col), z.B. aus get_all_values()
+        target: Gewünschter Inhalt ab (start_row, start_col)
+        start_row, start_col: Position der linken oberen Zelle (1-basiert)
+        width: Anzahl verwalteter Spalten (Standard: breiteste Zeile); Spalten
+               rechts davon werden nicht angefasst
+        sheet: Blattname für die A1-Bereiche der Schreibzugriffe
+        
+    Returns:
+        Dictionary mit 'data' (Bereiche für values.batchUpdate), 'clear'
+        (zu leerende Bereiche ohne Blattnamen) und 'stats'
+    """
+    if width is None:
+        width = max((len(row) for row in itertools.chain(current, target)), default=0)
+    
+    def normalized(row) -> Tuple[str, ...]:
+        cells = [_cell_str(v) for v in row[:width]]
+        cells.extend([''] * (width - len(cells)))
+        return tuple(cells)
+    
+    def value(row, col):
+        v = row[col] if col < len(row) else ''
+        return '' if _cell_str(v) == '' else v
+    
+    current_rows = [normalized(row) for row in current]
+    current_hashes = [hash(row) for row in current_rows]
+    changed: Dict[Tuple[str, int, int], object] = {}
+    rows_changed = rows_appended = 0
+    
+    for i, row in enumerate(target):
+        row_num = start_row + i
+        if i >= len(current_rows):
+            # Angehängte Zeile: komplett schreiben (ergibt ein durchgehendes Rechteck)
+            for j in range(width):
+                changed[(sheet, row_num, start_col + j)] = value(row, j)
+            rows_appended += 1
+            continue
+        target_row = normalized(row)
+        if hash(target_row) == current_hashes[i] and target_row == current_rows[i]:
+            continue
+        rows_changed += 1
+        for j, (old, new) in enumerate(zip(current_rows[i], target_row)):
+            if old != new:
+                changed[(sheet, row_num, start_col + j)] = value(row, j)
+    
+    # Überzählige, nicht leere Zeilen leeren
+    clear = []
+    rows_cleared = 0
+    extra = current_rows[len(target):]
+    if any(any(row) for row in extra):
+        last = len(extra)
+        while last and not any(extra[last - 1]):
+            last -= 1
+        rows_cleared = last
+        first_row = start_row + len(target)
+        clear.append(a1_range(first_row, start_col, first_row + last - 1, start_col + width - 1))
+    
+    data = BatchWriter.merge_ranges(changed) if changed else []
+    full_values = [[value(row, j) for j in range(width)] for row in target]
+    bytes_full = len(json.dumps(full_values, default=str))
+    bytes_sent = len(json.dumps(data, default=str)) if data else 0
+    
+    return {
+        'data': data,
+        'clear': clear,
+        'stats': {
+            'cells_total': len(target) * width,
+            'cells_written': len(changed),
+            'ranges': len(data),
+            'rows_changed': rows_changed,
+            'rows_appended': rows_appended,
+            'rows_cleared': rows_cleared,
+            'bytes_full': bytes_full,
+            'bytes_sent': bytes_sent,
+            'bytes_saved': max(0, bytes_full - bytes_sent),
+        },
+    }
+
+
+def write_grid(worksheet, target: List[List], start_row: int = 1, start_col: int = 1,
+               width: Optional[int] = None, current: Optional[List[List]] = None,
+               value_input_option: str = 'RAW') -> Dict[str, int]:
+    """
+    Bringt einen Blattbereich auf den Zielinhalt, schreibt aber nur den Diff.
+    
+    Ersetzt das Muster clear() + update() über das ganze Blatt: ein
+    Lesezugriff (falls current nicht übergeben wird), höchstens ein
+    values.batchUpdate und ein batch_clear.
+    
+    Args:
+        worksheet: gspread-Worksheet
+        target: Gewünschter Inhalt ab (start_row, start_col)
+        start_row, start_col: Position der linken oberen Zelle (1-basiert)
+        width: Anzahl verwalteter Spalten (siehe diff_grids)
+        current: Bereits bekannter aktueller Inhalt ab (start_row, start_col)
+        value_input_option: 'RAW' oder 'USER_ENTERED'
+        
+    Returns:
+        Statistik des Diffs (siehe diff_grids)
+    """
+    if current is None:
+        current = [row[start_col - 1:] for row in worksheet.get_all_values()[start_row - 1:]]
+    diff = diff_grids(current, target, start_row, start_col, width, worksheet.title)
+    
+    if diff['data']:
+        values_batch_update(worksheet, diff['data'], value_input_option)
+    if diff['clear']:
+        batch_clear(worksheet, diff['clear'])
+    return diff['stats']
+
+
+def values_batch_update(worksheet, data: List[Dict], value_input_option: str = 'RAW'):
+    """Ein values.batchUpdate mit den Bereichen eines Diffs (unter der Schreibrate)"""
+    _write_bucket.acquire()
+    worksheet.spreadsheet.values_batch_update(
+        body={'valueInputOption': value_input_option, 'data': data}
+    )
+
+
+def batch_clear(worksheet, ranges: List[str]):
+    """Ein values.batchClear für Bereiche ohne Blattnamen (unter der Schreibrate)"""
+    _write_bucket.acquire()
+    worksheet.batch_clear(ranges)
+
+
+def spreadsheet_batch_update(spreadsheet, requests: List[Dict]) -> Dict:
+    """Ein spreadsheets.batchUpdate (Struktur-/Zell-Requests, unter der Schreibrate)"""
+    _write_bucket.acquire()
+    return spreadsheet.batch_update({'requests': requests})
+
+
+def string_cells(values: List) -> Dict:
+    """Zeile für updateCells/appendCells: Werte als Text (wie valueInputOption RAW)"""
+    return {'values': [{'userEnteredValue': {'stringValue': _cell_str(v)}} for v in values]}
+
+
+def format_diff_stats(stats: Dict[str, int]) -> str:
+    """Kurzbeschreibung einer write_grid-Statistik für Logmeldungen"""
+    saved_cells = stats['cells_total'] - stats['cells_written']
+    percent = saved_cells * 100 // stats['cells_total'] if stats['cells_total'] else 0
+    text = (f"{stats['cells_written']} Zellen in {stats['ranges']} Bereichen geschrieben, "
+            f"{saved_cells} Zellen ({percent} %) und {stats['bytes_saved'] / 1024:.1f} KB eingespart")
+    if stats['rows_appended']:
+        text += f", {stats['rows_appended']} Zeilen angehängt"
+    if stats['rows_cleared']:
+        text += f", {stats['rows_cleared']} Zeilen geleert"
+    return text
+
+
+def _to_number(value: str, typ):
+    text = value.strip().replace('\u00a0', '').replace(' ', '')
+    if not text:
+        return None
+    if ',' in text:
+        # Deutsches Format: 1.234,5 → 1234.5
+        text = text.replace('.', '').replace(',', '.')
+    try:
+        return typ(float(text)) if typ is int else typ(text)
+    except ValueError:
+        return None
+
+
+def convert_cell(value, typ=str):
+    """
+    Wandelt einen Zellwert (Text) in den gewünschten Typ um.
+    str: getrimmter Text; None: Text unverändert; int/float: Zahl oder None;
+    sonst: typ(value).
+    """
+    if value is None:
+        value = ''
+    if typ is None:
+        return str(value)
+    if typ is str:
+        return str(value).strip()
+    if typ in (int, float):
+        return _to_number(str(value), typ)
+    return typ(value)
+
+
+def service_batch_get(service, spreadsheet_id: str) -> Callable[[List[str]], Dict]:
+    """batchGet-Funktion für einen googleapiclient-Service (Sheets v4)"""
+    def batch_get(ranges: List[str]) -> Dict:
+        return service.spreadsheets().values().batchGet(
+            spreadsheetId=spreadsheet_id, ranges=ranges, majorDimension='COLUMNS'
+        ).execute()
+    return batch_get
+
+
+ColumnSpec = Union[str, Sequence[str], Dict[str, Callable]]
+
+
+def read_columns(source, spec: Sequence[Tuple], start_row: int = 1) -> Dict[str, Dict[str, List]]:
+    """
+    Liest ausgewählte Spalten mehrerer Blätter mit einem values.batchGet.
+    
+    Benachbarte Spalten werden zu einem Bereich zusammengefasst, die Werte
+    spaltenweise (majorDimension=COLUMNS) geholt und auf gleiche Länge
+    aufgefüllt, sodass Index i in allen Spalten eines Blatts zur selben
+    Zeile (start_row + i) gehört.
+    
+    Args:
+        source: gspread-Spreadsheet oder batchGet-Funktion (service_batch_get)
+        spec: Liste von (Blatt, Spalten) oder (Blatt, Spalten, Startzeile);
+              Spalten als "A C K", Liste ['A', 'C'] oder Dict {'F': float}
+              (Typen: str, int, float, None = Rohtext oder beliebige Funktion;
+              Standard str). Pro Blatt nur ein Eintrag.
+        start_row: Standard-Startzeile (1-basiert)
+        
+    Returns:
+        {Blatt: {Spalte: [Werte]}}
+    
+    Beispiel:
+        cols = read_columns(sh, [("Schiffsdaten HHLA", "A C K", 2),
+                                 ("Segelliste", {"E": str, "D": float}, 3)])
+        for name, mmsi in zip(cols["Schiffsdaten HHLA"]["A"], cols["Schiffsdaten HHLA"]["C"]): ...
+    """
+    requests = []   # (Blatt, [Spalten des Bereichs], Startzeile)
+    types: Dict[Tuple[str, str], Callable] = {}
+    for entry in spec:
+        sheet, columns = entry[0], entry[1]
+        first_row = entry[2] if len(entry) > 2 else start_row
+        if isinstance(columns, str):
+            columns = {c: str for c in columns.replace(',', ' ').split()}
+        elif not isinstance(columns, dict):
+            columns = {c: str for c in columns}
+        for letter, typ in columns.items():
+            types[(sheet, letter.upper())] = typ
+        
+        # Benachbarte Spalten zu Bereichen zusammenfassen
+        numbers = sorted({column_number(c) for c in columns})
+        block = [numbers[0]] if numbers else []
+        for number in numbers[1:] + [None]:
+            if number is not None and number == block[-1] + 1:
+                block.append(number)
+                continue
+            requests.append((sheet, [column_letter(n) for n in block], first_row))
+            block = [number] if number is not None else []
+    
+    ranges = [f"'{sheet.replace(chr(39), chr(39) * 2)}'!{letters[0]}{first_row}:{letters[-1]}"
+              for sheet, letters, first_row in requests]
+    if hasattr(source, 'values_batch_get'):
+        response = source.values_batch_get(ranges, params={'majorDimension': 'COLUMNS'})
+    else:
+        response = source(ranges)
+    value_ranges = response.get('valueRanges', [])
+    
+    raw: Dict[str, Dict[str, List]] = {}
+    for (sheet, letters, _), value_range in zip(requests, value_ranges):
+        values = value_range.get('values', [])
+        for i, letter in enumerate(letters):
+            raw.setdefault(sheet, {})[letter] = values[i] if i < len(values) else []
+    
+    result: Dict[str, Dict[str, List]] = {}
+    for sheet, columns in raw.items():
+        length = max((len(v) for v in columns.values()), default=0)
+        result[sheet] = {
+            letter: [convert_cell(v, types[(sheet, letter)]) for v in values + [''] * (length - len(values))]
+            for letter, values in columns.items()
+        }
+    return result
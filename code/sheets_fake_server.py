@@ -0,0 +1,737 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+sheets_fake_server.py – Lokaler Ersatz für die Google Sheets API v4
+
+Für Offline-Tests und reproduzierbare Benchmarks aller Sheets-Pipelines
+(Schiffs_Datenbank, Schiffsbilder, bilder_downloader, dienstplan,
+segelliste_upload, schiffsbilder_server).
+
+Unterstützte Endpunkte (wie von gspread und googleapiclient genutzt):
+- spreadsheets.get, spreadsheets.batchUpdate (addSheet, deleteSheet,
+  updateSheetProperties, insertDimension, deleteDimension, appendDimension,
+  repeatCell, updateCells, sortRange; reine Formatierungs-Requests werden akzeptiert)
+- values.get, values.batchGet, values.update, values.batchUpdate,
+  values.append, values.clear, values.batchClear
+
+Zusätzlich:
+- Konfigurierbare Latenz (--latency-ms, --jitter-ms)
+- Kontingent wie bei Google (--write-quota / --read-quota pro Minute,
+  bei Überschreitung HTTP 429 mit Retry-After)
+- /_fake/stats (Aufrufe je Methode und Blatt), /_fake/state (Inhalt als
+  JSON, per PUT ersetzbar), /_fake/reset
+
+Benutzung:
+    python3 sheets_fake_server.py --port 8765 --seed seed.json --latency-ms 80
+    SHEETS_API_ENDPOINT=http://127.0.0.1:8765 python3 Schiffs_Datenbank.py --sync
+
+seed.json: {"Segelliste": [["Info"], ["Header", ...], ...], "Schiffsdaten HHLA": [...]}
+Jede Spreadsheet-ID wird beim ersten Zugriff mit diesem Inhalt angelegt.
+"""
+
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs, unquote
+
+# ============================================
+# KONFIGURATION
+# ============================================
+DEFAULT_PORT = 8765
+DEFAULT_ROWS = 1000
+DEFAULT_COLS = 26
+# Google-Standardkontingent pro Minute und Nutzer
+DEFAULT_READ_QUOTA = 300
+DEFAULT_WRITE_QUOTA = 60
+
+CELL_RE = re.compile(r"^([A-Za-z]*)(\d*)$")
+# Requests, die nur Formatierung/Darstellung betreffen (Inhalt bleibt gleich)
+FORMAT_ONLY_REQUESTS = {
+    'autoResizeDimensions', 'updateDimensionProperties', 'updateBorders', 'mergeCells',
+    'unmergeCells', 'setBasicFilter', 'clearBasicFilter', 'addConditionalFormatRule',
+    'deleteConditionalFormatRule', 'setDataValidation', 'addProtectedRange', 'addBanding',
+}
+
+
+class FakeSheetsError(Exception):
+    """Fehler mit HTTP-Status im Format der Google-API"""
+
+    def __init__(self, code: int, message: str, status: str = 'INVALID_ARGUMENT'):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.status = status
+
+
+# ============================================
+# HILFSFUNKTIONEN
+# ============================================
+def column_number(letters: str) -> int:
+    number = 0
+    for ch in letters.upper():
+        number = number * 26 + (ord(ch) - 64)
+    return number
+
+
+def column_letter(col: int) -> str:
+    letters = ''
+    while col > 0:
+        col, rest = divmod(col - 1, 26)
+        letters = chr(65 + rest) + letters
+    return letters
+
+
+def format_value(value) -> str:
+    """Speicherformat einer Zelle (wie FORMATTED_VALUE)"""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _trim(rows: List[List[str]]) -> List[List[str]]:
+    """Entfernt leere Zellen am Zeilenende und leere Zeilen am Ende (wie die API)"""
+    result = []
+    for row in rows:
+        row = list(row)
+        while row and row[-1] == '':
+            row.pop()
+        result.append(row)
+    while result and not result[-1]:
+        result.pop()
+    return result
+
+
+# ============================================
+# ZUSTAND
+# ============================================
+class FakeSheet:
+    """Ein Tabellenblatt: Werte als Liste von Zeilen (Text) plus Gittergröße"""
+
+    def __init__(self, sheet_id: int, title: str, index: int,
+                 rows: int = DEFAULT_ROWS, cols: int = DEFAULT_COLS, data: Optional[List[List]] = None):
+        self.sheet_id = sheet_id
+        self.title = title
+        self.index = index
+        self.data: List[List[str]] = [[format_value(v) for v in row] for row in (data or [])]
+        self.row_count = max(rows, len(self.data))
+        self.col_count = max(cols, max((len(r) for r in self.data), default=0))
+
+    def properties(self) -> Dict:
+        return {
+            'sheetId': self.sheet_id,
+            'title': self.title,
+            'index': self.index,
+            'sheetType': 'GRID',
+            'gridProperties': {'rowCount': self.row_count, 'columnCount': self.col_count},
+        }
+
+    def set_cell(self, row: int, col: int, value):
+        while len(self.data) <= row:
+            self.data.append([])
+        line = self.data[row]
+        if len(line) <= col:
+            line.extend([''] * (col + 1 - len(line)))
+        line[col] = format_value(value)
+        # Die Values-API vergrößert das Gitter bei Bedarf
+        self.row_count = max(self.row_count, row + 1)
+        self.col_count = max(self.col_count, col + 1)
+
+    def get_cell(self, row: int, col: int) -> str:
+        if row < len(self.data) and col < len(self.data[row]):
+            return self.data[row][col]
+        return ''
+
+    def used_rows(self) -> int:
+        return len(_trim(self.data))
+
+    def used_cols(self) -> int:
+        return max((len(r) for r in _trim(self.data)), default=0)
+
+
+class FakeSpreadsheet:
+    def __init__(self, spreadsheet_id: str, seed: Dict[str, List[List]]):
+        self.spreadsheet_id = spreadsheet_id
+        self.title = 'Fake Spreadsheet'
+        self.sheets: List[FakeSheet] = []
+        for title, rows in (seed or {'Tabelle1': []}).items():
+            self.add_sheet(title, data=rows)
+
+    def add_sheet(self, title: str, rows: int = DEFAULT_ROWS, cols: int = DEFAULT_COLS,
+                  data: Optional[List[List]] = None, sheet_id: Optional[int] = None) -> FakeSheet:
+        if self.find(title):
+            raise FakeSheetsError(400, f'A sheet with the name "{title}" already exists.')
+        if sheet_id is None:
+            sheet_id = 0 if not self.sheets else max(s.sheet_id for s in self.sheets) + 1
+        sheet = FakeSheet(sheet_id, title, len(self.sheets), rows, cols, data)
+        self.sheets.append(sheet)
+        return sheet
+
+    def find(self, title: str) -> Optional[FakeSheet]:
+        for sheet in self.sheets:
+            if sheet.title == title:
+                return sheet
+        return None
+
+    def by_id(self, sheet_id: int) -> FakeSheet:
+        for sheet in self.sheets:
+            if sheet.sheet_id == sheet_id:
+                return sheet
+        raise FakeSheetsError(400, f'No grid with id: {sheet_id}')
+
+    def metadata(self) -> Dict:
+        return {
+            'spreadsheetId': self.spreadsheet_id,
+            'properties': {'title': self.title, 'locale': 'de_DE', 'timeZone': 'Europe/Berlin'},
+            'sheets': [{'properties': s.properties()} for s in self.sheets],
+            'spreadsheetUrl': f'https://docs.google.com/spreadsheets/d/{self.spreadsheet_id}/edit',
+        }
+
+    def parse_range(self, a1: str) -> Tuple[FakeSheet, int, int, Optional[int], Optional[int]]:
+        """
+        A1-Bereich → (Blatt, r1, c1, r2, c2), 0-basiert und inklusiv;
+        None für offene Enden (z.B. 'A2:C', 'A:K', '2:5', 'Blatt').
+        """
+        a1 = a1.strip()
+        sheet_part, cells = None, a1
+        if '!' in a1:
+            sheet_part, cells = a1.rsplit('!', 1)
+        elif self.find(a1.strip("'").replace("''", "'")) or not all(
+                CELL_RE.match(p) for p in a1.split(':')):
+            sheet_part, cells = a1, ''
+
+        if sheet_part is None:
+            sheet = self.sheets[0]
+        else:
+            title = sheet_part
+            if title.startswith("'") and title.endswith("'"):
+                title = title[1:-1].replace("''", "'")
+            sheet = self.find(title)
+            if sheet is None:
+                raise FakeSheetsError(400, f'Unable to parse range: {a1}')
+
+        if not cells:
+            return sheet, 0, 0, None, None
+        parts = cells.split(':')
+        if len(parts) > 2:
+            raise FakeSheetsError(400, f'Unable to parse range: {a1}')
+        bounds = []
+        for part in parts:
+            match = CELL_RE.match(part)
+            if not match:
+                raise FakeSheetsError(400, f'Unable to parse range: {a1}')
+            letters, digits = match.groups()
+            bounds.append((int(digits) - 1 if digits else None,
+                           column_number(letters) - 1 if letters else None))
+        (r1, c1), (r2, c2) = bounds[0], bounds[-1]
+        if len(parts) == 1:
+            r2, c2 = r1, c1
+        return sheet, r1 or 0, c1 or 0, r2, c2
+
+    def range_label(self, sheet: FakeSheet, r1: int, c1: int, r2: int, c2: int) -> str:
+        title = "'" + sheet.title.replace("'", "''") + "'"
+        start = f"{column_letter(c1 + 1)}{r1 + 1}"
+        end = f"{column_letter(c2 + 1)}{r2 + 1}"
+        return f"{title}!{start}" if start == end else f"{title}!{start}:{end}"
+
+    # ---------- values ----------
+    def values_get(self, a1: str, major: str = 'ROWS') -> Dict:
+        sheet, r1, c1, r2, c2 = self.parse_range(a1)
+        r2 = sheet.row_count - 1 if r2 is None else r2
+        c2 = sheet.col_count - 1 if c2 is None else c2
+        last_row = min(r2, len(sheet.data) - 1)
+        rows = [[sheet.get_cell(r, c) for c in range(c1, c2 + 1)] for r in range(r1, last_row + 1)]
+        if major == 'COLUMNS':
+            width = c2 - c1 + 1
+            rows = [[row[i] for row in rows] for i in range(width)] if rows else []
+        result = {'range': self.range_label(sheet, r1, c1, r2, c2), 'majorDimension': major}
+        values = _trim(rows)
+        if values:
+            result['values'] = values
+        return result
+
+    def values_update(self, a1: str, values: List[List], major: str = 'ROWS') -> Dict:
+        sheet, r1, c1, _, _ = self.parse_range(a1)
+        values = values or []
+        if major == 'COLUMNS':
+            height = max((len(v) for v in values), default=0)
+            values = [[col[i] if i < len(col) else None for col in values] for i in range(height)]
+        cells = 0
+        for i, row in enumerate(values):
+            for j, value in enumerate(row):
+                sheet.set_cell(r1 + i, c1 + j, value)
+                cells += 1
+        rows = len(values)
+        cols = max((len(r) for r in values), default=0)
+        return {
+            'spreadsheetId': self.spreadsheet_id,
+            'updatedRange': self.range_label(sheet, r1, c1, r1 + max(rows, 1) - 1, c1 + max(cols, 1) - 1),
+            'updatedRows': rows,
+            'updatedColumns': cols,
+            'updatedCells': cells,
+        }
+
+    def values_append(self, a1: str, values: List[List]) -> Dict:
+        sheet, r1, c1, _, _ = self.parse_range(a1)
+        # Wie Google: die "Tabelle" beginnt bei der Startzeile und reicht bis zur
+        # ersten leeren Zeile; dort wird geschrieben
+        start = r1
+        while start < len(sheet.data) and any(sheet.data[start]):
+            start += 1
+        label = self.range_label(sheet, r1, c1, max(start - 1, r1), c1)
+        updates = self.values_update(self.range_label(sheet, start, c1, start, c1), values)
+        return {'spreadsheetId': self.spreadsheet_id, 'tableRange': label, 'updates': updates}
+
+    def values_clear(self, a1: str) -> Dict:
+        sheet, r1, c1, r2, c2 = self.parse_range(a1)
+        r2 = len(sheet.data) - 1 if r2 is None else min(r2, len(sheet.data) - 1)
+        for r in range(r1, r2 + 1):
+            line = sheet.data[r]
+            last = len(line) - 1 if c2 is None else min(c2, len(line) - 1)
+            for c in range(c1, last + 1):
+                line[c] = ''
+        return {'spreadsheetId': self.spreadsheet_id, 'clearedRange': a1}
+
+    # ---------- spreadsheets.batchUpdate ----------
+    def batch_update(self, requests: List[Dict]) -> Dict:
+        replies = []
+        for request in requests:
+            if len(request) != 1:
+                raise FakeSheetsError(400, 'Each request must contain exactly one kind of request')
+            kind, body = next(iter(request.items()))
+            handler = getattr(self, f'_req_{kind}', None)
+            if handler is not None:
+                replies.append(handler(body) or {})
+            elif kind in FORMAT_ONLY_REQUESTS:
+                replies.append({})
+            else:
+                raise FakeSheetsError(400, f'Request type not supported by fake server: {kind}')
+        return {'spreadsheetId': self.spreadsheet_id, 'replies': replies}
+
+    def _req_addSheet(self, body: Dict) -> Dict:
+        props = body.get('properties', {})
+        grid = props.get('gridProperties', {})
+        sheet = self.add_sheet(props.get('title') or f'Tabelle{len(self.sheets) + 1}',
+                               int(grid.get('rowCount', DEFAULT_ROWS)),
+                               int(grid.get('columnCount', DEFAULT_COLS)),
+                               sheet_id=props.get('sheetId'))
+        return {'addSheet': {'properties': sheet.properties()}}
+
+    def _req_deleteSheet(self, body: Dict):
+        sheet = self.by_id(body['sheetId'])
+        self.sheets.remove(sheet)
+        for i, s in enumerate(self.sheets):
+            s.index = i
+
+    def _req_updateSheetProperties(self, body: Dict):
+        props = body.get('properties', {})
+        sheet = self.by_id(props.get('sheetId', 0))
+        if 'title' in props:
+            sheet.title = props['title']
+        grid = props.get('gridProperties', {})
+        sheet.row_count = int(grid.get('rowCount', sheet.row_count))
+        sheet.col_count = int(grid.get('columnCount', sheet.col_count))
+
+    def _dimension(self, body: Dict) -> Tuple[FakeSheet, str, int, int]:
+        rng = body['range']
+        return self.by_id(rng.get('sheetId', 0)), rng['dimension'], int(rng['startIndex']), int(rng['endIndex'])
+
+    def _req_insertDimension(self, body: Dict):
+        sheet, dimension, start, end = self._dimension(body)
+        count = end - start
+        if dimension == 'ROWS':
+            if start < len(sheet.data):
+                sheet.data[start:start] = [[] for _ in range(count)]
+            sheet.row_count += count
+        else:
+            for line in sheet.data:
+                if start < len(line):
+                    line[start:start] = [''] * count
+            sheet.col_count += count
+
+    def _req_deleteDimension(self, body: Dict):
+        sheet, dimension, start, end = self._dimension(body)
+        if dimension == 'ROWS':
+            del sheet.data[start:end]
+            sheet.row_count = max(1, sheet.row_count - (end - start))
+        else:
+            for line in sheet.data:
+                del line[start:end]
+            sheet.col_count = max(1, sheet.col_count - (end - start))
+
+    def _req_appendDimension(self, body: Dict):
+        sheet = self.by_id(body.get('sheetId', 0))
+        if body.get('dimension') == 'ROWS':
+            sheet.row_count += int(body.get('length', 0))
+        else:
+            sheet.col_count += int(body.get('length', 0))
+
+    @staticmethod
+    def _entered_value(cell: Dict):
+        value = cell.get('userEnteredValue')
+        if not value:
+            return None
+        for key in ('stringValue', 'numberValue', 'boolValue', 'formulaValue'):
+            if key in value:
+                return value[key]
+        return None
+
+    def _req_repeatCell(self, body: Dict):
+        cell = body.get('cell', {})
+        if 'userEnteredValue' not in cell:
+            return  # reine Formatierung
+        rng = body['range']
+        sheet = self.by_id(rng.get('sheetId', 0))
+        value = self._entered_value(cell)
+        for r in range(rng.get('startRowIndex', 0), rng.get('endRowIndex', sheet.row_count)):
+            for c in range(rng.get('startColumnIndex', 0), rng.get('endColumnIndex', sheet.col_count)):
+                sheet.set_cell(r, c, value)
+
+    def _req_updateCells(self, body: Dict):
+        start = body.get('start') or {}
+        rng = body.get('range') or {}
+        sheet = self.by_id(start.get('sheetId', rng.get('sheetId', 0)))
+        r0 = start.get('rowIndex', rng.get('startRowIndex', 0))
+        c0 = start.get('columnIndex', rng.get('startColumnIndex', 0))
+        for i, row in enumerate(body.get('rows', [])):
+            for j, cell in enumerate(row.get('values', [])):
+                if 'userEnteredValue' in cell:
+                    sheet.set_cell(r0 + i, c0 + j, self._entered_value(cell))
+
+    def _req_sortRange(self, body: Dict):
+        rng = body['range']
+        sheet = self.by_id(rng.get('sheetId', 0))
+        r1 = rng.get('startRowIndex', 0)
+        r2 = min(rng.get('endRowIndex', sheet.row_count), max(len(sheet.data), r1))
+        c1 = rng.get('startColumnIndex', 0)
+        c2 = rng.get('endColumnIndex', sheet.col_count)
+        while len(sheet.data) < r2:
+            sheet.data.append([])
+        rows = [[sheet.get_cell(r, c) for c in range(c1, c2)] for r in range(r1, r2)]
+        # Wie Google: Text ohne Groß-/Kleinschreibung, leere Zellen immer am Ende
+        for spec in reversed(body.get('sortSpecs', [])):
+            col = int(spec.get('dimensionIndex', 0)) - c1
+            descending = spec.get('sortOrder') == 'DESCENDING'
+            filled = [row for row in rows if row[col] != '']
+            filled.sort(key=lambda row: row[col].casefold(), reverse=descending)
+            rows = filled + [row for row in rows if row[col] == '']
+        for i, row in enumerate(rows):
+            for j, value in enumerate(row):
+                line = sheet.data[r1 + i]
+                if c1 + j < len(line) or value != '':
+                    sheet.set_cell(r1 + i, c1 + j, value)
+
+    def dump(self) -> Dict[str, List[List[str]]]:
+        return {s.title: _trim(s.data) for s in self.sheets}
+
+
+class FakeSheetsState:
+    """Alle Spreadsheets, Kontingente und Zähler des Servers (thread-sicher)"""
+
+    def __init__(self, seed: Optional[Dict] = None, latency_ms: float = 0, jitter_ms: float = 0,
+                 read_quota: int = 0, write_quota: int = 0):
+        self.seed = seed or {}
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.read_quota = read_quota
+        self.write_quota = write_quota
+        self.lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.spreadsheets: Dict[str, FakeSpreadsheet] = {}
+            self.calls: Dict[str, int] = defaultdict(int)
+            self.calls_by_sheet: Dict[str, int] = defaultdict(int)
+            self.throttled = 0
+            self.throttled_by_method: Dict[str, int] = defaultdict(int)
+            self.cells_read = 0
+            self.cells_written = 0
+            self.started = time.time()
+            self._windows = {'read': deque(), 'write': deque()}
+
+    def spreadsheet(self, spreadsheet_id: str) -> FakeSpreadsheet:
+        with self.lock:
+            sh = self.spreadsheets.get(spreadsheet_id)
+            if sh is None:
+                sh = FakeSpreadsheet(spreadsheet_id, json.loads(json.dumps(self.seed)))
+                self.spreadsheets[spreadsheet_id] = sh
+            return sh
+
+    def check_quota(self, kind: str, method: str = '') -> Optional[int]:
+        """Gleitendes Minutenfenster; gibt Retry-After (Sekunden) zurück, falls überschritten"""
+        limit = self.read_quota if kind == 'read' else self.write_quota
+        if not limit:
+            return None
+        with self.lock:
+            window = self._windows[kind]
+            now = time.monotonic()
+            while window and now - window[0] >= 60:
+                window.popleft()
+            if len(window) >= limit:
+                self.throttled += 1
+                self.throttled_by_method[method] += 1
+                return max(1, int(60 - (now - window[0])) + 1)
+            window.append(now)
+            return None
+
+    def record(self, method: str, sheets: List[str]):
+        with self.lock:
+            self.calls[method] += 1
+            for title in sheets:
+                self.calls_by_sheet[title] += 1
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {
+                'calls': dict(self.calls),
+                'calls_total': sum(self.calls.values()),
+                'calls_by_sheet': dict(self.calls_by_sheet),
+                'throttled': self.throttled,
+                'throttled_by_method': dict(self.throttled_by_method),
+                'cells_read': self.cells_read,
+                'cells_written': self.cells_written,
+                'uptime_seconds': round(time.time() - self.started, 3),
+            }
+
+
+# ============================================
+# HTTP
+# ============================================
+def _sheet_title(a1: str) -> str:
+    if '!' not in a1:
+        return a1.strip("'")
+    title = a1.rsplit('!', 1)[0]
+    return title[1:-1].replace("''", "'") if title.startswith("'") else title
+
+
+def _count_cells(values: Optional[List[List]]) -> int:
+    return sum(len(row) for row in values or [])
+
+
+class FakeSheetsHandler(BaseHTTPRequestHandler):
+    server_version = "FakeSheets/1.0"
+    protocol_version = "HTTP/1.1"  # Keep-Alive wie bei Google
+    state: FakeSheetsState = None
+    quiet = True
+
+    def log_message(self, fmt, *args):
+        if not self.quiet:
+            super().log_message(fmt, *args)
+
+    def _send(self, code: int, payload: Dict, headers: Optional[Dict] = None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, code: int, message: str, status: str, headers: Optional[Dict] = None):
+        self._send(code, {'error': {'code': code, 'message': message, 'status': status}}, headers)
+
+    def _body(self) -> Dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length).decode('utf-8') or '{}')
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def _dispatch(self, http_method: str):
+        state = self.state
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        path = parts.path
+        try:
+            body = self._body() if http_method in ('POST', 'PUT') else {}
+
+            if path.startswith('/_fake/'):
+                return self._control(http_method, path, body)
+
+            match = re.match(r'^/v4/spreadsheets/([^/:]+)(.*)$', path)
+            if not match:
+                raise FakeSheetsError(404, f'Unknown endpoint: {path}', 'NOT_FOUND')
+            spreadsheet_id, rest = match.group(1), match.group(2)
+            method, kind, sheets, handler = self._route(http_method, rest, query, body)
+
+            # Kontingent und Latenz wie beim echten Dienst
+            retry_after = state.check_quota(kind, method)
+            if retry_after is not None:
+                return self._error(429, f"Quota exceeded for quota metric '{kind.title()} requests' "
+                                        f"(fake server)", 'RESOURCE_EXHAUSTED',
+                                   {'Retry-After': str(retry_after)})
+            delay = state.latency_ms + (random.uniform(0, state.jitter_ms) if state.jitter_ms else 0)
+            if delay:
+                time.sleep(delay / 1000.0)
+
+            with state.lock:
+                result = handler(state.spreadsheet(spreadsheet_id))
+            state.record(method, sheets)
+            self._send(200, result)
+        except FakeSheetsError as e:
+            self._error(e.code, e.message, e.status)
+        except (KeyError, ValueError, TypeError) as e:
+            self._error(400, f'Invalid request: {e}', 'INVALID_ARGUMENT')
+
+    def _route(self, http_method: str, rest: str, query: Dict, body: Dict):
+        """Bestimmt (Methode, read/write, Blätter, Handler) für einen API-Pfad"""
+        state = self.state
+        major = (query.get('majorDimension') or ['ROWS'])[0]
+
+        if rest == '' and http_method == 'GET':
+            return 'spreadsheets.get', 'read', [], lambda sh: sh.metadata()
+        if rest == ':batchUpdate' and http_method == 'POST':
+            requests = body.get('requests', [])
+            return 'spreadsheets.batchUpdate', 'write', [], lambda sh: sh.batch_update(requests)
+        if rest == '/values:batchGet' and http_method == 'GET':
+            ranges = query.get('ranges', [])
+
+            def batch_get(sh):
+                value_ranges = [sh.values_get(r, major) for r in ranges]
+                state.cells_read += sum(_count_cells(v.get('values')) for v in value_ranges)
+                return {'spreadsheetId': sh.spreadsheet_id, 'valueRanges': value_ranges}
+            return 'values.batchGet', 'read', [_sheet_title(r) for r in ranges], batch_get
+        if rest == '/values:batchUpdate' and http_method == 'POST':
+            data = body.get('data', [])
+
+            def batch_update(sh):
+                responses = [sh.values_update(d['range'], d.get('values', []),
+                                              d.get('majorDimension', 'ROWS')) for d in data]
+                state.cells_written += sum(r['updatedCells'] for r in responses)
+                return {'spreadsheetId': sh.spreadsheet_id, 'responses': responses,
+                        'totalUpdatedCells': sum(r['updatedCells'] for r in responses)}
+            return 'values.batchUpdate', 'write', [_sheet_title(d['range']) for d in data], batch_update
+        if rest == '/values:batchClear' and http_method == 'POST':
+            ranges = body.get('ranges', [])
+            return ('values.batchClear', 'write', [_sheet_title(r) for r in ranges],
+                    lambda sh: {'spreadsheetId': sh.spreadsheet_id,
+                                'clearedRanges': [sh.values_clear(r)['clearedRange'] for r in ranges]})
+        if rest.startswith('/values/'):
+            a1 = unquote(rest[len('/values/'):])
+            if a1.endswith(':append') and http_method == 'POST':
+                a1 = a1[:-len(':append')]
+                values = body.get('values', [])
+                state.cells_written += _count_cells(values)
+                return 'values.append', 'write', [_sheet_title(a1)], lambda sh: sh.values_append(a1, values)
+            if a1.endswith(':clear') and http_method == 'POST':
+                a1 = a1[:-len(':clear')]
+                return 'values.clear', 'write', [_sheet_title(a1)], lambda sh: sh.values_clear(a1)
+            if http_method == 'GET':
+                def get(sh):
+                    result = sh.values_get(a1, major)
+                    state.cells_read += _count_cells(result.get('values'))
+                    return result
+                return 'values.get', 'read', [_sheet_title(a1)], get
+            if http_method == 'PUT':
+                values = body.get('values', [])
+                state.cells_written += _count_cells(values)
+                return ('values.update', 'write', [_sheet_title(a1)],
+                        lambda sh: sh.values_update(a1, values, body.get('majorDimension', major)))
+        raise FakeSheetsError(404, f'Unknown endpoint: {http_method} {rest}', 'NOT_FOUND')
+
+    def _control(self, http_method: str, path: str, body: Dict):
+        """Steuer-Endpunkte des Fake-Servers (ohne Latenz/Kontingent)"""
+        state = self.state
+        if path == '/_fake/stats':
+            return self._send(200, state.stats())
+        if path == '/_fake/reset' and http_method == 'POST':
+            state.reset()
+            return self._send(200, {'ok': True})
+        if path == '/_fake/state':
+            if http_method == 'PUT':
+                # {spreadsheet_id: {Blatt: Zeilen}} oder {Blatt: Zeilen} als neuer Seed
+                with state.lock:
+                    state.seed = body.get('seed', state.seed)
+                    for spreadsheet_id, sheets in body.get('spreadsheets', {}).items():
+                        state.spreadsheets[spreadsheet_id] = FakeSpreadsheet(spreadsheet_id, sheets)
+                return self._send(200, {'ok': True})
+            with state.lock:
+                return self._send(200, {sid: sh.dump() for sid, sh in state.spreadsheets.items()})
+        raise FakeSheetsError(404, f'Unknown control endpoint: {path}', 'NOT_FOUND')
+
+
+class FakeSheetsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Vom Client geschlossene Keep-Alive-Verbindungen sind kein Fehler
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+
+def create_server(host: str = '127.0.0.1', port: int = DEFAULT_PORT, seed: Optional[Dict] = None,
+                  latency_ms: float = 0, jitter_ms: float = 0, read_quota: int = 0,
+                  write_quota: int = 0, quiet: bool = True) -> FakeSheetsServer:
+    """Erstellt den Server (port=0: freier Port, siehe server.server_address)"""
+    state = FakeSheetsState(seed, latency_ms, jitter_ms, read_quota, write_quota)
+    handler = type('BoundFakeSheetsHandler', (FakeSheetsHandler,), {'state': state, 'quiet': quiet})
+    server = FakeSheetsServer((host, port), handler)
+    server.state = state
+    return server
+
+
+def start_in_thread(**kwargs) -> Tuple[FakeSheetsServer, str]:
+    """Startet den Server im Hintergrund (für Benchmarks); gibt (Server, Endpoint-URL) zurück"""
+    kwargs.setdefault('port', 0)
+    server = create_server(**kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lokaler Ersatz für die Google Sheets API v4")
+    parser.add_argument("--host", default="127.0.0.1", help="Adresse (Standard: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (Standard: {DEFAULT_PORT})")
+    parser.add_argument("--seed", type=str, default=None,
+                       help="JSON-Datei mit Startinhalt {Blatt: [[Zeile], ...]}")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Feste Latenz pro Aufruf")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Zusätzliche zufällige Latenz (0..N ms)")
+    parser.add_argument("--read-quota", type=int, default=0,
+                       help=f"Leseaufrufe pro Minute, 0 = unbegrenzt (Google: {DEFAULT_READ_QUOTA})")
+    parser.add_argument("--write-quota", type=int, default=0,
+                       help=f"Schreibaufrufe pro Minute, 0 = unbegrenzt (Google: {DEFAULT_WRITE_QUOTA})")
+    parser.add_argument("--verbose", action="store_true", help="Jede Anfrage protokollieren")
+    args = parser.parse_args()
+
+    seed = None
+    if args.seed:
+        with open(args.seed, encoding='utf-8') as f:
+            seed = json.load(f)
+
+    server = create_server(args.host, args.port, seed, args.latency_ms, args.jitter_ms,
+                           args.read_quota, args.write_quota, quiet=not args.verbose)
+    print(f"✓ Fake-Sheets-Server läuft auf http://{args.host}:{server.server_address[1]}")
+    print(f"  export SHEETS_API_ENDPOINT=http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n=== Beende Fake-Sheets-Server ===")
+        print(json.dumps(server.state.stats(), indent=2, ensure_ascii=False))
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
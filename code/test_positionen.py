@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_positionen.py – Aufenthalte (Intervalle) in 'positionen'
+
+Benutzung:
+    cd code && python3 -m pytest -q test_positionen.py
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import Schiffs_Datenbank as sdb
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = sdb.SchiffsDatenbank(str(tmp_path / "schiffe.db"))
+    database.migrate()
+    yield database
+    database.close()
+
+
+def insert_observations(db, ship_id, liegeort, days):
+    """Eine Zeile pro Import wie vor den Intervallen (ankunft = zuletzt_gesehen = Importzeit)"""
+    with db.transaction():
+        db.cursor.executemany("""
+            INSERT INTO positionen (schiff_id, liegeort, ankunft, zuletzt_gesehen, status)
+            VALUES (?, ?, ?, ?, 'aktiv')
+        """, [(ship_id, liegeort, f"{day} 08:00:00", f"{day} 08:00:00") for day in days])
+
+
+def intervals(db, ship_id):
+    return db.conn.execute("""
+        SELECT liegeort, ankunft, abfahrt, zuletzt_gesehen, beobachtungen, status
+        FROM positionen WHERE schiff_id = ? ORDER BY id
+    """, (ship_id,)).fetchall()
+
+
+def test_coalesce_keeps_separate_visits_to_the_same_berth(db):
+    ship_id = db.add_ship('ALPHA')
+    insert_observations(db, ship_id, 'CTT 3', ['2026-01-05', '2026-01-06', '2026-03-10', '2026-03-11'])
+
+    assert db.coalesce_position_history() == 2
+    assert intervals(db, ship_id) == [
+        ('CTT 3', '2026-01-05 08:00:00', '2026-01-06 08:00:00', '2026-01-06 08:00:00', 2, 'beendet'),
+        ('CTT 3', '2026-03-10 08:00:00', None, '2026-03-11 08:00:00', 2, 'aktiv'),
+    ]
+    assert [s['name'] for s in db.ships_at('CTT', '2026-01-05', '2026-01-07')] == ['ALPHA']
+    assert db.ships_at('CTT', '2026-02-01', '2026-02-15') == []
+    assert [s['name'] for s in db.ships_at('CTT', '2026-03-01', '2026-03-31')] == ['ALPHA']
+
+
+def test_coalesce_merges_daily_imports_of_one_stay(db):
+    ship_id = db.add_ship('BRAVO')
+    insert_observations(db, ship_id, 'EUROGATE', ['2026-01-05', '2026-01-06', '2026-01-07'])
+    insert_observations(db, ship_id, 'CTA 1', ['2026-01-08'])
+
+    assert db.coalesce_position_history() == 2
+    assert intervals(db, ship_id) == [
+        ('EUROGATE', '2026-01-05 08:00:00', '2026-01-07 08:00:00', '2026-01-07 08:00:00', 3, 'beendet'),
+        ('CTA 1', '2026-01-08 08:00:00', None, '2026-01-08 08:00:00', 1, 'aktiv'),
+    ]
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_sheets_sync.py – Sheets-Abgleiche gegen den lokalen Fake-Server
+
+Jeder Test startet sheets_fake_server mit einem Startinhalt, lenkt
+sheets_client per SHEETS_API_ENDPOINT darauf um und prüft danach den
+Blattinhalt und die Anzahl der API-Aufrufe je Methode.
+
+Benutzung:
+    cd code && python3 -m pytest -q test_sheets_sync.py
+"""
+
+import os
+import sys
+import json
+import urllib.request
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import sheets_client
+import sheets_fake_server
+import Schiffs_Datenbank as sdb
+
+HHLA = sdb.HHLA_SHEET
+WRITE_METHODS = {'values.update', 'values.batchUpdate', 'values.append', 'values.clear',
+                 'values.batchClear', 'spreadsheets.batchUpdate'}
+
+
+class FakeSheets:
+    """Zugriff auf Inhalt und Zähler eines laufenden Fake-Servers"""
+
+    def __init__(self, url: str):
+        self.url = url
+
+    def _get(self, path: str):
+        with urllib.request.urlopen(self.url + path) as response:
+            return json.load(response)
+
+    def sheet(self, title: str):
+        (spreadsheet,) = self._get('/_fake/state').values()
+        return spreadsheet.get(title, [])
+
+    def calls(self):
+        return self._get('/_fake/stats')['calls']
+
+    def writes(self):
+        return {method: n for method, n in self.calls().items() if method in WRITE_METHODS}
+
+
+def diff_calls(before, after):
+    return {method: n - before.get(method, 0) for method, n in after.items() if n != before.get(method, 0)}
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    """Startet je Aufruf einen Fake-Server mit dem übergebenen Startinhalt"""
+    servers = []
+
+    def start(seed):
+        server, url = sheets_fake_server.start_in_thread(seed=seed)
+        servers.append(server)
+        monkeypatch.setenv(sheets_client.ENDPOINT_ENV, url)
+        sheets_client.reset()
+        return FakeSheets(url)
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+    sheets_client.reset()
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = sdb.SchiffsDatenbank(str(tmp_path / "schiffe.db"))
+    database.migrate()
+    yield database
+    database.close()
+
+
+def hhla_row(name, *values):
+    return [name] + list(values)
+
+
+# ----------------------------- diff_grids / write_grid -----------------------------
+
+def test_diff_grids_only_changed_cells():
+    current = [['a', 'b', 'x'], ['c', 'd'], ['e', 'f']]
+    diff = sheets_client.diff_grids(current, [['a', 'b'], ['c', 'D']], width=2, sheet='T')
+
+    assert diff['data'] == [{'range': "'T'!B2", 'values': [['D']]}]
+    assert diff['clear'] == ['A3:B3']
+    assert diff['stats']['cells_written'] == 1
+    assert diff['stats']['rows_changed'] == 1
+    assert diff['stats']['rows_cleared'] == 1
+
+
+def test_write_grid_writes_diff_and_keeps_columns_right_of_width(fake):
+    sheets = fake({'T': [['a', 'b', 'keep'], ['c', 'd'], ['e', 'f']]})
+    ws = sheets_client.get_worksheet(sdb.SERVICE_ACCOUNT_FILE, sdb.SPREADSHEET_URL, 'T')
+
+    before = sheets.calls()
+    stats = sheets_client.write_grid(ws, [['a', 'b'], ['c', 'D'], ['g', 'h'], ['i', 'j']], width=2)
+    assert sheets.sheet('T') == [['a', 'b', 'keep'], ['c', 'D'], ['g', 'h'], ['i', 'j']]
+    assert stats['cells_written'] == 5
+    assert diff_calls(before, sheets.calls()) == {'values.get': 1, 'values.batchUpdate': 1}
+
+    # Gleicher Inhalt: nur der Lesezugriff
+    before = sheets.calls()
+    sheets_client.write_grid(ws, [['a', 'b'], ['c', 'D'], ['g', 'h'], ['i', 'j']], width=2)
+    assert diff_calls(before, sheets.calls()) == {'values.get': 1}
+
+    # Kürzer: überzählige Zeilen werden geleert, nicht gelöscht
+    before = sheets.calls()
+    sheets_client.write_grid(ws, [['a', 'b']], width=2)
+    assert sheets.sheet('T') == [['a', 'b', 'keep']]
+    assert diff_calls(before, sheets.calls()) == {'values.get': 1, 'values.batchClear': 1}
+
+
+# ----------------------------- sync_schiffsdaten -----------------------------
+
+def segelliste(*ships):
+    """Segelliste mit Name in Spalte E und Typ in Spalte N"""
+    return [['Header'] * 14] + [['', '', '', '', name, '', '', '', '', '', '', '', '', typ] for name, typ in ships]
+
+
+def test_sync_schiffsdaten_merges_by_name_and_sorts_whole_rows(fake, db, monkeypatch):
+    monkeypatch.setattr(sdb, 'SELENIUM_AVAILABLE', False)
+    header = sdb.HHLA_HEADER + ['', 'Bild']
+    sheets = fake({
+        'Segelliste': segelliste(('zulu', 'Tanker'), ('Alpha', 'Bulk'), ('BRAVO', 'RoRo'), ('charlie', '')),
+        HHLA: [
+            header,
+            hhla_row('BRAVO', '', '212', '', '', '', '', '', '', '', 'http://b'),
+            hhla_row('ALPHA', 'Bulk', '211', '', '', '', '', '', '', '', 'http://a'),
+            hhla_row('BRAVO', '', '999'),
+            hhla_row('XRAY', 'Tanker', '', '', '', '', '', '', '', '', 'http://x'),
+        ],
+    })
+
+    sdb.sync_schiffsdaten(db)
+
+    # Duplikat gelöscht, Typ ergänzt, neue Schiffe einsortiert, Spalte K bleibt beim Schiff
+    assert sheets.sheet(HHLA) == [
+        header,
+        hhla_row('ALPHA', 'Bulk', '211', '', '', '', '', '', '', '', 'http://a'),
+        hhla_row('BRAVO', 'RoRo', '212', '', '', '', '', '', '', '', 'http://b'),
+        ['CHARLIE'],
+        hhla_row('XRAY', 'Tanker', '', '', '', '', '', '', '', '', 'http://x'),
+        ['ZULU', 'Tanker'],
+    ]
+    assert sheets.calls()['values.batchGet'] == 1
+    assert sheets.writes() == {'spreadsheets.batchUpdate': 1}
+
+    # Zweiter Lauf: nichts zu tun, kein Schreibzugriff
+    sdb.sync_schiffsdaten(db)
+    assert sheets.calls()['values.batchGet'] == 2
+    assert sheets.writes() == {'spreadsheets.batchUpdate': 1}
+
+
+# ----------------------------- sync_hhla_sheet -----------------------------
+
+def test_sync_hhla_sheet_three_way_merge(fake, db):
+    db.upsert_ships([
+        {'name': 'ALPHA', 'mmsi_nummer': '211000001', 'laenge': 200.0, 'breite': 32.2},
+        {'name': 'BRAVO', 'mmsi_nummer': '211000002', 'baujahr': 2010},
+    ])
+    sheets = fake({HHLA: [
+        sdb.HHLA_HEADER,
+        hhla_row('ALPHA', 'Bulk', '', '9000001', '2005', '200,0', '', '', ''),
+        hhla_row('BRAVO', 'RoRo', '211000002', '', '2010'),
+        hhla_row('CHARLIE', '', 'Keine Daten'),
+    ]})
+
+    counts = sdb.sync_hhla_sheet(db)
+
+    # Leere Zellen werden aus der Datenbank befüllt, Sheet-Werte in die Datenbank übernommen
+    assert counts == {'rows': 3, 'checked': 3, 'to_sheet': 1, 'to_db': 1, 'conflicts': 0}
+    assert sheets.sheet(HHLA)[1] == hhla_row('ALPHA', 'Bulk', '211000001', '9000001', '2005', '200,0', '32.2')
+    alpha = db.get_by_name('ALPHA')
+    assert (alpha['imo_nummer'], alpha['baujahr'], alpha['laenge']) == ('9000001', 2005, 200.0)
+    assert sheets.writes() == {'values.batchUpdate': 1}
+
+    # Beide Seiten ändern dasselbe Feld: Regel entscheidet (Standard: Sheet gewinnt)
+    db.upsert_ships([{'name': 'ALPHA', 'breite': 33.0}, {'name': 'BRAVO', 'baujahr': 2011}])
+    ws = sheets_client.get_worksheet(sdb.SERVICE_ACCOUNT_FILE, sdb.SPREADSHEET_URL, HHLA)
+    ws.update(range_name='G2', values=[['34']])
+
+    counts = sdb.sync_hhla_sheet(db, rules={'breite': 'sheet'})
+    assert counts['conflicts'] == 1
+    assert counts['checked'] == 2
+    assert db.get_by_name('ALPHA')['breite'] == 34.0
+    assert sheets.sheet(HHLA)[2][4] == '2011'  # nur die Datenbank hat geändert
+
+
+def test_sync_hhla_sheet_incremental_via_change_log(fake, db):
+    db.upsert_ships([{'name': f'SCHIFF {i:02d}', 'mmsi_nummer': f'2110000{i:02d}'} for i in range(20)])
+    sheets = fake({HHLA: [sdb.HHLA_HEADER] + [hhla_row(f'SCHIFF {i:02d}') for i in range(20)]})
+
+    assert sdb.sync_hhla_sheet(db)['to_sheet'] == 20
+    assert sheets.writes() == {'values.batchUpdate': 1}
+
+    # Nichts geändert: nur der Lesezugriff, keine Zeile abgeglichen
+    before = sheets.calls()
+    counts = sdb.sync_hhla_sheet(db)
+    assert counts['checked'] == 0
+    assert diff_calls(before, sheets.calls()) == {'values.batchGet': 1}
+
+    # Ein Schiff in der Datenbank geändert: laut Änderungsprotokoll nur diese Zeile
+    db.upsert_ships([{'name': 'SCHIFF 07', 'imo_nummer': '9000007'}])
+    before = sheets.calls()
+    counts = sdb.sync_hhla_sheet(db)
+    assert (counts['checked'], counts['to_sheet'], counts['to_db']) == (1, 1, 0)
+    assert sheets.sheet(HHLA)[8][:4] == ['SCHIFF 07', '', '211000007', '9000007']
+    assert diff_calls(before, sheets.calls()) == {'values.batchGet': 1, 'values.batchUpdate': 1}
+
+
+# ----------------------------- upsert_ships -----------------------------
+
+def test_upsert_ships_counts_and_numbers(db):
+    counts = db.upsert_ships([
+        {'name': 'ALPHA', 'laenge': '199,9', 'baujahr': '2001'},
+        {'name': 'BRAVO', 'breite': 32},
+        {'name': 'ALPHA', 'tiefgang': '12,5'},  # doppelt: wird zusammengeführt
+    ])
+    assert counts == {'inserted': 2, 'updated': 0, 'unchanged': 0}
+    alpha = db.get_by_name('ALPHA')
+    assert (alpha['laenge'], alpha['tiefgang'], alpha['baujahr']) == (199.9, 12.5, 2001)
+
+    counts = db.upsert_ships([
+        {'name': 'ALPHA', 'laenge': 199.9},        # gleicher Wert
+        {'name': 'BRAVO', 'breite': '32,5'},       # geändert
+        {'name': 'CHARLIE', 'laenge': 'unbekannt'},  # neu, Zahl nicht lesbar
+    ])
+    assert counts == {'inserted': 1, 'updated': 1, 'unchanged': 1}
+    assert db.get_by_name('BRAVO')['breite'] == 32.5
+    assert db.get_by_name('CHARLIE')['laenge'] is None
+
+
+# ----------------------------- search_keine_daten -----------------------------
+
+def test_search_keine_daten_writes_results_in_one_batch(fake, db, monkeypatch):
+    results = {
+        'ALPHA': {'mmsi_nummer': '211000001', 'imo_nummer': '9000001', 'baujahr': 2005,
+                  'laenge': 200.0, 'breite': 32.2, 'vesselfinder_link': 'https://vf/alpha'},
+        'BRAVO': None,
+        'CHARLIE': None,
+    }
+
+    def scrape_vessels(names, workers=1, headless=True, attempts=1, delay=3.0):
+        for name in names:
+            yield name, results[name], 'Timeout' if name == 'CHARLIE' else None
+
+    monkeypatch.setattr(sdb, 'SELENIUM_AVAILABLE', True)
+    monkeypatch.setattr(sdb, 'scrape_vessels', scrape_vessels)
+    sheets = fake({HHLA: [
+        sdb.HHLA_HEADER,
+        hhla_row('ALPHA', 'Bulk', 'Keine Daten'),
+        hhla_row('BRAVO', 'RoRo', 'Keine Daten'),
+        hhla_row('CHARLIE', '', 'Keine Daten'),
+        hhla_row('DELTA', '', 'Keine Daten 2'),
+    ]})
+
+    sdb.search_keine_daten(db, workers=2)
+
+    assert sheets.sheet(HHLA)[1:] == [
+        hhla_row('ALPHA', 'Bulk', '211000001', '9000001', '2005', '200.0', '32.2', '', 'https://vf/alpha'),
+        hhla_row('BRAVO', 'RoRo', 'Keine Daten 2'),
+        hhla_row('CHARLIE', '', 'Keine Daten 2'),
+        hhla_row('DELTA', '', 'Keine Daten 2'),
+    ]
+    assert sheets.writes() == {'values.batchUpdate': 1}